@@ -24,16 +24,18 @@ build_and_push() {
     local name=$1
     local path=$2
     local tag=$3
+    # 세 서비스 모두 src/common 공용 모듈을 쓰므로 src/ 를 컨텍스트로 빌드합니다.
+    local context=${4:-$path}
     echo "🗑️  기존 $name 이미지 삭제 중..."
     sudo docker rmi $REGISTRY/$name:$tag 2>/dev/null || true
     echo "🔨 $name 빌드 중..."
-    sudo docker build --no-cache -t $REGISTRY/$name:$tag $path
+    sudo docker build --no-cache -t $REGISTRY/$name:$tag -f $path/Dockerfile $context
     sudo docker push $REGISTRY/$name:$tag
 }
 
-build_and_push "auth-app" "./src/auth-app" "v2"
-build_and_push "product-app" "./src/product-app" "v1.1"
-build_and_push "worker3" "./src/worker-notion" "latest"
+build_and_push "auth-app" "./src/auth-app" "v2" "./src"
+build_and_push "product-app" "./src/product-app" "v1.1" "./src"
+build_and_push "worker3" "./src/worker-notion" "latest" "./src"
 
 # 4. MariaDB 먼저 배포
 echo "📦 MariaDB 인프라를 배포합니다..."
@@ -66,6 +68,11 @@ sudo kubectl rollout restart deployment/face-login-deployment
 sudo kubectl rollout restart deployment/product-search-deployment
 sudo kubectl rollout restart deployment/worker3-deployment
 
+# 8.1 DB 스키마 마이그레이션 (인덱스 등, 이미 적용된 것은 건너뜀)
+echo "🔧 DB 마이그레이션을 적용합니다..."
+sudo kubectl rollout status deployment/product-search-deployment --timeout=180s
+sudo kubectl exec deployment/product-search-deployment -- python -m app.migrations
+
 # 8.5 대시보드 배포
 echo "📊 대시보드를 배포합니다..."
 bash ~/Docker_project/deploy-dashboard.sh
@@ -0,0 +1,257 @@
+"""테스트용 로컬 Loki 서버 + 합성 로그 말뭉치.
+
+grafana_project.py / log_digest.py 가 쓰는 엔드포인트만 흉내 냅니다.
+- GET /loki/api/v1/query_range                                   : start/end(ns), limit, direction
+- GET /api/datasources/proxy/uid/{uid}/loki/api/v1/query_range   : Grafana 프록시 경로 (같은 응답)
+- GET /ready, /_stats                                            : 준비 확인 / 받은 요청 수
+
+말뭉치는 파일 없이 줄 번호에서 결정적으로 만들어집니다 (같은 --lines/--seed 면 항상 같은 로그).
+서버를 띄운 시각에서 --span 초 전까지 --lines 줄이 고르게 흩어져 있고, 서비스별로 오류 비율이 다르며
+--incident 를 주면 중간 10분 동안 product-search 에서 ChromaDB 오류가 몰립니다.
+셀렉터는 {key="value"} / {key!="value"} 만 지원합니다.
+
+    cd k3s-manifests/04-monitoring
+    python fake_loki.py --lines 3000000 --span 3600 --port 3100 --incident
+    LOKI_URL=http://127.0.0.1:3100 python log_digest.py --since 3600
+    python fake_loki.py --lines 3000000 --dump corpus.ndjson   # 다른 도구용 고정 말뭉치 파일
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+NS = 1_000_000_000
+MASK64 = (1 << 64) - 1
+
+# (서비스 레이블, 가중치, [(템플릿, 가중치, 레벨)])
+# 템플릿의 {n}/{ip}/{id}/{ms}/{word} 는 줄마다 다른 값으로 채워집니다.
+SERVICES = [
+    ({"app": "product-search", "namespace": "default", "job": "default/product-search"}, 40, [
+        ('INFO:     {ip} - "GET /product?name={word} HTTP/1.1" 200 OK', 50, "info"),
+        ('INFO:     {ip} - "GET /api/products?limit={n}&offset={n} HTTP/1.1" 200 OK', 20, "info"),
+        ('INFO:     {ip} - "GET /product/{n} HTTP/1.1" 200 OK', 15, "info"),
+        ('INFO:     {ip} - "GET /assets/{word}-{n}w.{id}.webp HTTP/1.1" 304 Not Modified', 10, "info"),
+        ('{{"event": "slow_request", "method": "GET", "path": "/product", "status": 200, "ms": {ms}}}', 3, "warn"),
+        ("⚠️ ChromaDB 연결 실패 ({n}/3): timed out", 1, "error"),
+        ('INFO:     {ip} - "GET /product?name={word} HTTP/1.1" 500 Internal Server Error', 1, "error"),
+    ]),
+    ({"app": "face-login", "namespace": "default", "job": "default/face-login"}, 30, [
+        ('INFO:     {ip} - "POST /login HTTP/1.1" 200 OK', 60, "info"),
+        ("얼굴 인식 성공: user_{n} (거리 {ms})", 30, "info"),
+        ("⚠️ 얼굴을 찾지 못했습니다 (frame {n})", 8, "warn"),
+        ("Server Error: list index out of range", 2, "error"),
+    ]),
+    ({"app": "notion-sync", "namespace": "default", "job": "default/notion-sync"}, 20, [
+        ("🔄 노션 변경분 조회: {n}개 (since {id})", 40, "info"),
+        ("✅ 상품 {n}개 저장 완료 ({ms}초)", 40, "info"),
+        ("📦 임베딩 캐시 적중 {n}/{n}", 15, "info"),
+        ("❌ DB 저장 에러: (1213, 'Deadlock found when trying to get lock; try restarting transaction')", 3, "error"),
+        ("⚠️ 노션 API 429: {n}초 후 재시도", 2, "warn"),
+    ]),
+    ({"app": "mariadb", "namespace": "default", "job": "default/mariadb"}, 10, [
+        ("{ts} {n} [Note] Aborted connection {n} to db: 'shop' user: 'root' host: '{ip}' (Got an error reading communication packets)", 70, "warn"),
+        ("{ts} 0 [Note] InnoDB: Buffer pool(s) load completed at {ts}", 29, "info"),
+        ("{ts} {n} [ERROR] Got error 28 from storage engine", 1, "error"),
+    ]),
+]
+INCIDENT_LINE = ("❌ ChromaDB 검색 실패: HTTPConnectionPool(host='chromadb-service', port=8000): "
+                 "Read timed out. (read timeout={n})", "error")
+LEVEL_LABELED = {"mariadb"}  # 수집기가 level 레이블을 붙여 주는 서비스 (나머지는 줄 내용으로 판단)
+WORDS = ["macbook", "iphone", "galaxy", "airpods", "monitor", "keyboard", "mouse", "ipad", "watch", "camera",
+         "노트북", "이어폰", "모니터", "키보드", "태블릿"]
+
+
+def splitmix64(x):
+    x = (x + 0x9E3779B97F4A7C15) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+
+def _cumulative(weights):
+    total, out = 0, []
+    for w in weights:
+        total += w
+        out.append(total)
+    return out, total
+
+
+class Corpus:
+    """줄 번호 i → (ts_ns, labels, line). 말뭉치 전체를 메모리에 두지 않습니다."""
+
+    def __init__(self, lines, span=3600.0, end_ns=None, seed=1, incident=False):
+        self.lines = lines
+        self.end_ns = end_ns or time.time_ns()
+        self.start_ns = self.end_ns - int(span * NS)
+        self.step = (self.end_ns - self.start_ns) / max(lines, 1)
+        self.seed = seed
+        self.service_cum, self.service_total = _cumulative(w for _, w, _ in SERVICES)
+        self.template_cum = [_cumulative(w for _, w, _ in templates) for _, _, templates in SERVICES]
+        half = int(lines * 300 / span) if incident else -1  # 가운데 10분
+        self.incident_range = range(lines // 2 - half, lines // 2 + half)
+
+    def ts(self, i):
+        return self.start_ns + int(i * self.step)
+
+    def index_at(self, ts_ns):
+        """ts_ns 이상인 첫 줄 번호."""
+        i = max(0, min(self.lines, int((ts_ns - self.start_ns) / self.step)))
+        while i > 0 and self.ts(i - 1) >= ts_ns:
+            i -= 1
+        while i < self.lines and self.ts(i) < ts_ns:
+            i += 1
+        return i
+
+    def entry(self, i):
+        r = splitmix64(i ^ (self.seed << 40))
+        pick = r % self.service_total
+        s = next(k for k, c in enumerate(self.service_cum) if pick < c)
+        labels, _, templates = SERVICES[s]
+        ts = self.ts(i)
+        # 중간 10분 장애: product-search 줄의 절반이 ChromaDB 타임아웃
+        if s == 0 and i in self.incident_range and (r >> 20) & 1:
+            template, level = INCIDENT_LINE
+        else:
+            cum, total = self.template_cum[s]
+            pick = (r >> 8) % total
+            template, _, level = templates[next(k for k, c in enumerate(cum) if pick < c)]
+        line = template.format(
+            n=(r >> 16) % 1000,
+            ip=f"10.42.{(r >> 24) & 0xff}.{(r >> 32) & 0xff}:{(r >> 40) % 60000 + 1024}",
+            id=f"{(r >> 4) & 0xffffffffffff:012x}",
+            ms=f"{((r >> 12) % 5000) / 1000:.3f}",
+            word=WORDS[(r >> 36) % len(WORDS)],
+            ts=time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(ts // NS)),
+        )
+        if labels["app"] in LEVEL_LABELED:
+            labels = dict(labels, level=level)
+        return ts, labels, line
+
+    def entries(self, lo, hi):
+        for i in range(lo, hi):
+            yield self.entry(i)
+
+
+SELECTOR = re.compile(r'(\w+)\s*(!?=)\s*"([^"]*)"')
+
+
+def matcher(query):
+    rules = SELECTOR.findall(query or "")
+
+    def match(labels):
+        for key, op, value in rules:
+            if (labels.get(key, "") == value) != (op == "="):
+                return False
+        return True
+    return match
+
+
+def query_range(corpus, query, start_ns, end_ns, limit, direction="backward"):
+    """Loki 처럼 [start, end) 에서 direction 순서로 limit 줄까지, 스트림(레이블)별로 묶어 돌려줍니다."""
+    match = matcher(query)
+    lo, hi = corpus.index_at(start_ns), corpus.index_at(end_ns)
+    indexes = range(lo, hi) if direction == "forward" else range(hi - 1, lo - 1, -1)
+    streams = {}
+    taken = 0
+    for i in indexes:
+        if taken >= limit:
+            break
+        ts, labels, line = corpus.entry(i)
+        if not match(labels):
+            continue
+        key = tuple(sorted(labels.items()))
+        streams.setdefault(key, (labels, []))[1].append([str(ts), line])
+        taken += 1
+    return {
+        "status": "success",
+        "data": {"resultType": "streams",
+                 "result": [{"stream": labels, "values": values} for labels, values in streams.values()],
+                 "stats": {"summary": {"totalLinesProcessed": taken}}},
+    }
+
+
+class State:
+    def __init__(self, corpus, latency=0.0):
+        self.corpus = corpus
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.lines = 0
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body, content_type="application/json"):
+            data = body if isinstance(body, bytes) else json.dumps(body, ensure_ascii=False).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            if parsed.path == "/ready":
+                return self._send(200, b"ready", "text/plain")
+            if parsed.path == "/_stats":
+                return self._send(200, {"requests": state.requests, "lines": state.lines})
+            if not parsed.path.endswith("/loki/api/v1/query_range"):
+                return self._send(404, {"message": "not found"})
+            params = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+            try:
+                end_ns = int(params.get("end") or state.corpus.end_ns)
+                start_ns = int(params.get("start") or end_ns - 3600 * NS)
+                limit = int(params.get("limit", 100))
+            except ValueError:
+                return self._send(400, {"status": "error", "error": "start/end 는 나노초 정수만 지원합니다"})
+            if state.latency:
+                time.sleep(state.latency)
+            body = query_range(state.corpus, params.get("query", ""), start_ns, end_ns, limit,
+                               params.get("direction", "backward"))
+            with state.lock:
+                state.requests += 1
+                state.lines += body["data"]["stats"]["summary"]["totalLinesProcessed"]
+            self._send(200, body)
+
+    return Handler
+
+
+def dump(corpus, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for ts, labels, line in corpus.entries(0, corpus.lines):
+            f.write(json.dumps({"ts": ts, "labels": labels, "line": line}, ensure_ascii=False) + "\n")
+    print(f"✅ {corpus.lines:,}줄 저장: {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--span", type=float, default=3600, help="말뭉치가 걸쳐 있는 시간(초, 지금까지)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--incident", action="store_true", help="중간 10분 동안 ChromaDB 오류 몰림")
+    parser.add_argument("--latency", type=float, default=0.0, help="요청마다 지연(초)")
+    parser.add_argument("--port", type=int, default=3100)
+    parser.add_argument("--dump", help="서버 대신 말뭉치를 NDJSON 파일로 저장")
+    args = parser.parse_args()
+
+    corpus = Corpus(args.lines, args.span, seed=args.seed, incident=args.incident)
+    if args.dump:
+        return dump(corpus, args.dump)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(State(corpus, args.latency)))
+    print(f"🧪 fake Loki: http://127.0.0.1:{args.port} ({args.lines:,}줄 / 최근 {args.span:.0f}초)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,14 @@
 import os
 import requests
-import json
+import time
 from datetime import datetime
 from dotenv import load_dotenv
 
 # .env 파일 로드 (로컬/서버의 .env 파일을 읽어옵니다)
 load_dotenv()
 
+from log_digest import LOKI_URL, collect_digest  # noqa: E402  (.env 를 읽은 뒤 설정을 가져옴)
+
 # ================= [설정 정보 - 환경변수 관리] =================
 GRAFANA_URL = os.getenv("GRAFANA_URL")
 GRAFANA_TOKEN = os.getenv("GRAFANA_TOKEN")
@@ -17,22 +19,19 @@ NOTION_DB_ID = os.getenv("NOTION_DB_ID")
 # ==========================================================
 
 def get_loki_logs():
+    """최근 LOKI_SINCE 초 로그 전체를 구간/페이지 단위로 읽어 템플릿별로 묶은 요약 텍스트를 돌려줍니다.
+    (예전처럼 응답 앞 2000자만 자르지 않으므로 로그 양과 상관없이 GPT 에 가는 크기가 일정합니다)"""
     print(" 1. Grafana Loki 시스템 로그 수집 중...")
-    if not GRAFANA_URL or not GRAFANA_TOKEN:
+    if not LOKI_URL and (not GRAFANA_URL or not GRAFANA_TOKEN):
         print(" 에러: GRAFANA 설정 정보가 .env에 없습니다.")
         return None
-        
-    url = f"{GRAFANA_URL}/api/ds/query"
-    headers = {"Authorization": f"Bearer {GRAFANA_TOKEN}", "Content-Type": "application/json"}
-    payload = {
-        "queries": [{"refId": "A", "datasource": {"type": "loki", "uid": GRAFANA_UID}, "expr": "{job!=\"\"}", "queryType": "range"}],
-        "from": "now-1h", "to": "now"
-    }
+
     try:
-        res = requests.post(url, headers=headers, json=payload, timeout=10)
-        if res.status_code == 200:
-            print(" 로그 수집 성공!")
-            return str(res.json().get('results', {}).get('A', {}).get('frames', []))[:2000]
+        started = time.perf_counter()
+        digest = collect_digest()
+        print(f" 로그 수집 성공! {digest.lines:,}줄 → 템플릿 {len(digest.miner.clusters)}개 "
+              f"({digest.pages}페이지, {time.perf_counter() - started:.1f}초)")
+        return digest.to_prompt() if digest.lines else None
     except Exception as e:
         print(f" 에러 발생: {e}")
         return None
@@ -42,9 +41,10 @@ def get_gpt_insight(raw_data):
     print(" 2. GPT 시스템 분석 중...")
     url = "https://api.openai.com/v1/chat/completions"
     headers = {"Authorization": f"Bearer {OPENAI_API_KEY}", "Content-Type": "application/json"}
-    prompt = f"아래 시스템 로그 데이터를 분석해서 핵심만 요약해줘 (상태 요약, 특이사항, 권장사항 포함):\n{raw_data}"
+    prompt = ("아래는 최근 시스템 로그를 서비스별 통계와 메시지 템플릿(<NUM>, <IP> 등은 바뀌는 값)으로 묶은 요약이야. "
+              f"분석해서 핵심만 요약해줘 (상태 요약, 특이사항, 권장사항 포함):\n{raw_data}")
     data = {"model": "gpt-4o", "messages": [{"role": "user", "content": prompt}]}
-    res = requests.post(url, headers=headers, json=data)
+    res = requests.post(url, headers=headers, json=data, timeout=120)
     return res.json()['choices'][0]['message']['content']
 
 def send_to_notion(insight):
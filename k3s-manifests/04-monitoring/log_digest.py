@@ -0,0 +1,436 @@
+"""Loki 로그를 시간 구간별로 나눠 읽으면서 템플릿으로 묶어 작은 요약(digest)을 만듭니다.
+
+- LokiReader: query_range 를 LOKI_WINDOW 초 구간으로 나누고, 구간 안에서는 LOKI_PAGE_LIMIT 줄씩
+  마지막 타임스탬프부터 이어서 읽습니다 (같은 나노초의 줄은 중복 제거). 응답은 문자열로 만들지 않고
+  소켓에서 바로 JSON 으로 읽으며, 한 번에 메모리에 올라가는 것은 한 페이지뿐입니다.
+- DrainMiner: Drain 방식(토큰 수 → 앞쪽 토큰 트리 → 유사도)으로 줄을 템플릿으로 묶습니다.
+  숫자/IP/UUID/시각 등은 먼저 <NUM> 같은 자리표시자로 바꾸고, 템플릿 수는 LOG_MAX_CLUSTERS 개까지만
+  유지합니다 (가장 오래 안 쓰인 것부터 제거).
+- LogDigest: 서비스별 줄 수/오류율/구간별 오류 수, 전체/오류 상위 템플릿을 모읍니다.
+  to_prompt() 가 GPT 에 보낼 텍스트를 DIGEST_MAX_CHARS 안으로 만듭니다.
+
+    python log_digest.py --loki-url http://127.0.0.1:3100 --since 3600      # fake_loki.py 로 처리량 측정
+    python log_digest.py --fake-lines 2000000                                # HTTP 없이 템플릿 묶기만 측정
+
+LOKI_URL 이 없으면 Grafana 데이터 소스 프록시(GRAFANA_URL/api/datasources/proxy/uid/GRAFANA_UID)로 읽습니다.
+"""
+import os
+import re
+import json
+import time
+import argparse
+from collections import OrderedDict
+
+import requests
+
+LOKI_URL = os.getenv("LOKI_URL", "")                              # 비어 있으면 Grafana 프록시 사용
+LOKI_QUERY = os.getenv("LOKI_QUERY", '{job!=""}')
+LOKI_SINCE = float(os.getenv("LOKI_SINCE", "3600"))               # 분석할 기간(초)
+LOKI_WINDOW = float(os.getenv("LOKI_WINDOW", "300"))              # 한 번에 조회할 시간 구간(초)
+LOKI_PAGE_LIMIT = int(os.getenv("LOKI_PAGE_LIMIT", "5000"))       # 요청 하나에서 받을 최대 줄 수
+LOKI_TIMEOUT = float(os.getenv("LOKI_TIMEOUT", "30"))
+LOG_SERVICE_LABELS = os.getenv("LOG_SERVICE_LABELS", "app,service_name,container,job").split(",")
+LOG_MAX_CLUSTERS = int(os.getenv("LOG_MAX_CLUSTERS", "2000"))     # 유지할 템플릿 최대 수
+LOG_TOP_TEMPLATES = int(os.getenv("LOG_TOP_TEMPLATES", "15"))
+DRAIN_DEPTH = int(os.getenv("DRAIN_DEPTH", "4"))                  # 트리 깊이 (앞쪽 DRAIN_DEPTH-2 개 토큰으로 분기)
+DRAIN_SIMILARITY = float(os.getenv("DRAIN_SIMILARITY", "0.5"))    # 같은 템플릿으로 볼 토큰 일치 비율
+DIGEST_MAX_CHARS = int(os.getenv("DIGEST_MAX_CHARS", "6000"))     # GPT 에 보낼 요약 최대 길이
+
+WILDCARD = "<*>"
+NS = 1_000_000_000
+
+# 자리표시자로 바꿀 값. 줄을 공백으로 나눈 뒤 숫자가 들어 있는 토큰에만 적용합니다 (시각은 날짜/시간 두 토큰).
+MASK = re.compile("|".join([
+    r"(?P<TIME>\d{4}-\d{2}-\d{2}(?:T\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?)?|\d{2}:\d{2}:\d{2}(?:[.,]\d+)?)",
+    r"(?P<UUID>[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})",
+    r"(?P<IP>\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?)",
+    r"(?P<HEX>\b(?:0x[0-9a-fA-F]+|(?=[0-9a-fA-F]{8,}\b)[0-9a-fA-F]*\d[0-9a-fA-F]*)\b)",
+    r"(?P<NUM>(?<![\w<])[-+]?\d+(?:\.\d+)?)",
+]), re.ASCII)
+PLACEHOLDERS = {name: f"<{name}>" for name in MASK.groupindex}
+DIGIT = re.compile(r"\d")
+ERROR_PATTERN = re.compile(r"❌|\b(?:ERROR|Error|error|CRITICAL|FATAL|Fatal|fatal|Traceback|Exception)\b|에러|실패", re.ASCII)
+WARN_PATTERN = re.compile(r"⚠️|\b(?:WARN|WARNING|Warning|warning)\b|slow_request", re.ASCII)
+LEVEL_LABELS = ("level", "detected_level", "severity")
+
+_masked_tokens = {}  # 토큰 → 마스킹 결과 (같은 토큰이 계속 반복되므로)
+
+
+def _placeholder(match):
+    return PLACEHOLDERS[match.lastgroup]
+
+
+def mask(line):
+    """줄 → 마스킹한 토큰 목록."""
+    tokens = []
+    for token in line.split():
+        masked = _masked_tokens.get(token)
+        if masked is None:
+            masked = MASK.sub(_placeholder, token) if DIGIT.search(token) else token
+            if len(_masked_tokens) < 100_000:
+                _masked_tokens[token] = masked
+        tokens.append(masked)
+    return tokens
+
+
+def service_of(labels):
+    for key in LOG_SERVICE_LABELS:
+        value = labels.get(key)
+        if value:
+            return value
+    return "unknown"
+
+
+def label_level(labels):
+    """레이블에 레벨이 있으면 error / warn / info, 없으면 None."""
+    for key in LEVEL_LABELS:
+        value = (labels.get(key) or "").lower()
+        if value:
+            if value.startswith(("err", "crit", "fatal")):
+                return "error"
+            if value.startswith("warn"):
+                return "warn"
+            return "info"
+    return None
+
+
+def text_level(text):
+    if ERROR_PATTERN.search(text):
+        return "error"
+    if WARN_PATTERN.search(text):
+        return "warn"
+    return "info"
+
+
+# ---- 템플릿 묶기 ----
+class LogCluster:
+    __slots__ = ("id", "tokens", "count", "errors", "services", "sample")
+
+    def __init__(self, cluster_id, tokens, sample):
+        self.id = cluster_id
+        self.tokens = tokens
+        self.count = 0
+        self.errors = 0
+        self.services = {}
+        self.sample = sample[:300]
+
+    @property
+    def template(self):
+        return " ".join(self.tokens)
+
+
+class DrainMiner:
+    """Drain 로그 템플릿 추출 (He et al., 2017) 의 단순한 구현."""
+
+    def __init__(self, depth=DRAIN_DEPTH, similarity=DRAIN_SIMILARITY, max_children=100,
+                 max_clusters=LOG_MAX_CLUSTERS):
+        self.prefix_depth = max(1, depth - 2)
+        self.similarity = similarity
+        self.max_children = max_children
+        self.max_clusters = max_clusters
+        self.root = {}
+        self.clusters = OrderedDict()  # id → LogCluster, 최근에 쓰인 것이 뒤
+        self._exact = OrderedDict()    # 마스킹한 줄 → 템플릿 id (같은 줄이 반복될 때 트리 탐색 생략)
+        self._next_id = 1
+        self.evicted = 0
+
+    def _leaf(self, tokens):
+        node = self.root.setdefault(len(tokens), {})
+        for token in tokens[:self.prefix_depth]:
+            if any(c.isdigit() for c in token) or token.startswith("<"):
+                token = WILDCARD
+            if token not in node:
+                token = token if len(node) < self.max_children else WILDCARD
+            node = node.setdefault(token, {})
+        return node.setdefault(None, [])  # None 키: 이 경로의 템플릿 id 목록
+
+    def _best(self, leaf, tokens):
+        best, best_score = None, -1.0
+        alive = []
+        for cluster_id in leaf:
+            cluster = self.clusters.get(cluster_id)
+            if cluster is None:
+                continue  # 제거된 템플릿
+            alive.append(cluster_id)
+            same = sum(1 for a, b in zip(cluster.tokens, tokens) if a == b)
+            score = same / len(tokens)
+            if score > best_score:
+                best, best_score = cluster, score
+        if len(alive) != len(leaf):
+            leaf[:] = alive
+        return best if best_score >= self.similarity else None
+
+    def add(self, line):
+        tokens = mask(line)
+        return self.add_masked(" ".join(tokens), tokens, line)
+
+    def add_masked(self, key, tokens, line):
+        """key: 마스킹한 줄 (tokens 를 공백으로 이은 것)."""
+        cluster = self.clusters.get(self._exact.get(key))
+        if cluster is None:
+            if not tokens:
+                return None
+            leaf = self._leaf(tokens)
+            cluster = self._best(leaf, tokens)
+            if cluster is None:
+                cluster = LogCluster(self._next_id, tokens, line)
+                self._next_id += 1
+                self.clusters[cluster.id] = cluster
+                leaf.append(cluster.id)
+                if len(self.clusters) > self.max_clusters:
+                    self.clusters.popitem(last=False)
+                    self.evicted += 1
+            else:
+                cluster.tokens = [a if a == b else WILDCARD for a, b in zip(cluster.tokens, tokens)]
+            self._exact[key] = cluster.id
+            if len(self._exact) > self.max_clusters * 4:
+                self._exact.popitem(last=False)
+        self.clusters.move_to_end(cluster.id)
+        cluster.count += 1
+        return cluster
+
+
+# ---- 집계 ----
+class LogDigest:
+    def __init__(self, start_ns=0, window=LOKI_WINDOW, miner=None):
+        self.miner = miner or DrainMiner()
+        self.start_ns = start_ns
+        self.window_ns = int(window * NS)
+        self.services = {}   # 서비스 → {"lines", "errors", "warnings"}
+        self.error_windows = {}  # 서비스 → {구간 번호: 오류 수}
+        self._levels = {}  # 마스킹한 줄 → 내용으로 본 레벨 (키워드는 마스킹되지 않으므로 같은 줄이면 같은 레벨)
+        self.lines = 0
+        self.first_ns = None
+        self.last_ns = None
+
+    def add(self, ts_ns, labels, line):
+        service = service_of(labels)
+        tokens = mask(line)
+        key = " ".join(tokens)
+        level = label_level(labels)
+        if level is None:
+            level = self._levels.get(key)
+            if level is None:
+                level = text_level(line)
+                if len(self._levels) < 100_000:
+                    self._levels[key] = level
+        self.lines += 1
+        if self.first_ns is None or ts_ns < self.first_ns:
+            self.first_ns = ts_ns
+        if self.last_ns is None or ts_ns > self.last_ns:
+            self.last_ns = ts_ns
+        stats = self.services.get(service)
+        if stats is None:
+            stats = self.services[service] = {"lines": 0, "errors": 0, "warnings": 0}
+        stats["lines"] += 1
+
+        cluster = self.miner.add_masked(key, tokens, line)
+        if cluster is not None:
+            cluster.services[service] = cluster.services.get(service, 0) + 1
+        if level == "error":
+            stats["errors"] += 1
+            windows = self.error_windows.setdefault(service, {})
+            bucket = (ts_ns - self.start_ns) // self.window_ns if self.window_ns else 0
+            windows[bucket] = windows.get(bucket, 0) + 1
+            if cluster is not None:
+                cluster.errors += 1
+        elif level == "warn":
+            stats["warnings"] += 1
+
+    def top(self, n=LOG_TOP_TEMPLATES, errors_only=False):
+        clusters = [c for c in self.miner.clusters.values() if c.errors or not errors_only]
+        key = (lambda c: c.errors) if errors_only else (lambda c: c.count)
+        return sorted(clusters, key=key, reverse=True)[:n]
+
+    def summary(self, n=LOG_TOP_TEMPLATES):
+        def cluster_dict(c):
+            return {"template": c.template, "count": c.count, "errors": c.errors,
+                    "services": dict(sorted(c.services.items(), key=lambda kv: -kv[1])[:3]), "sample": c.sample}
+
+        services = {}
+        for name, stats in sorted(self.services.items(), key=lambda kv: -kv[1]["lines"]):
+            windows = self.error_windows.get(name, {})
+            services[name] = dict(stats, error_rate=round(stats["errors"] / stats["lines"], 4),
+                                  peak_error_window=max(windows.values()) if windows else 0)
+        return {
+            "lines": self.lines,
+            "from": self.first_ns,
+            "to": self.last_ns,
+            "templates": len(self.miner.clusters),
+            "evicted_templates": self.miner.evicted,
+            "services": services,
+            "top_templates": [cluster_dict(c) for c in self.top(n)],
+            "top_error_templates": [cluster_dict(c) for c in self.top(n, errors_only=True)],
+        }
+
+    def to_prompt(self, max_chars=DIGEST_MAX_CHARS, n=LOG_TOP_TEMPLATES):
+        """GPT 에 보낼 요약. 길면 뒤쪽 템플릿부터 줄입니다."""
+        summary = self.summary(n)
+        window_min = self.window_ns / NS / 60
+        head = [f"분석 로그 {summary['lines']:,}줄, 템플릿 {summary['templates']}개"
+                + (f" (오래된 템플릿 {summary['evicted_templates']}개 제외)" if summary["evicted_templates"] else "")]
+        head.append("[서비스별] 서비스: 줄 수 / 오류 수(비율) / 경고 수 / "
+                    f"{window_min:.0f}분 구간 최대 오류 수")
+        for name, s in summary["services"].items():
+            head.append(f"- {name}: {s['lines']:,} / {s['errors']:,} ({s['error_rate']:.2%}) / {s['warnings']:,}"
+                        f" / {s['peak_error_window']:,}")
+
+        def lines_for(title, clusters, field):
+            out = [title]
+            for c in clusters:
+                services = ", ".join(f"{k} {v:,}" for k, v in c["services"].items())
+                out.append(f"- [{c[field]:,}회] {c['template'][:200]} ({services})")
+            return out
+
+        for keep in range(n, -1, -1):
+            parts = head + lines_for("[오류 상위 템플릿] (오류 횟수)", summary["top_error_templates"][:keep], "errors") \
+                + lines_for("[전체 상위 템플릿] (횟수)", summary["top_templates"][:keep], "count")
+            text = "\n".join(parts)
+            if len(text) <= max_chars:
+                return text
+        return text[:max_chars]
+
+
+# ---- Loki 읽기 ----
+class LokiReader:
+    """query_range 를 시간 구간 + 페이지 단위로 나눠 (ts_ns, labels, line) 을 흘려보냅니다."""
+
+    def __init__(self, base_url, headers=None, query=LOKI_QUERY, window=LOKI_WINDOW, limit=LOKI_PAGE_LIMIT,
+                 timeout=LOKI_TIMEOUT, session=None):
+        self.url = base_url.rstrip("/") + "/loki/api/v1/query_range"
+        self.headers = headers or {}
+        self.query = query
+        self.window_ns = int(window * NS)
+        self.limit = limit
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.pages = 0
+
+    def _page(self, start_ns, end_ns, retries=3):
+        params = {"query": self.query, "start": start_ns, "end": end_ns, "limit": self.limit,
+                  "direction": "forward"}
+        for attempt in range(retries):
+            res = self.session.get(self.url, params=params, headers=self.headers, timeout=self.timeout, stream=True)
+            if res.status_code in (429, 502, 503, 504) and attempt < retries - 1:
+                res.close()
+                time.sleep(float(res.headers.get("Retry-After") or 2 ** attempt))
+                continue
+            res.raise_for_status()
+            res.raw.decode_content = True
+            try:
+                data = json.load(res.raw)  # 응답 전체를 문자열로 만들지 않고 바로 파싱
+            finally:
+                res.close()
+            self.pages += 1
+            return data.get("data", {}).get("result", [])
+        return []
+
+    def entries(self, start_ns, end_ns):
+        for window_start in range(start_ns, end_ns, self.window_ns):
+            window_end = min(end_ns, window_start + self.window_ns)
+            cursor = window_start
+            # cursor 시각에 이미 내보낸 줄 (start 는 포함 범위라 다시 옴).
+            # Loki 도 한 스트림의 같은 시각·같은 내용 줄은 하나로 저장하므로 (스트림, 내용) 으로 구분합니다.
+            seen_at_cursor = set()
+            while True:
+                result = self._page(cursor, window_end)
+                received = 0
+                last_ts, last_keys = cursor, set()
+                for stream in result:
+                    labels = stream.get("stream", {})
+                    stream_key = hash(frozenset(labels.items()))
+                    for ts, line in stream.get("values", []):
+                        received += 1
+                        ts = int(ts)
+                        key = hash((stream_key, line))
+                        if ts > last_ts:
+                            last_ts, last_keys = ts, set()
+                        if ts == last_ts:
+                            last_keys.add(key)
+                        if ts == cursor and key in seen_at_cursor:
+                            continue
+                        yield ts, labels, line
+                if received < self.limit:
+                    break
+                if last_ts == cursor:
+                    seen_at_cursor |= last_keys
+                    if len(last_keys) >= self.limit:  # 같은 나노초에 limit 줄 이상: 더 진행할 수 없으니 넘어감
+                        cursor, seen_at_cursor = cursor + 1, set()
+                else:
+                    cursor, seen_at_cursor = last_ts, last_keys
+
+
+def default_source():
+    """(base_url, headers). LOKI_URL 이 없으면 Grafana 의 Loki 데이터 소스 프록시."""
+    if LOKI_URL:
+        return LOKI_URL, {}
+    grafana_url, token, uid = os.getenv("GRAFANA_URL"), os.getenv("GRAFANA_TOKEN"), os.getenv("GRAFANA_UID")
+    if not grafana_url or not token or not uid:
+        return None, None
+    return f"{grafana_url.rstrip('/')}/api/datasources/proxy/uid/{uid}", {"Authorization": f"Bearer {token}"}
+
+
+def collect_digest(since=LOKI_SINCE, base_url=None, headers=None, end_ns=None, **reader_options):
+    """최근 since 초의 로그를 읽어 LogDigest 를 반환합니다."""
+    if base_url is None:
+        base_url, headers = default_source()
+        if base_url is None:
+            raise ValueError("LOKI_URL 또는 GRAFANA_URL/GRAFANA_TOKEN/GRAFANA_UID 설정이 필요합니다.")
+    end_ns = end_ns or time.time_ns()
+    start_ns = end_ns - int(since * NS)
+    reader = LokiReader(base_url, headers, **reader_options)
+    digest = LogDigest(start_ns, reader.window_ns / NS)
+    for ts, labels, line in reader.entries(start_ns, end_ns):
+        digest.add(ts, labels, line)
+    digest.pages = reader.pages
+    return digest
+
+
+def main():
+    import resource
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--loki-url", default=LOKI_URL or None)
+    parser.add_argument("--query", default=LOKI_QUERY)
+    parser.add_argument("--since", type=float, default=LOKI_SINCE)
+    parser.add_argument("--window", type=float, default=LOKI_WINDOW)
+    parser.add_argument("--limit", type=int, default=LOKI_PAGE_LIMIT)
+    parser.add_argument("--fake-lines", type=int, help="HTTP 없이 fake_loki 말뭉치 N 줄로 템플릿 묶기만 측정")
+    parser.add_argument("--json", action="store_true", help="요약을 JSON 으로 출력")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.fake_lines:
+        from fake_loki import Corpus
+        corpus = Corpus(args.fake_lines, span=args.since)
+        digest = LogDigest(corpus.start_ns, args.window)
+        generate = 0.0  # 말뭉치 생성 시간은 처리량에서 뺌
+        entries = corpus.entries(0, args.fake_lines)
+        while True:
+            t = time.perf_counter()
+            entry = next(entries, None)
+            generate += time.perf_counter() - t
+            if entry is None:
+                break
+            digest.add(*entry)
+        started += generate
+        pages = 0
+    else:
+        base_url, headers = (args.loki_url, {}) if args.loki_url else (None, None)
+        digest = collect_digest(args.since, base_url, headers, query=args.query, window=args.window,
+                                limit=args.limit)
+        pages = digest.pages
+    elapsed = time.perf_counter() - started
+
+    if args.json:
+        print(json.dumps(digest.summary(), ensure_ascii=False, indent=2))
+    else:
+        prompt = digest.to_prompt()
+        print(prompt)
+        print(f"\n(요약 {len(prompt):,}자)")
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"📈 {digest.lines:,}줄 / {elapsed:.1f}초 = {digest.lines / elapsed:,.0f}줄/초, 페이지 {pages}개, "
+          f"템플릿 {len(digest.miner.clusters)}개, 최대 메모리 {peak_mb:.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
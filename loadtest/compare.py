@@ -0,0 +1,82 @@
+"""두 부하 테스트 결과(run.py 의 JSON)를 시나리오 x 동시성별로 비교합니다.
+
+    python loadtest/compare.py loadtest/results/<기준>.json loadtest/results/<새 결과>.json --threshold 0.10
+
+p95/p99 가 threshold 비율보다 많이 늘었거나, RPS 가 그만큼 줄었거나, 오류율이 늘어난 항목을 회귀로 표시하고
+하나라도 있으면 종료 코드 1 을 반환합니다 (CI 등에서 사용).
+"""
+import argparse
+import json
+import sys
+
+WATCHED_LATENCY = ("p95", "p99")
+
+
+def load(path):
+    with open(path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    return report["meta"], {(r["scenario"], r["concurrency"]): r for r in report["results"]}
+
+
+def change(before, after):
+    if before is None or after is None or before == 0:
+        return None
+    return (after - before) / before
+
+
+def fmt_change(value):
+    return f"{'-':>8}" if value is None else f"{value * 100:>+7.1f}%"
+
+
+def regressions(base, new, threshold):
+    """비교 결과 줄 목록과 회귀 항목 목록."""
+    problems = []
+    for metric in WATCHED_LATENCY:
+        delta = change(base["latency_ms"][metric], new["latency_ms"][metric])
+        if delta is not None and delta > threshold:
+            problems.append(f"{metric} {fmt_change(delta).strip()}")
+    delta = change(base["rps"], new["rps"])
+    if delta is not None and delta < -threshold:
+        problems.append(f"RPS {fmt_change(delta).strip()}")
+    if new["error_rate"] > base["error_rate"]:
+        problems.append(f"오류율 {base['error_rate']:.2%} → {new['error_rate']:.2%}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.10, help="회귀로 볼 변화 비율 (기본 10%%)")
+    args = parser.parse_args()
+
+    base_meta, base = load(args.base)
+    new_meta, new = load(args.new)
+    print(f"기준: {base_meta['commit']} {base_meta.get('label', '')} ({base_meta['started_at']})")
+    print(f"비교: {new_meta['commit']} {new_meta.get('label', '')} ({new_meta['started_at']})\n")
+    print(f"{'':<8}{'동시성':>6}{'p50':>18}{'p95':>18}{'p99':>18}{'RPS':>18}")
+
+    failed = []
+    for key in sorted(base.keys() & new.keys()):
+        b, n = base[key], new[key]
+        cells = []
+        for metric in ("p50",) + WATCHED_LATENCY:
+            after = n["latency_ms"][metric]
+            cells.append(f"{(after if after is not None else 0):>9.1f}{fmt_change(change(b['latency_ms'][metric], after))}")
+        cells.append(f"{n['rps']:>9.1f}{fmt_change(change(b['rps'], n['rps']))}")
+        problems = regressions(b, n, args.threshold)
+        print(f"{key[0]:<8}{key[1]:>6}" + "".join(cells) + (f"  ⚠️ {', '.join(problems)}" if problems else ""))
+        if problems:
+            failed.append(key)
+
+    missing = sorted(base.keys() ^ new.keys())
+    if missing:
+        print(f"\n⚠️ 한쪽에만 있는 항목 (비교 안 함): {missing}")
+    if failed:
+        print(f"\n❌ 회귀 {len(failed)}건 (기준 {args.threshold:.0%})")
+        sys.exit(1)
+    print(f"\n✅ 회귀 없음 (기준 {args.threshold:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""product-app / auth-app HTTP 부하 테스트.
+
+    python loadtest/run.py --product-url http://localhost:18083 --auth-url http://localhost:18080 \
+        --concurrency 1,8,32 --duration 20 --label catalog=10000
+    python loadtest/compare.py loadtest/results/<기준>.json loadtest/results/<새 결과>.json
+
+시나리오 (--scenarios, 쉼표 구분):
+- list:   GET /product (필터 없음 / 이름 / 카테고리 / 이름+카테고리를 돌아가며)
+- search: GET /product/search?q=... (검색어: 상품명의 앞 단어들, 품목+모델 번호 등)
+- detail: GET /product/{id}
+- auth:   POST /authenticate/frame (가상 사용자마다 세션 id 를 두고 프레임을 순서대로 반복 재생)
+
+검색어와 상품 id 는 시작할 때 /api/products 에서 최대 --sample 행을 읽어 정하고, 요청 순서는 --seed 로 고정합니다.
+동시성 단계마다 가상 사용자 N 명이 응답을 받자마자 다음 요청을 보내고 (closed loop), --warmup 초 뒤부터
+--duration 초 동안 측정합니다. 시나리오 x 동시성마다 p50/p95/p99, RPS, 상태 코드별 수,
+Server-Timing 구간별 평균(ms)을 출력하고 JSON 으로 저장합니다 (--out, 기본 loadtest/results/<커밋>-<시각>.json).
+
+--frames: JPEG/PNG 가 든 디렉터리(파일 이름 순) 또는 영상 파일. 주지 않으면 노이즈 프레임을 만들어 보냅니다
+(얼굴이 없으므로 인식 실패 경로만 측정). 얼굴 사진/영상은 저장소에 넣지 않습니다 (loadtest/frames/ 는 ignore).
+영상/노이즈 프레임은 opencv-python, numpy 가 필요합니다 (auth-app requirements 에 포함).
+
+로컬 환경은 loadtest/docker-compose.yml, 카탈로그 크기별 반복 실행은 loadtest/run_suite.sh 를 참고하세요.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+import httpx
+
+LOADTEST_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(LOADTEST_DIR, "results")
+PRODUCT_SCENARIOS = ("list", "search", "detail")
+SCENARIOS = PRODUCT_SCENARIOS + ("auth",)
+PERCENTILES = (50, 95, 99)
+
+
+# ---- 집계 ----
+def percentile(samples, p):
+    """정렬된 samples 의 nearest-rank 백분위수."""
+    if not samples:
+        return None
+    return samples[max(0, math.ceil(p / 100 * len(samples)) - 1)]
+
+
+def parse_server_timing(header):
+    """'db.query;dur=1.2;desc="x2", total;dur=3.4' → {"db.query": 1.2, "total": 3.4}"""
+    spans = {}
+    for part in (header or "").split(","):
+        name, *params = [p.strip() for p in part.split(";")]
+        for param in params:
+            if param.startswith("dur="):
+                try:
+                    spans[name] = spans.get(name, 0.0) + float(param[4:])
+                except ValueError:
+                    pass
+    return spans
+
+
+class Recorder:
+    """한 시나리오 x 동시성 단계의 측정값."""
+
+    def __init__(self):
+        self.latencies = []
+        self.statuses = Counter()
+        self.outcomes = Counter()  # auth 응답 본문의 status (success/checking/fail/busy/...)
+        self.errors = 0
+        self.span_totals = Counter()
+        self.span_counts = Counter()
+
+    def record(self, seconds, status, server_timing=None, outcome=None):
+        self.latencies.append(seconds * 1000)
+        self.statuses[str(status)] += 1
+        if not isinstance(status, int) or status >= 400:
+            self.errors += 1
+        if outcome:
+            self.outcomes[outcome] += 1
+        for name, ms in parse_server_timing(server_timing).items():
+            self.span_totals[name] += ms
+            self.span_counts[name] += 1
+
+    def summary(self, seconds):
+        samples = sorted(self.latencies)
+        count = len(samples)
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "error_rate": round(self.errors / count, 4) if count else 0.0,
+            "rps": round(count / seconds, 2) if seconds else 0.0,
+            "latency_ms": {
+                **{f"p{p}": round(percentile(samples, p), 2) if count else None for p in PERCENTILES},
+                "mean": round(sum(samples) / count, 2) if count else None,
+                "max": round(samples[-1], 2) if count else None,
+            },
+            "status": dict(self.statuses),
+            "outcomes": dict(self.outcomes),
+            "server_timing_ms": {name: round(self.span_totals[name] / n, 2) for name, n in self.span_counts.items()},
+        }
+
+
+# ---- 요청 만들기 ----
+class Catalog:
+    """/api/products 에서 읽은 상품 일부로 검색어/필터/id 를 만듭니다."""
+
+    def __init__(self, rows):
+        if not rows:
+            raise SystemExit("❌ 상품이 없습니다. 먼저 bench.seed 로 카탈로그를 채우세요.")
+        self.ids = [row["id"] for row in rows]
+        self.names = [row["name"] for row in rows]
+        self.categories = sorted({row["category"] for row in rows if row.get("category")})
+        self.words = sorted({w for name in self.names for w in name.split() if not w.isdigit()})
+
+    @classmethod
+    async def fetch(cls, client, product_url, sample):
+        rows = []
+        async with client.stream("GET", f"{product_url}/api/products",
+                                 params={"fields": "id,name,category"}) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line:
+                    rows.append(json.loads(line))
+                if len(rows) >= sample:
+                    break
+        return cls(rows)
+
+    def search_query(self, rng):
+        words = rng.choice(self.names).split()
+        kind = rng.randrange(3)
+        if kind == 0:
+            return " ".join(words[:2])             # 브랜드 + 품목
+        if kind == 1:
+            return words[1] if len(words) > 1 else words[0]  # 품목
+        return f"{words[1]} {words[-1]}" if len(words) > 2 else words[0]  # 품목 + 모델 번호
+
+    def list_params(self, rng):
+        params = {}
+        kind = rng.randrange(4)
+        if kind in (1, 3):
+            params["name"] = rng.choice(self.words)
+        if kind in (2, 3) and self.categories:
+            params["category"] = rng.choice(self.categories)
+        return params
+
+
+def product_request(scenario, catalog, rng):
+    if scenario == "list":
+        return "GET", "/product", {"params": catalog.list_params(rng)}
+    if scenario == "search":
+        return "GET", "/product/search", {"params": {"q": catalog.search_query(rng)}}
+    return "GET", f"/product/{rng.choice(catalog.ids)}", {}
+
+
+# ---- 얼굴 프레임 ----
+def load_frames(path, max_frames=120, width=640):
+    """JPEG 바이트 목록. 디렉터리면 파일 이름 순, 영상이면 앞에서부터 max_frames 장, 없으면 노이즈."""
+    if path and os.path.isdir(path):
+        files = sorted(f for f in os.listdir(path) if f.lower().endswith((".jpg", ".jpeg", ".png")))
+        frames = []
+        for name in files[:max_frames]:
+            with open(os.path.join(path, name), "rb") as f:
+                frames.append(f.read())
+        if not frames:
+            raise SystemExit(f"❌ {path} 에 JPEG/PNG 파일이 없습니다.")
+        return frames
+
+    import cv2
+    import numpy as np
+    frames = []
+    if path:
+        capture = cv2.VideoCapture(path)
+        while len(frames) < max_frames:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            if frame.shape[1] != width:
+                scale = width / frame.shape[1]
+                frame = cv2.resize(frame, (width, int(frame.shape[0] * scale)), interpolation=cv2.INTER_AREA)
+            frames.append(cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes())
+        capture.release()
+        if not frames:
+            raise SystemExit(f"❌ {path} 에서 프레임을 읽지 못했습니다.")
+        return frames
+
+    print("⚠️ --frames 가 없어 노이즈 프레임을 사용합니다 (얼굴이 없으므로 인식 실패 경로만 측정).")
+    rng = np.random.default_rng(0)
+    for _ in range(10):
+        frame = rng.integers(0, 256, (width * 3 // 4, width, 3), dtype=np.uint8)
+        frames.append(cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes())
+    return frames
+
+
+# ---- 실행 ----
+async def virtual_user(client, next_request, recorder, measure_from, stop_at, outcome_of=None):
+    while time.perf_counter() < stop_at:
+        method, url, kwargs = next_request()
+        started = time.perf_counter()
+        server_timing = outcome = None
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = response.status_code
+            server_timing = response.headers.get("server-timing")
+            if outcome_of is not None:
+                outcome = outcome_of(response)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        if started >= measure_from:
+            recorder.record(time.perf_counter() - started, status, server_timing, outcome)
+
+
+def auth_outcome(response):
+    try:
+        return response.json().get("status")
+    except ValueError:
+        return None
+
+
+async def run_stage(base_url, scenario, concurrency, args, catalog=None, frames=None):
+    """한 시나리오를 concurrency 명으로 warmup + duration 초 동안 실행하고 요약을 반환합니다."""
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        now = time.perf_counter()
+        measure_from = now + args.warmup
+        stop_at = measure_from + args.duration
+        users = []
+        for user in range(concurrency):
+            rng = random.Random(f"{args.seed}-{scenario}-{user}")
+            if scenario == "auth":
+                headers = {"X-Session-Id": f"load-{uuid.uuid4().hex}", "Content-Type": "image/jpeg"}
+                sequence = iter(range(rng.randrange(len(frames)), 1 << 62))  # 사용자마다 다른 위치에서 시작
+
+                def next_request(sequence=sequence, headers=headers):
+                    return "POST", "/authenticate/frame", {"content": frames[next(sequence) % len(frames)],
+                                                           "headers": headers}
+                users.append(virtual_user(client, next_request, recorder, measure_from, stop_at, auth_outcome))
+            else:
+                users.append(virtual_user(client, lambda rng=rng: product_request(scenario, catalog, rng),
+                                          recorder, measure_from, stop_at))
+        await asyncio.gather(*users)
+        measured = time.perf_counter() - measure_from
+    return recorder.summary(measured)
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=LOADTEST_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=LOADTEST_DIR,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_row(result):
+    latency = result["latency_ms"]
+    cells = [f"{latency[f'p{p}']:>9.1f}" if latency[f"p{p}"] is not None else f"{'-':>9}" for p in PERCENTILES]
+    print(f"{result['scenario']:<8}{result['concurrency']:>6}{result['requests']:>10}{result['rps']:>10.1f}"
+          + "".join(cells) + f"{result['errors']:>8}  {result['status']}")
+
+
+async def run(args):
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"❌ 알 수 없는 시나리오: {unknown} (가능: {', '.join(SCENARIOS)})")
+    if not args.product_url:
+        scenarios = [s for s in scenarios if s not in PRODUCT_SCENARIOS]
+    if not args.auth_url:
+        scenarios = [s for s in scenarios if s != "auth"]
+    if not scenarios:
+        raise SystemExit("❌ 실행할 시나리오가 없습니다 (--product-url / --auth-url 확인).")
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    catalog = frames = None
+    if any(s in PRODUCT_SCENARIOS for s in scenarios):
+        async with httpx.AsyncClient(timeout=args.timeout) as client:
+            catalog = await Catalog.fetch(client, args.product_url, args.sample)
+        print(f"📦 상품 {len(catalog.ids)}개 기준으로 요청 생성 (카테고리 {len(catalog.categories)}개)")
+    if "auth" in scenarios:
+        frames = load_frames(args.frames, args.max_frames)
+        print(f"📦 얼굴 프레임 {len(frames)}장 재생")
+
+    print(f"\n{'':<8}{'동시성':>6}{'요청':>10}{'RPS':>10}" + "".join(f"{f'p{p}(ms)':>9}" for p in PERCENTILES)
+          + f"{'오류':>8}  상태 코드")
+    results = []
+    for scenario in scenarios:
+        base_url = args.auth_url if scenario == "auth" else args.product_url
+        for concurrency in levels:
+            summary = await run_stage(base_url, scenario, concurrency, args, catalog, frames)
+            result = {"scenario": scenario, "concurrency": concurrency, **summary}
+            results.append(result)
+            print_row(result)
+
+    report = {
+        "meta": {
+            "label": args.label,
+            "commit": git_revision(),
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "host": platform.node(),
+            "args": {k: v for k, v in vars(args).items() if k != "out"},
+        },
+        "results": results,
+    }
+    out = args.out
+    if not out:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        label = "".join(c if c.isalnum() or c in "-_=" else "_" for c in args.label or "")
+        out = os.path.join(RESULTS_DIR, f"{report['meta']['commit']}-{stamp}{'-' + label if label else ''}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ 결과 저장: {out}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--product-url", default=os.getenv("PRODUCT_URL", "http://localhost:18083"))
+    parser.add_argument("--auth-url", default=os.getenv("AUTH_URL", "http://localhost:18080"))
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", default="1,8,32", help="쉼표로 구분한 동시 사용자 수 단계")
+    parser.add_argument("--duration", type=float, default=20, help="단계별 측정 시간(초)")
+    parser.add_argument("--warmup", type=float, default=3, help="단계별 측정 전 예열 시간(초)")
+    parser.add_argument("--timeout", type=float, default=30, help="요청 하나의 타임아웃(초)")
+    parser.add_argument("--sample", type=int, default=5000, help="요청 생성에 쓸 상품 수")
+    parser.add_argument("--seed", default="42", help="요청 순서를 고정하는 난수 시드")
+    parser.add_argument("--frames", help="얼굴 프레임 디렉터리 또는 영상 파일")
+    parser.add_argument("--max-frames", type=int, default=120)
+    parser.add_argument("--label", default="", help="결과에 남길 설명 (예: catalog=10000)")
+    parser.add_argument("--out", help="결과 JSON 경로")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
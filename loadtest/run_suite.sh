@@ -0,0 +1,53 @@
+#!/bin/bash
+# 카탈로그 크기별로 상품을 다시 채우고 부하 테스트(run.py)를 실행합니다.
+#
+#   ./loadtest/run_suite.sh
+#   SIZES="1000 100000" CONCURRENCY=1,16,64 DURATION=30 FRAMES=~/frames ./loadtest/run_suite.sh
+#
+# 결과는 loadtest/results/<커밋>-<시각>-catalog=<크기>.json (얼굴 인증은 -auth.json) 에 쌓이고,
+# python loadtest/compare.py <기준> <새 결과> 로 커밋 간 비교합니다.
+
+set -e
+
+cd "$(dirname "$0")"
+
+SIZES=${SIZES:-"1000 10000 100000"}
+CONCURRENCY=${CONCURRENCY:-"1,8,32"}
+DURATION=${DURATION:-20}
+PRODUCT_URL=${PRODUCT_URL:-"http://localhost:18083"}
+AUTH_URL=${AUTH_URL:-"http://localhost:18080"}
+COMPOSE="docker compose -f docker-compose.yml"
+
+wait_for() {
+    local url=$1
+    echo "⏳ $url 응답을 기다리는 중..."
+    for _ in $(seq 1 120); do
+        if curl -fs -o /dev/null "$url"; then
+            return 0
+        fi
+        sleep 1
+    done
+    echo "❌ $url 이 응답하지 않습니다."
+    exit 1
+}
+
+echo "🔨 부하 테스트 환경을 띄웁니다..."
+$COMPOSE up -d --build
+wait_for "$AUTH_URL/readyz"
+
+# 얼굴 인증은 카탈로그와 무관하므로 한 번만
+python run.py --scenarios auth --product-url "" --auth-url "$AUTH_URL" \
+    --concurrency "$CONCURRENCY" --duration "$DURATION" ${FRAMES:+--frames "$FRAMES"} --label auth
+
+for size in $SIZES; do
+    echo "📦 카탈로그 $size 개 준비..."
+    $COMPOSE exec -T product-app python -m bench.seed --rows "$size" --reset --embed
+    # 메모리 인덱스/캐시가 새 카탈로그로 처음부터 시작하도록 재시작
+    $COMPOSE restart product-app
+    wait_for "$PRODUCT_URL/readyz"
+
+    python run.py --scenarios list,search,detail --product-url "$PRODUCT_URL" --auth-url "" \
+        --concurrency "$CONCURRENCY" --duration "$DURATION" --label "catalog=$size"
+done
+
+echo "✅ 완료. 환경은 '$COMPOSE down' 으로 내립니다."
@@ -0,0 +1,88 @@
+"""얼굴 인식 경로별 처리량 벤치마크 (코어 1개 기준 프레임/초).
+
+    cd src/auth-app
+    python -m bench.detector_bench --image face.jpg --frames 100
+
+같은 프레임을 반복 처리해서 다음을 비교합니다.
+- legacy: 예전 방식. 전체 프레임에 refine_landmarks=True FaceMesh
+- mesh: 전체 프레임에 FaceMesh (홍채 제외, 468점)
+- presence: 줄인 프레임에서 얼굴 유무만 확인 (BlazeFace)
+- roi: 직전 bbox 주변만 FaceMesh (같은 세션의 연속 프레임)
+- auth: /authenticate 의 실제 경로 (첫 프레임은 presence → ROI, 이후 ROI 추적)
+"""
+import argparse
+import statistics
+import time
+
+import cv2
+import numpy as np
+
+from core.detector import BioDetector, expand_roi
+
+
+def load_frame(path, width):
+    frame = cv2.imread(path) if path else None
+    if frame is None:
+        print("⚠️ 이미지가 없어 노이즈 프레임을 사용합니다 (얼굴이 없으므로 mesh/roi 는 실패 경로 측정).")
+        frame = np.random.default_rng(0).integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    if width and frame.shape[1] != width:
+        scale = width / frame.shape[1]
+        frame = cv2.resize(frame, (width, int(frame.shape[0] * scale)), interpolation=cv2.INTER_AREA)
+    return frame
+
+
+def measure(fn, frames, warmup=3):
+    for _ in range(warmup):
+        fn()
+    times = []
+    found = 0
+    for _ in range(frames):
+        started = time.perf_counter()
+        if fn() is not None:
+            found += 1
+        times.append(time.perf_counter() - started)
+    return times, found
+
+
+def report(name, times, found):
+    total = sum(times)
+    p95 = sorted(times)[int(len(times) * 0.95) - 1]
+    print(f"{name:<10} {len(times) / total:8.1f} fps  "
+          f"평균 {statistics.mean(times) * 1000:7.2f}ms  p95 {p95 * 1000:7.2f}ms  검출 {found}/{len(times)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", help="얼굴이 있는 이미지 경로")
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--width", type=int, default=320, help="브라우저가 보내는 프레임 너비 (script.js SEND_WIDTH)")
+    args = parser.parse_args()
+
+    cv2.setNumThreads(1)  # 코어 1개 기준
+    frame = load_frame(args.image, args.width)
+    print(f"프레임 {frame.shape[1]}x{frame.shape[0]}, {args.frames}회 반복\n")
+
+    legacy = BioDetector(refine_landmarks=True)
+    lite = BioDetector()
+    first = lite.get_landmarks(frame)
+    roi = first["bbox"] if first else None
+    h, w = frame.shape[:2]
+
+    report("legacy", *measure(lambda: legacy.landmarks(frame), args.frames))
+    report("mesh", *measure(lambda: lite.landmarks(frame), args.frames))
+    report("presence", *measure(lambda: lite.face_present(frame), args.frames))
+    if roi is not None:
+        report("roi", *measure(lambda: lite.landmarks(frame, expand_roi(roi, w, h)), args.frames))
+
+    state = {"roi": None}
+
+    def auth_path():
+        result = lite.get_landmarks(frame, state["roi"])
+        state["roi"] = result["bbox"] if result else None
+        return result
+
+    report("auth", *measure(auth_path, args.frames))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""라이브니스 판정 재생 도구.
+
+녹화된 랜드마크 시퀀스(.npz)를 LivenessEngine 에 프레임 순서대로 넣어 판정을 확인합니다.
+시계도 프레임 번호로 흉내 내므로 같은 입력이면 항상 같은 결과가 나옵니다.
+
+    cd src/auth-app
+    python -m bench.liveness_replay --synthetic                      # 내장 시나리오 (사진/흔든 사진/실제 사람 등)
+    python -m bench.liveness_replay --record clip.mp4 live.npz --expect live   # 영상에서 랜드마크 녹화
+    python -m bench.liveness_replay live.npz photo.npz               # 녹화본 재생
+
+.npz 형식: landmarks (T,N,3) float32 픽셀 좌표 (얼굴이 없던 프레임은 NaN), fps, expect("live"/"spoof", 선택)
+기대값과 다른 시퀀스가 있으면 종료 코드 1 을 반환합니다.
+같은 시나리오를 판정별로 확인하는 테스트는 tests/test_liveness.py 에 있습니다 (python -m pytest tests).
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from core.liveness import LivenessEngine, LivenessSession, LEFT_EYE, RIGHT_EYE
+
+FPS = 15.0
+
+
+# ---- 재생 ----
+def replay(landmarks, fps=FPS, engine=None):
+    """시퀀스를 재생하고 (최종 판정, 처음 통과한 프레임 번호 또는 None)을 반환합니다.
+
+    main.detect_frame 과 같이 얼굴이 없는 프레임에서는 세션을 초기화합니다.
+    """
+    engine = engine or LivenessEngine(clock=lambda: 0.0)
+    check = engine.verdict(LivenessSession(engine.window))
+    for i, points in enumerate(landmarks):
+        now = i / fps
+        if np.isnan(points).any():
+            engine.reset("replay")
+            continue
+        check = engine.update("replay", points, now=now)
+        if check["live"]:
+            return check, i
+    return check, None
+
+
+def load(path):
+    data = np.load(path, allow_pickle=False)
+    expect = str(data["expect"]) if "expect" in data.files else None
+    fps = float(data["fps"]) if "fps" in data.files else FPS
+    return data["landmarks"], fps, expect
+
+
+# ---- 녹화 ----
+def record(video_path, out_path, expect=None):
+    """영상 파일의 모든 프레임에서 랜드마크를 뽑아 .npz 로 저장합니다."""
+    import cv2
+    from core.detector import BioDetector
+
+    detector = BioDetector()
+    capture = cv2.VideoCapture(video_path)
+    fps = capture.get(cv2.CAP_PROP_FPS) or FPS
+    frames, roi, size = [], None, None
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        result = detector.get_landmarks(frame, roi)
+        roi = result["bbox"] if result else None
+        if result:
+            size = result["landmarks"].shape
+        frames.append(result["landmarks"] if result else None)
+    capture.release()
+    if size is None:
+        raise SystemExit(f"{video_path}: 얼굴을 찾은 프레임이 없습니다.")
+    missing = np.full(size, np.nan, dtype=np.float32)
+    landmarks = np.stack([f if f is not None else missing for f in frames])
+    extra = {"expect": expect} if expect else {}
+    np.savez_compressed(out_path, landmarks=landmarks, fps=fps, **extra)
+    print(f"💾 {out_path}: {len(frames)}프레임 저장 (얼굴 없음 {sum(f is None for f in frames)}프레임)")
+
+
+# ---- 내장 시나리오 ----
+# 320x240 프레임에서 눈 사이 거리 60px 인 정면 얼굴의 주요 점 (판정에 쓰는 점만 채움)
+_TEMPLATE = {
+    1: (160, 175), 4: (160, 170), 13: (160, 195), 14: (160, 199), 61: (145, 197), 291: (175, 197),
+    152: (160, 230), 70: (125, 125), 300: (195, 125), 234: (110, 165), 454: (210, 165), 10: (160, 100),
+}
+_EYE_OPEN = 3.6     # 눈꺼풀 반높이(px). 눈 너비 24px 이므로 EAR = h / 12 → 0.30
+_EYE_CLOSED = 1.2   # EAR 0.10
+
+
+def _face(eye_half_height, nose_shift=0.0):
+    points = np.zeros((468, 3), dtype=np.float32)
+    for index, (x, y) in _TEMPLATE.items():
+        points[index, :2] = (x, y)
+    h = eye_half_height
+    for eye, x0 in ((RIGHT_EYE, 130), (LEFT_EYE, 166)):
+        # p1..p6 = 바깥 끝, 위 2점, 반대 끝, 아래 2점 (왼쪽 눈은 안쪽 끝부터)
+        xs = (x0, x0 + 8, x0 + 16, x0 + 24, x0 + 16, x0 + 8)
+        ys = (140, 140 - h, 140 - h, 140, 140 + h, 140 + h)
+        points[eye, 0] = xs
+        points[eye, 1] = ys
+    # 고개를 돌리면 코/입이 눈 사이 축에서 옆으로 이동
+    points[[1, 4, 13, 14, 61, 291], 0] += nose_shift
+    return points
+
+
+def _rigid(points, angle, scale, dx, dy):
+    """사진을 들고 움직인 것처럼 전체를 회전/확대/이동합니다."""
+    c, s = np.cos(angle) * scale, np.sin(angle) * scale
+    center = np.array([160, 160], dtype=np.float32)
+    moved = points.copy()
+    xy = points[:, :2] - center
+    moved[:, 0] = xy[:, 0] * c - xy[:, 1] * s + center[0] + dx
+    moved[:, 1] = xy[:, 0] * s + xy[:, 1] * c + center[1] + dy
+    return moved
+
+
+def synthetic_scenarios(frames=60, seed=7):
+    """(이름, 시퀀스, 기대값) 목록. 난수 시드가 고정이라 항상 같습니다."""
+    rng = np.random.default_rng(seed)
+    jitter = lambda sigma: rng.normal(0, sigma, (468, 3)).astype(np.float32)  # noqa: E731
+    t = np.arange(frames)
+
+    def blink_height(i, at):
+        return _EYE_CLOSED if at <= i < at + 3 else _EYE_OPEN
+
+    photo = [_face(_EYE_OPEN) + jitter(0.15) for _ in t]
+    shaken = [_rigid(_face(_EYE_OPEN), 0.1 * np.sin(i / 5), 1 + 0.05 * np.sin(i / 7), 8 * np.sin(i / 4), 0)
+              + jitter(0.15) for i in t]
+    closed_photo = [_face(_EYE_CLOSED) + jitter(0.15) for _ in t]
+    live = [_face(blink_height(i, 25), nose_shift=5 * np.sin(i / 6)) + jitter(0.4) for i in t]
+    no_blink = [_face(_EYE_OPEN, nose_shift=5 * np.sin(i / 6)) + jitter(0.4) for i in t]
+    # 판정 전에 깜빡인 뒤 얼굴이 잠깐 사라지고 사진으로 바뀜 → 앞의 깜빡임은 인정되지 않아야 함
+    swapped = [_face(blink_height(i, 2), nose_shift=5 * np.sin(i / 6)) + jitter(0.4) if i < 6 else
+               np.full((468, 3), np.nan, dtype=np.float32) if i == 6 else
+               _face(_EYE_OPEN) + jitter(0.15) for i in t]
+    return [
+        ("photo", np.stack(photo), "spoof"),
+        ("shaken_photo", np.stack(shaken), "spoof"),
+        ("closed_eye_photo", np.stack(closed_photo), "spoof"),
+        ("no_blink", np.stack(no_blink), "spoof"),
+        ("face_swapped", np.stack(swapped), "spoof"),
+        ("live", np.stack(live), "live"),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="재생할 .npz 파일")
+    parser.add_argument("--synthetic", action="store_true", help="내장 시나리오 재생")
+    parser.add_argument("--record", nargs=2, metavar=("VIDEO", "OUT"), help="영상에서 랜드마크를 녹화")
+    parser.add_argument("--expect", choices=["live", "spoof"], help="녹화본에 기록할 기대값")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record[0], args.record[1], args.expect)
+        return 0
+
+    cases = synthetic_scenarios() if args.synthetic else []
+    for path in args.files:
+        landmarks, fps, expect = load(path)
+        cases.append((path, landmarks, expect, fps))
+    if not cases:
+        parser.print_help()
+        return 0
+
+    failed = 0
+    for case in cases:
+        name, landmarks, expect = case[:3]
+        fps = case[3] if len(case) > 3 else FPS
+        check, passed_at = replay(landmarks, fps)
+        verdict = "live" if passed_at is not None else "spoof"
+        ok = expect is None or expect == verdict
+        failed += not ok
+        at = f"{passed_at}프레임에서 통과" if passed_at is not None else f"미통과 {check['missing']}"
+        print(f"{'✅' if ok else '❌'} {name:<18} {verdict:<5} (기대 {expect or '-'})  {at}  "
+              f"깜빡임 {check['blinks']}  자세 {check['pose_range']:.3f}  움직임 {check['motion']:.4f}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,12 @@
+"""pytest 설정: 테스트에서 앱 모듈(core, bench)과 공용 모듈(common)을 import 할 수 있게 합니다.
+
+    cd src/auth-app
+    python -m pytest tests
+"""
+import os
+import sys
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (APP_DIR, os.path.dirname(APP_DIR)):
+    if path not in sys.path:
+        sys.path.insert(0, path)
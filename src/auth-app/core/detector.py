@@ -1,37 +1,151 @@
+import time
 import cv2
 import mediapipe as mp
 import numpy as np
 
+# 얼굴 주변을 잘라낼 때 bbox 에 더하는 여백 비율
+ROI_MARGIN = 0.35
+# 얼굴 유무만 볼 때 프레임을 줄일 긴 변 길이
+PRESENCE_MAX_SIDE = 192
+
+
+def bbox_of(points):
+    """(N,2 이상) 좌표 배열의 bbox (x, y, w, h)."""
+    mins = points[:, :2].min(axis=0)
+    maxs = points[:, :2].max(axis=0)
+    return float(mins[0]), float(mins[1]), float(maxs[0] - mins[0]), float(maxs[1] - mins[1])
+
+
+def expand_roi(bbox, frame_w, frame_h, margin=ROI_MARGIN):
+    """bbox 에 여백을 더한 정수 ROI (x0, y0, x1, y1). 프레임 밖은 잘라냅니다."""
+    x, y, w, h = bbox
+    dx, dy = w * margin, h * margin
+    x0 = max(0, int(x - dx))
+    y0 = max(0, int(y - dy))
+    x1 = min(frame_w, int(x + w + dx))
+    y1 = min(frame_h, int(y + h + dy))
+    if x1 - x0 < 16 or y1 - y0 < 16:
+        return None
+    return x0, y0, x1, y1
+
+
 class BioDetector:
-    def __init__(self):
+    """MediaPipe 얼굴 검출/랜드마크 추출기.
+
+    - face_present(): 줄인 프레임에서 BlazeFace 로 얼굴 유무와 대략적인 bbox 만 확인 (가장 저렴)
+    - landmarks(): FaceMesh 랜드마크를 (N,3) 픽셀 좌표 배열로 반환. roi 를 주면 그 영역만 처리
+    - get_landmarks(): 위 둘을 묶은 인증용 경로. 이전 프레임 bbox(roi)가 있으면 바로 ROI 메쉬,
+      없으면 얼굴 유무를 먼저 확인하고 얼굴이 있을 때만 메쉬를 돌립니다.
+
+    여러 사용자의 프레임이 같은 인스턴스로 들어오므로 MediaPipe 내부 추적 대신
+    static_image_mode=True 로 매 프레임 독립 처리하고, 추적은 호출자가 넘기는 roi 로 합니다.
+    """
+
+    def __init__(self, refine_landmarks=False):
+        self.refine_landmarks = refine_landmarks
         self.mp_face_mesh = mp.solutions.face_mesh
         self.face_mesh = self.mp_face_mesh.FaceMesh(
+            static_image_mode=True,
             max_num_faces=1,
-            refine_landmarks=True,
+            refine_landmarks=refine_landmarks,
+            min_detection_confidence=0.5
+        )
+        self.face_detection = mp.solutions.face_detection.FaceDetection(
+            model_selection=0,  # 근거리(2m 이내) 모델, 웹캠용
             min_detection_confidence=0.5
         )
 
-    def get_landmarks(self, frame):
-        h, w, _ = frame.shape
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.face_mesh.process(rgb_frame)
-        
-        if results.multi_face_landmarks:
-            face_landmarks = results.multi_face_landmarks[0]
-            
-            # 얼굴을 감싸는 박스 계산 (Bounding Box)
-            all_x = [lm.x for lm in face_landmarks.landmark]
-            all_y = [lm.y for lm in face_landmarks.landmark]
-            
-            bbox = {
-                "x": min(all_x) * w,
-                "y": min(all_y) * h,
-                "w": (max(all_x) - min(all_x)) * w,
-                "h": (max(all_y) - min(all_y)) * h
-            }
-            
-            # 주요 포인트 랜드마크 (예: 눈, 코, 입 주변 일부)
-            points = [{"x": lm.x * w, "y": lm.y * h} for lm in face_landmarks.landmark]
-            
-            return {"bbox": bbox, "points": points}
-        return None
\ No newline at end of file
+    def warm_up(self, width=640, height=480):
+        """합성 프레임으로 검출/메쉬(전체, ROI) 그래프를 한 번씩 돌려 첫 요청이 초기화 비용을 내지 않게 합니다.
+
+        얼굴이 없는 노이즈 프레임이라 결과는 버립니다. 걸린 시간(초)을 반환합니다.
+        """
+        started = time.perf_counter()
+        frame = np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+        self.face_present(frame)
+        self.landmarks(frame)
+        self.landmarks(frame, expand_roi((width / 4, height / 4, width / 2, height / 2), width, height))
+        return time.perf_counter() - started
+
+    def face_present(self, frame, max_side=PRESENCE_MAX_SIDE):
+        """얼굴이 있으면 원본 좌표계의 bbox (x, y, w, h), 없으면 None."""
+        h, w = frame.shape[:2]
+        scale = min(1.0, max_side / max(h, w))
+        small = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA) if scale < 1.0 else frame
+        results = self.face_detection.process(cv2.cvtColor(small, cv2.COLOR_BGR2RGB))
+        if not results.detections:
+            return None
+        box = results.detections[0].location_data.relative_bounding_box
+        return box.xmin * w, box.ymin * h, box.width * w, box.height * h
+
+    def landmarks(self, frame, roi=None):
+        """FaceMesh 랜드마크를 원본 프레임 픽셀 좌표의 (N,3) float32 배열로 반환합니다.
+
+        z 는 MediaPipe 와 같은 상대 깊이 값에 처리한 영역 너비를 곱한 값입니다.
+        """
+        x0, y0 = 0, 0
+        region = frame
+        if roi is not None:
+            x0, y0, x1, y1 = roi
+            region = frame[y0:y1, x0:x1]
+        rh, rw = region.shape[:2]
+        results = self.face_mesh.process(cv2.cvtColor(region, cv2.COLOR_BGR2RGB))
+        if not results.multi_face_landmarks:
+            return None
+        lm = results.multi_face_landmarks[0].landmark
+        points = np.array([(p.x, p.y, p.z) for p in lm], dtype=np.float32)
+        points *= np.array([rw, rh, rw], dtype=np.float32)
+        points[:, 0] += x0
+        points[:, 1] += y0
+        return points
+
+    def get_landmarks(self, frame, roi=None):
+        """인증용 검출. {"bbox": (x, y, w, h), "landmarks": (N,3) 배열} 또는 None."""
+        h, w = frame.shape[:2]
+        points = None
+        if roi is not None:
+            # 이전 프레임 근처만 처리 (추적 중)
+            points = self.landmarks(frame, expand_roi(roi, w, h))
+        if points is None:
+            found = self.face_present(frame)
+            if found is None:
+                return None
+            points = self.landmarks(frame, expand_roi(found, w, h))
+        if points is None:
+            return None
+        return {"bbox": bbox_of(points), "landmarks": points}
+
+
+class RoiTracker:
+    """세션별 마지막 얼굴 bbox. 오래 안 쓴 세션은 지웁니다."""
+
+    def __init__(self, max_sessions=1024, idle_timeout=30.0):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._boxes = {}
+
+    def get(self, session_id):
+        item = self._boxes.get(session_id)
+        if item is None:
+            return None
+        bbox, seen = item
+        if time.monotonic() - seen > self.idle_timeout:
+            del self._boxes[session_id]
+            return None
+        return bbox
+
+    def update(self, session_id, bbox):
+        if bbox is None:
+            self._boxes.pop(session_id, None)
+            return
+        if session_id not in self._boxes and len(self._boxes) >= self.max_sessions:
+            self.evict_idle()
+            if len(self._boxes) >= self.max_sessions:
+                oldest = min(self._boxes, key=lambda k: self._boxes[k][1])
+                del self._boxes[oldest]
+        self._boxes[session_id] = (bbox, time.monotonic())
+
+    def evict_idle(self):
+        now = time.monotonic()
+        for key in [k for k, (_, seen) in self._boxes.items() if now - seen > self.idle_timeout]:
+            del self._boxes[key]
@@ -0,0 +1,195 @@
+import os
+import time
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import cv2
+import numpy as np
+
+# 얼굴 인식 프로세스 풀 설정
+AUTH_WORKERS = int(os.getenv("AUTH_WORKERS", str(os.cpu_count() or 1)))
+AUTH_QUEUE_SIZE = int(os.getenv("AUTH_QUEUE_SIZE", str(AUTH_WORKERS * 2)))  # 워커 수 외에 더 기다릴 수 있는 요청 수
+AUTH_DEADLINE = float(os.getenv("AUTH_DEADLINE", "2.0"))                    # 요청 하나의 최대 처리 시간(초)
+AUTH_RETRY_AFTER = int(os.getenv("AUTH_RETRY_AFTER", "1"))                  # 503 응답의 Retry-After(초)
+AUTH_REFINE_LANDMARKS = os.getenv("AUTH_REFINE_LANDMARKS", "0") == "1"       # 홍채 랜드마크(478점)까지 필요할 때만
+AUTH_WARMUP = os.getenv("AUTH_WARMUP", "1") == "1"                          # 워커 시작 시 합성 프레임으로 모델 초기화
+
+
+class Saturated(Exception):
+    """대기열이 가득 차서 요청을 받을 수 없습니다."""
+
+
+class DeadlineExceeded(Exception):
+    """정해진 시간 안에 처리하지 못했습니다."""
+
+
+# ---- 워커 프로세스 쪽 ----
+# FaceMesh 는 스레드 안전하지 않으므로 프로세스마다 자기 인스턴스를 하나씩 가집니다.
+_detector = None
+_warmup_seconds = None
+
+
+def _init_worker():
+    global _detector, _warmup_seconds
+    from core.detector import BioDetector
+    started = time.perf_counter()
+    _detector = BioDetector(refine_landmarks=AUTH_REFINE_LANDMARKS)
+    if AUTH_WARMUP:
+        _detector.warm_up()
+    _warmup_seconds = time.perf_counter() - started
+
+
+def _ping():
+    """워커가 초기화(모델 로드 + 예열)를 마쳤는지 확인합니다. (pid, 초기화에 걸린 초).
+
+    잠깐 쉬어서 동시에 보낸 ping 이 한 워커에 몰리지 않고 워커마다 하나씩 가게 합니다.
+    """
+    time.sleep(0.1)
+    return os.getpid(), _warmup_seconds
+
+
+def _detect(image_bytes, roi, deadline_at):
+    """JPEG 바이트를 디코딩해서 랜드마크를 구합니다. 이미 마감이 지났으면 건너뜁니다.
+
+    roi 는 같은 세션의 직전 얼굴 bbox 로, 있으면 그 주변만 처리합니다.
+    (결과, {"decode": 초, "get_landmarks": 초}) 를 반환합니다. 워커 프로세스에서 기록한 지표는
+    /metrics 에 보이지 않으므로 잰 시간을 함께 돌려주고 부모 프로세스에서 기록합니다.
+    """
+    if time.time() > deadline_at:
+        raise DeadlineExceeded("대기열에서 마감 시간이 지났습니다.")
+    started = time.perf_counter()
+    frame = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    decoded = time.perf_counter()
+    if frame is None:
+        raise ValueError("이미지 데이터를 읽을 수 없습니다.")
+    result = _detector.get_landmarks(frame, roi)
+    return result, {"decode": decoded - started, "get_landmarks": time.perf_counter() - decoded}
+
+
+# ---- 이벤트 루프 쪽 ----
+class InferenceExecutor:
+    """얼굴 인식을 프로세스 풀에서 실행하고, 대기열 길이와 마감 시간을 관리합니다."""
+
+    def __init__(self, workers=AUTH_WORKERS, max_queue=AUTH_QUEUE_SIZE, deadline=AUTH_DEADLINE,
+                 initializer=_init_worker, task=_detect, ping=_ping):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.deadline = deadline
+        self._initializer = initializer
+        self._task = task
+        self._ping = ping
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self.inflight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.restarts = 0
+
+    @property
+    def capacity(self):
+        return self.workers + self.max_queue
+
+    def start(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=self._initializer,
+            )
+
+    async def warm_up(self):
+        """풀을 만들고 워커마다 초기화가 끝날 때까지 기다립니다. {pid: 초기화 초}."""
+        self.start()
+        results = await asyncio.gather(*(asyncio.wrap_future(self._pool.submit(self._ping))
+                                         for _ in range(self.workers)))
+        warmed = dict(results)
+        print(f"얼굴 인식 워커 예열 완료: {len(warmed)}/{self.workers}개 "
+              f"(초기화 {', '.join(f'{s:.2f}s' for s in warmed.values() if s is not None)})")
+        return warmed
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _restart(self, broken):
+        """broken 풀이 아직 현재 풀일 때만 다시 만듭니다.
+
+        워커 하나가 죽으면 실행 중이던 요청 모두가 BrokenProcessPool 을 받습니다. 처음 받은 요청만
+        풀을 바꾸고, 나머지는 이미 새로 만든 풀(과 거기에 다시 넣은 작업)을 건드리지 않습니다.
+        """
+        with self._pool_lock:
+            if self._pool is not broken:
+                return
+            print("⚠️ 인식 워커 프로세스가 비정상 종료되어 풀을 다시 만듭니다.")
+            self.restarts += 1
+            self.shutdown()
+            self.start()
+
+    async def submit(self, *args, deadline=None):
+        """작업을 실행하고 결과를 돌려줍니다.
+
+        대기열이 가득 차면 Saturated, 마감 시간을 넘기면 DeadlineExceeded 를 발생시킵니다.
+        """
+        if self.inflight >= self.capacity:
+            self.rejected += 1
+            raise Saturated(f"처리 대기 중인 요청이 {self.inflight}개입니다.")
+        self.start()
+
+        timeout = deadline if deadline is not None else self.deadline
+        self.inflight += 1
+        pool = self._pool
+        try:
+            future = pool.submit(self._task, *args, time.time() + timeout)
+        except BrokenProcessPool:
+            self._restart(pool)
+            pool = self._pool
+            try:
+                future = pool.submit(self._task, *args, time.time() + timeout)
+            except BaseException:
+                self.inflight -= 1
+                raise
+        except BaseException:
+            self.inflight -= 1
+            raise
+        # 마감 시간이 지나도 이미 워커에서 실행 중인 작업은 멈출 수 없으므로,
+        # inflight 는 await 가 끝날 때가 아니라 작업이 실제로 끝날 때(done 콜백) 줄입니다.
+        loop = asyncio.get_running_loop()
+        future.add_done_callback(lambda _: self._finished_threadsafe(loop))
+
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            self.timed_out += 1
+            raise DeadlineExceeded(f"{timeout}초 안에 처리하지 못했습니다.")
+        except DeadlineExceeded:
+            self.timed_out += 1
+            raise
+        except BrokenProcessPool:
+            self._restart(pool)
+            raise
+        self.completed += 1
+        return result
+
+    def _finished(self):
+        self.inflight -= 1
+
+    def _finished_threadsafe(self, loop):
+        # done 콜백은 풀의 관리 스레드에서 불리므로 이벤트 루프 스레드로 넘겨서 줄입니다.
+        try:
+            loop.call_soon_threadsafe(self._finished)
+        except RuntimeError:
+            pass  # 종료 중이라 루프가 이미 닫힘
+
+    def stats(self):
+        return {"workers": self.workers, "capacity": self.capacity, "inflight": self.inflight,
+                "completed": self.completed, "rejected": self.rejected, "timed_out": self.timed_out,
+                "restarts": self.restarts}
+
+
+executor = InferenceExecutor()
@@ -0,0 +1,205 @@
+"""세션별 라이브니스(실제 사람인지) 판정.
+
+얼굴이 있는 프레임 한 장만으로는 사진/화면을 구별할 수 없으므로, 같은 세션의 연속 프레임에서
+다음 신호를 모읍니다.
+
+- 눈 깜빡임: 눈 종횡비(EAR)가 닫힘 임계값 아래로 내려갔다가 다시 열림 임계값 위로 올라오면 1회
+- 머리 움직임: 코 끝이 두 눈 사이 축에서 벗어난 정도(yaw/pitch 비율)의 창 내 최대-최소
+- 미세 움직임: 위치/크기/기울기를 정규화한 얼굴 주요 점들의 프레임 간 평균 변위
+  (사진을 통째로 움직이면 정규화 후 거의 0)
+
+프레임마다 주요 점 몇 개만 계산하고 창 크기가 고정이므로 한 프레임 비용은 기록 길이와 무관합니다.
+세션 상태는 고정 크기 링 버퍼이며, 오래 쓰지 않은 세션은 지웁니다.
+"""
+import os
+import time
+
+import numpy as np
+
+LIVENESS_WINDOW = int(os.getenv("LIVENESS_WINDOW", "45"))               # 보관할 최근 프레임 수
+LIVENESS_MIN_FRAMES = int(os.getenv("LIVENESS_MIN_FRAMES", "10"))       # 판정에 필요한 최소 프레임 수
+LIVENESS_MIN_BLINKS = int(os.getenv("LIVENESS_MIN_BLINKS", "1"))
+LIVENESS_EAR_CLOSED = float(os.getenv("LIVENESS_EAR_CLOSED", "0.20"))   # 이보다 작으면 눈 감음
+LIVENESS_EAR_OPEN = float(os.getenv("LIVENESS_EAR_OPEN", "0.25"))       # 이보다 크면 눈 뜸 (히스테리시스)
+LIVENESS_BLINK_MAX_FRAMES = int(os.getenv("LIVENESS_BLINK_MAX_FRAMES", "10"))  # 이보다 오래 감으면 깜빡임 아님
+LIVENESS_POSE_RANGE = float(os.getenv("LIVENESS_POSE_RANGE", "0.06"))   # 머리 움직임 최소 폭 (눈 사이 거리 대비)
+LIVENESS_MOTION = float(os.getenv("LIVENESS_MOTION", "0.012"))          # 미세 움직임 최소 평균 (눈 사이 거리 대비)
+LIVENESS_MAX_SESSIONS = int(os.getenv("LIVENESS_MAX_SESSIONS", "1024"))
+LIVENESS_IDLE_TIMEOUT = float(os.getenv("LIVENESS_IDLE_TIMEOUT", "30"))
+
+# MediaPipe FaceMesh 랜드마크 번호 (refine 여부와 관계없이 앞 468개는 같음)
+LEFT_EYE = [362, 385, 387, 263, 373, 380]   # p1..p6 (바깥/안쪽 끝 + 위아래 눈꺼풀 2쌍)
+RIGHT_EYE = [33, 160, 158, 133, 153, 144]
+LEFT_EYE_OUTER = 263
+RIGHT_EYE_OUTER = 33
+NOSE_TIP = 1
+# 미세 움직임용: 눈꺼풀(깜빡임)을 제외한 코/입/턱/눈썹/볼
+MOTION_POINTS = [1, 4, 13, 14, 61, 291, 152, 70, 300, 234, 454, 10]
+
+# 신호 링 버퍼 열
+EAR, YAW, PITCH, MOTION = range(4)
+
+
+def eye_aspect_ratio(points, eye):
+    """(N,2 이상) 랜드마크에서 한쪽 눈의 EAR = (|p2-p6| + |p3-p5|) / (2|p1-p4|)."""
+    p = points[eye, :2]
+    vertical = np.linalg.norm(p[1] - p[5]) + np.linalg.norm(p[2] - p[4])
+    horizontal = np.linalg.norm(p[0] - p[3])
+    return float(vertical / (2.0 * horizontal)) if horizontal > 0 else 0.0
+
+
+def face_frame(points):
+    """두 눈 바깥 끝을 기준으로 한 (원점, x축, y축, 눈 사이 거리)."""
+    left = points[LEFT_EYE_OUTER, :2]
+    right = points[RIGHT_EYE_OUTER, :2]
+    axis = left - right
+    iod = float(np.linalg.norm(axis))
+    if iod <= 0:
+        return None
+    u = axis / iod
+    v = np.array([-u[1], u[0]], dtype=points.dtype)
+    return (left + right) / 2.0, u, v, iod
+
+
+def normalize(points, frame):
+    """위치/기울기/크기를 없앤 2D 좌표 (눈 사이 거리 = 1)."""
+    origin, u, v, iod = frame
+    centered = points[:, :2] - origin
+    return np.stack([centered @ u, centered @ v], axis=1) / iod
+
+
+class LivenessSession:
+    """한 세션의 고정 크기 상태. 프레임당 O(1) 로 갱신됩니다."""
+
+    __slots__ = ("signals", "count", "head", "motion_sum", "prev", "closed_frames",
+                 "blinks", "last_seen")
+
+    def __init__(self, window):
+        self.signals = np.zeros((window, 4), dtype=np.float32)
+        self.count = 0          # 지금까지 받은 프레임 수
+        self.head = 0           # 다음에 쓸 칸
+        self.motion_sum = 0.0   # 창 안의 MOTION 합계 (평균을 매번 다시 더하지 않도록)
+        self.prev = None        # 직전 프레임의 정규화된 MOTION_POINTS
+        self.closed_frames = 0  # 현재 눈을 감고 있는 프레임 수 (0 이면 뜬 상태)
+        self.blinks = 0
+        self.last_seen = 0.0
+
+    @property
+    def filled(self):
+        return min(self.count, len(self.signals))
+
+    def push(self, ear, yaw, pitch, motion):
+        window = len(self.signals)
+        if self.count >= window:
+            self.motion_sum -= float(self.signals[self.head, MOTION])
+        self.signals[self.head] = (ear, yaw, pitch, motion)
+        self.motion_sum += motion
+        self.head = (self.head + 1) % window
+        self.count += 1
+
+
+class LivenessEngine:
+    """세션 id 별로 랜드마크 배열을 받아 라이브니스를 판정합니다."""
+
+    def __init__(self, window=LIVENESS_WINDOW, min_frames=LIVENESS_MIN_FRAMES, min_blinks=LIVENESS_MIN_BLINKS,
+                 ear_closed=LIVENESS_EAR_CLOSED, ear_open=LIVENESS_EAR_OPEN,
+                 blink_max_frames=LIVENESS_BLINK_MAX_FRAMES, pose_range=LIVENESS_POSE_RANGE,
+                 motion=LIVENESS_MOTION, max_sessions=LIVENESS_MAX_SESSIONS, idle_timeout=LIVENESS_IDLE_TIMEOUT,
+                 clock=time.monotonic):
+        self.window = window
+        self.min_frames = min_frames
+        self.min_blinks = min_blinks
+        self.ear_closed = ear_closed
+        self.ear_open = ear_open
+        self.blink_max_frames = blink_max_frames
+        self.pose_range = pose_range
+        self.motion = motion
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._clock = clock
+        self._sessions = {}
+        self.evicted = 0
+
+    def _session(self, session_id, now):
+        session = self._sessions.get(session_id)
+        if session is not None and now - session.last_seen > self.idle_timeout:
+            session = None  # 오래 쉬었으면 처음부터 다시
+        if session is None:
+            if len(self._sessions) >= self.max_sessions:
+                self.evict_idle(now)
+                if len(self._sessions) >= self.max_sessions:
+                    oldest = min(self._sessions, key=lambda k: self._sessions[k].last_seen)
+                    del self._sessions[oldest]
+                    self.evicted += 1
+            session = LivenessSession(self.window)
+            self._sessions[session_id] = session
+        session.last_seen = now
+        return session
+
+    def update(self, session_id, landmarks, now=None):
+        """프레임 하나의 랜드마크((N,3) 픽셀 좌표)를 반영하고 현재 판정을 반환합니다."""
+        now = self._clock() if now is None else now
+        session = self._session(session_id, now)
+        frame = face_frame(landmarks)
+        if frame is None:
+            return self.verdict(session)
+
+        ear = (eye_aspect_ratio(landmarks, LEFT_EYE) + eye_aspect_ratio(landmarks, RIGHT_EYE)) / 2.0
+        origin, u, v, iod = frame
+        nose = landmarks[NOSE_TIP, :2] - origin
+        yaw = float(nose @ u) / iod
+        pitch = float(nose @ v) / iod
+        current = normalize(landmarks[MOTION_POINTS], frame)
+        motion = 0.0 if session.prev is None else float(np.linalg.norm(current - session.prev, axis=1).mean())
+        session.prev = current
+
+        # 깜빡임: 감음 → 뜸 전환을 한 번으로 셉니다. 너무 오래 감고 있었으면(눈 감은 사진 등) 세지 않음
+        if ear < self.ear_closed:
+            session.closed_frames += 1
+        elif ear > self.ear_open:
+            if 0 < session.closed_frames <= self.blink_max_frames:
+                session.blinks += 1
+            session.closed_frames = 0
+
+        session.push(ear, yaw, pitch, motion)
+        return self.verdict(session)
+
+    def verdict(self, session):
+        filled = session.filled
+        recent = session.signals[:filled]
+        if filled:
+            pose_range = float(max(np.ptp(recent[:, YAW]), np.ptp(recent[:, PITCH])))
+            # 첫 프레임의 MOTION 은 비교 대상이 없어 0 이므로 제외
+            samples = filled - 1 if session.count <= filled else filled
+            motion = session.motion_sum / samples if samples > 0 else 0.0
+        else:
+            pose_range = motion = 0.0
+
+        missing = []
+        if session.count < self.min_frames:
+            missing.append("frames")
+        if session.blinks < self.min_blinks:
+            missing.append("blink")
+        if pose_range < self.pose_range and motion < self.motion:
+            missing.append("motion")
+        return {
+            "live": not missing,
+            "missing": missing,
+            "frames": session.count,
+            "blinks": session.blinks,
+            "pose_range": round(pose_range, 4),
+            "motion": round(motion, 5),
+        }
+
+    def reset(self, session_id):
+        self._sessions.pop(session_id, None)
+
+    def evict_idle(self, now=None):
+        now = self._clock() if now is None else now
+        for key in [k for k, s in self._sessions.items() if now - s.last_seen > self.idle_timeout]:
+            del self._sessions[key]
+            self.evicted += 1
+
+    def stats(self):
+        return {"sessions": len(self._sessions), "evicted": self.evicted,
+                "bytes": sum(s.signals.nbytes for s in self._sessions.values())}
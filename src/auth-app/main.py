@@ -1,71 +1,214 @@
 
-import cv2
-import numpy as np
 import base64
 import uvicorn
+import os
+import uuid
 import httpx  # 외부 서비스 호출을 위한 라이브러리 추가
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-from core.detector import BioDetector
+from typing import Optional
+from core.executor import executor, Saturated, DeadlineExceeded, AUTH_RETRY_AFTER
+from core.detector import RoiTracker
+from core.liveness import LivenessEngine
+from common import metrics, startup
+
+INDEX_HTML_PATH = "static/index.html"
+# 메인 페이지 HTML (시작 시 한 번 읽어 메모리에 둠)
+index_html = None
+
+def load_index_html():
+    global index_html
+    with open(INDEX_HTML_PATH, "r", encoding="utf-8") as f:
+        index_html = f.read()
+    return len(index_html)
+
+# 시작 준비: 워커 프로세스마다 MediaPipe 로드 + 합성 프레임 예열이 끝나야 /readyz 200
+warmup = startup.Startup("auth-app")
+
+async def warm_up():
+    await warmup.step("static", load_index_html, required=False)
+    await warmup.step("detector", executor.warm_up)
 
 # 1. FastAPI 앱 초기화
-app = FastAPI()
+# 생체 인식은 이벤트 루프가 아닌 별도 프로세스 풀에서 실행합니다 (프로세스마다 FaceMesh 1개)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    executor.start()
+    print(f"얼굴 인식 워커 {executor.workers}개 시작 (대기열 {executor.max_queue})")
+    warmup.begin(warm_up)
+    yield
+    await warmup.stop()
+    executor.shutdown()
+
+app = FastAPI(lifespan=lifespan)
+metrics.install(app)
+startup.install(app, warmup)
+
+# 프레임 한 장의 최대 크기 (바이너리/WebSocket 업로드)
+AUTH_MAX_FRAME_BYTES = int(os.getenv("AUTH_MAX_FRAME_BYTES", str(2 * 1024 * 1024)))
+# 화면 표시용으로 돌려줄 랜드마크 간격 (전체 점을 보내지 않음)
+OVERLAY_POINT_STEP = 25
+
+# 세션별 직전 얼굴 위치 (다음 프레임은 그 주변만 처리)
+roi_tracker = RoiTracker()
+# 세션별 라이브니스 상태 (깜빡임/머리 움직임을 연속 프레임에서 확인)
+liveness = LivenessEngine()
+# 아직 확인되지 않은 항목별 안내 문구
+LIVENESS_HINTS = {
+    "frames": "🔍 얼굴을 확인하고 있습니다...",
+    "blink": "👁️ 눈을 한 번 깜빡여 주세요.",
+    "motion": "↔️ 고개를 살짝 움직여 주세요.",
+}
+
+# /metrics 의 component_stats 게이지
+metrics.register_stats("executor", executor.stats)
+metrics.register_stats("liveness", liveness.stats)
 
 # 2. 정적 파일 설정 (HTML, CSS, JS 제공)
 # static 폴더 내의 파일들을 /static 경로로 접근할 수 있게 합니다.
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# 3. 생체 인식 모듈 초기화
-detector = BioDetector()
-
-# 4. 데이터 전송 규격 정의
+# 3. 데이터 전송 규격 정의
 class AuthData(BaseModel):
     image: str  # 브라우저에서 보낸 Base64 이미지 데이터
+    session_id: Optional[str] = None  # 같은 사용자의 연속 프레임을 묶는 id (선택)
 
-# 5. [GET] 메인 인증 페이지 제공
+# 4. [GET] 메인 인증 페이지 제공
 @app.get("/", response_class=HTMLResponse)
 async def index():
+    if index_html is not None:
+        return index_html
     try:
-        with open("static/index.html", "r", encoding="utf-8") as f:
-            return f.read()
+        load_index_html()
+        return index_html
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="static/index.html 파일을 찾을 수 없습니다.")
 
-# 6. [POST] 실시간 얼굴 인증 엔드포인트
+# 5. [POST] 실시간 얼굴 인증 엔드포인트
+async def detect_frame(image_bytes, session_id=None):
+    """JPEG 바이트 한 장을 인식해서 응답 내용(dict)을 만듭니다. 대기열이 가득 차면 Saturated."""
+    roi = roi_tracker.get(session_id) if session_id else None
+    # 이미지 디코딩 + MediaPipe 랜드마크 추출은 워커 프로세스에서 실행
+    try:
+        with metrics.span("detector.total"):  # 대기열 + 프로세스 간 전송 포함
+            result, timings = await executor.submit(image_bytes, roi)
+        for step, seconds in timings.items():
+            metrics.observe(f"detector.{step}", seconds)
+    except DeadlineExceeded:
+        return {"status": "fail", "message": "처리 시간이 초과되었습니다. 다시 시도합니다."}
+    except ValueError:
+        return {"status": "error", "message": "이미지 데이터를 읽을 수 없습니다."}
+
+    if not result:
+        # 얼굴이 끊기면 라이브니스도 처음부터 (다른 얼굴/사진으로 바꿔치기 방지)
+        if session_id:
+            roi_tracker.update(session_id, None)
+            liveness.reset(session_id)
+        return {
+            "status": "fail",
+            "message": "인식 중... 얼굴을 정면으로 비춰주세요."
+        }
+    if not session_id:
+        # 한 장만으로는 사진과 실제 얼굴을 구별할 수 없음
+        return {"status": "fail", "message": "연속 프레임 확인을 위해 세션 id 가 필요합니다."}
+
+    roi_tracker.update(session_id, result["bbox"])
+    with metrics.span("liveness.update"):
+        check = liveness.update(session_id, result["landmarks"])
+    x, y, w, h = result["bbox"]
+    response = {
+        "bbox": {"x": x, "y": y, "w": w, "h": h},
+        "points": result["landmarks"][::OVERLAY_POINT_STEP, :2].round(1).tolist(),
+        "liveness": check,
+    }
+    if check["live"]:
+        liveness.reset(session_id)  # 한 번 통과한 기록은 다시 쓰지 않음
+        response.update({
+            "status": "success",
+            # DNS 이름 대신, Ingress에서 설정할 '경로'를 적어줍니다.
+            "redirect_url": "/product",
+        })
+    else:
+        response.update({"status": "checking", "message": LIVENESS_HINTS[check["missing"][0]]})
+    return response
+
+# (호환용) Base64 data URL 을 JSON 으로 받는 기존 방식
 @app.post("/authenticate")
 async def authenticate(data: AuthData):
     try:
         # 데이터 URL 스킴(data:image/jpeg;base64,...) 제거 후 디코딩
         header, encoded = data.image.split(",", 1)
-        nparr = np.frombuffer(base64.b64decode(encoded), np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-        if frame is None:
-            return {"status": "error", "message": "이미지 데이터를 읽을 수 없습니다."}
-
-        # MediaPipe를 이용한 얼굴 랜드마크 및 박스 좌표 추출
-        result = detector.get_landmarks(frame)
-        
-
-        if result:
-            return {
-                "status": "success",
-                # DNS 이름 대신, Ingress에서 설정할 '경로'를 적어줍니다.
-                "redirect_url": "/product" 
-            }     
-        # 인식 실패 시
-        return {
-            "status": "fail", 
-            "message": "인식 중... 얼굴을 정면으로 비춰주세요."
-        }
+        return await detect_frame(base64.b64decode(encoded), data.session_id)
+    except Saturated:
+        return busy_response()
+    except Exception as e:
+        print(f"Server Error: {str(e)}")
+        return {"status": "error", "message": "서버 내부 오류가 발생했습니다."}
 
+# 바이너리 방식: 본문이 그대로 JPEG (Content-Type: image/jpeg 또는 application/octet-stream)
+# 같은 사용자의 연속 프레임은 X-Session-Id 헤더로 묶습니다 (선택)
+@app.post("/authenticate/frame")
+async def authenticate_frame(request: Request):
+    image_bytes = await request.body()
+    if not image_bytes:
+        return {"status": "error", "message": "이미지 데이터가 비어 있습니다."}
+    if len(image_bytes) > AUTH_MAX_FRAME_BYTES:
+        return JSONResponse(status_code=413, content={"status": "error", "message": "이미지가 너무 큽니다."})
+    try:
+        return await detect_frame(image_bytes, request.headers.get("x-session-id"))
+    except Saturated:
+        return busy_response()
     except Exception as e:
         print(f"Server Error: {str(e)}")
         return {"status": "error", "message": "서버 내부 오류가 발생했습니다."}
 
-# 7. 서버 실행 설정
+# WebSocket 방식: 한 연결에서 프레임(바이너리)을 보내고 결과(JSON)를 같은 연결로 받음
+@app.websocket("/ws/authenticate")
+async def authenticate_ws(websocket: WebSocket):
+    await websocket.accept()
+    session_id = f"ws-{uuid.uuid4().hex}"
+    try:
+        while True:
+            # receive_bytes() 는 텍스트 프레임이면 예외를 던지므로 원본 메시지를 직접 봅니다.
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            image_bytes = message.get("bytes")
+            if image_bytes is None:
+                await websocket.send_json({"status": "error", "message": "이미지는 바이너리 프레임으로 보내야 합니다."})
+                continue
+            if len(image_bytes) > AUTH_MAX_FRAME_BYTES:
+                await websocket.send_json({"status": "error", "message": "이미지가 너무 큽니다."})
+                continue
+            try:
+                response = await detect_frame(image_bytes, session_id)
+            except Saturated:
+                response = {"status": "busy", "retry_after": AUTH_RETRY_AFTER,
+                            "message": "요청이 많습니다. 잠시 후 다시 시도합니다."}
+            except Exception as e:
+                # 프레임 하나가 실패해도 연결은 유지 (HTTP 엔드포인트와 같은 응답)
+                print(f"Server Error: {str(e)}")
+                response = {"status": "error", "message": "서버 내부 오류가 발생했습니다."}
+            await websocket.send_json(response)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # 어떻게 끝나든 세션 상태를 남기지 않음
+        roi_tracker.update(session_id, None)
+        liveness.reset(session_id)
+
+def busy_response():
+    """처리 대기열이 가득 찼을 때 클라이언트가 잠시 후 다시 보내도록 503을 돌려줍니다."""
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": str(AUTH_RETRY_AFTER)},
+        content={"status": "busy", "message": "요청이 많습니다. 잠시 후 다시 시도합니다."}
+    )
+
+# 6. 서버 실행 설정
 if __name__ == "__main__":
     # 로컬 테스트 및 컨테이너 배포를 위해 8001번 포트 사용
     # product_service(8000)와 겹치지 않도록 설정함
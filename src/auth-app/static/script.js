@@ -7,8 +7,15 @@ const entryBtn = document.getElementById('entryBtn');
 
 // 서버 전송용 프레임을 뽑아낼 보이지 않는 캔버스
 const tempCanvas = document.createElement('canvas');
+const tCtx = tempCanvas.getContext('2d');
 let isAuthenticating = false; // 인증 진행 상태 플래그
 
+// 서버로 보낼 프레임 최대 너비 (축소해서 전송량과 서버 디코딩 비용을 줄임)
+const SEND_WIDTH = 320;
+let socket = null; // WebSocket 연결 (실패하면 HTTP 바이너리 업로드 사용)
+// HTTP 업로드 시 연속 프레임을 같은 세션으로 묶기 위한 id (서버가 직전 얼굴 위치를 기억)
+const sessionId = (crypto.randomUUID && crypto.randomUUID()) || String(Date.now()) + Math.random();
+
 /**
  * 1. 시스템 초기화 및 카메라 연결 (인증 시작 버튼 클릭 시)
  */
@@ -22,14 +29,16 @@ async function startSystem() {
         });
         video.srcObject = stream;
 
-        video.onloadedmetadata = () => {
+        video.onloadedmetadata = async () => {
             video.play();
             // 화면 크기 동기화 (박스 밀림 방지)
             overlayCanvas.width = video.clientWidth;
             overlayCanvas.height = video.clientHeight;
-            tempCanvas.width = video.videoWidth;
-            tempCanvas.height = video.videoHeight;
-            
+            const scale = Math.min(1, SEND_WIDTH / video.videoWidth);
+            tempCanvas.width = Math.round(video.videoWidth * scale);
+            tempCanvas.height = Math.round(video.videoHeight * scale);
+
+            socket = await connectSocket();
             isAuthenticating = true; // 인증 시작
             statusMsg.innerText = "🔍 얼굴을 비춰주세요...";
             loop(); 
@@ -42,29 +51,73 @@ async function startSystem() {
 }
 
 /**
- * 2. 실시간 인증 루프 (성공 시 버튼만 표시)
+ * 2. 프레임 전송 (WebSocket 우선, 안 되면 HTTP 바이너리 업로드)
+ */
+function captureFrame() {
+    tCtx.drawImage(video, 0, 0, tempCanvas.width, tempCanvas.height);
+    return new Promise(resolve => tempCanvas.toBlob(resolve, 'image/jpeg', 0.7));
+}
+
+function connectSocket() {
+    return new Promise(resolve => {
+        const proto = window.location.protocol === 'https:' ? 'wss' : 'ws';
+        const ws = new WebSocket(`${proto}://${window.location.host}/ws/authenticate`);
+        ws.onopen = () => resolve(ws);
+        ws.onerror = () => resolve(null);
+    });
+}
+
+function sendOverSocket(blob) {
+    return new Promise((resolve, reject) => {
+        socket.onmessage = (e) => resolve(JSON.parse(e.data));
+        socket.onclose = () => {
+            socket = null;
+            reject(new Error('WebSocket 연결 종료'));
+        };
+        socket.send(blob);
+    });
+}
+
+async function sendOverHttp(blob) {
+    const res = await fetch('/authenticate/frame', {
+        method: 'POST',
+        headers: { 'Content-Type': 'image/jpeg', 'X-Session-Id': sessionId },
+        body: blob
+    });
+    // 서버가 바쁘면(503) Retry-After 만큼 쉬었다가 다시 보냄
+    if (res.status === 503) {
+        return { status: 'busy', retry_after: parseFloat(res.headers.get('Retry-After') || '1') };
+    }
+    return res.json();
+}
+
+/**
+ * 3. 실시간 인증 루프 (성공 시 버튼만 표시)
  */
 async function loop() {
     if (!isAuthenticating) return; 
 
-    const tCtx = tempCanvas.getContext('2d');
-    tCtx.drawImage(video, 0, 0, tempCanvas.width, tempCanvas.height);
-    const imageData = tempCanvas.toDataURL('image/jpeg', 0.7);
+    const blob = await captureFrame();
 
     try {
-        const res = await fetch('/authenticate', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ image: imageData })
-        });
+        const data = socket ? await sendOverSocket(blob) : await sendOverHttp(blob);
+
+        if (data.status === "busy") {
+            statusMsg.innerText = "⏳ 요청이 많아 잠시 후 다시 시도합니다...";
+            setTimeout(loop, (data.retry_after || 1) * 1000);
+            return;
+        }
 
-        const data = await res.json();
         ctx.clearRect(0, 0, overlayCanvas.width, overlayCanvas.height);
 
         if (data.status === "success") {
             // [수정] 즉시 이동하지 않고 상태만 업데이트
             isAuthenticating = false; 
             statusMsg.innerText = "✅ 인증 성공! 아래 버튼을 클릭하여 입장하세요.";
+            if (socket) {
+                socket.close();
+                socket = null;
+            }
             
             // 1. [로그인] 혹은 [입장] 버튼을 화면에 표시
             if (entryBtn) {
@@ -76,6 +129,11 @@ async function loop() {
             
             // 3. (옵션) 서버가 준 리다이렉트 경로를 전역 변수나 버튼에 저장해둘 수 있습니다.
             // 여기서는 단순화하여 goProduct 함수에서 처리합니다.
+        } else if (data.status === "checking") {
+            // 얼굴은 찾았고 라이브니스(깜빡임/움직임) 확인 중
+            statusMsg.innerText = data.message;
+            drawOverlay(data);
+            requestAnimationFrame(loop);
         } else {
             statusMsg.innerText = "🔍 인식 중: 얼굴을 맞춰주세요.";
             requestAnimationFrame(loop);
@@ -86,7 +144,7 @@ async function loop() {
     }
 }
 /**
- * 3. 얼굴 좌표 보정 및 그리기
+ * 4. 얼굴 좌표 보정 및 그리기
  */
 function drawOverlay(data) {
     const scaleX = video.clientWidth / tempCanvas.width;
@@ -102,17 +160,16 @@ function drawOverlay(data) {
     );
 
     ctx.fillStyle = "#00ff00";
-    data.points.forEach((p, i) => {
-        if (i % 25 === 0) { // 성능을 위해 점 일부만 표시
-            ctx.beginPath();
-            ctx.arc(p.x * scaleX, p.y * scaleY, 2, 0, 2 * Math.PI);
-            ctx.fill();
-        }
+    // 서버가 일부 점만 [x, y] 형태로 보내줌
+    data.points.forEach(([x, y]) => {
+        ctx.beginPath();
+        ctx.arc(x * scaleX, y * scaleY, 2, 0, 2 * Math.PI);
+        ctx.fill();
     });
 }
 
 /**
- * 4. [로그인/상품 페이지 입장] 버튼 클릭 시 실행
+ * 5. [로그인/상품 페이지 입장] 버튼 클릭 시 실행
  */
 function goProduct() {
     // [미션 반영] 클릭 시점에 포트를 떼고 Ingress(80) 주소로 이동
@@ -0,0 +1,140 @@
+"""라이브니스 판정 재생 테스트.
+
+bench.liveness_replay 의 합성 랜드마크 시퀀스(난수 시드 고정)와 .npz 녹화본을 LivenessEngine 에
+프레임 순서대로 넣고, 깜빡임/머리 움직임/정지 사진마다 통과 여부를 확인합니다.
+시계도 프레임 번호로 정하므로 실행할 때마다 결과가 같습니다.
+"""
+import numpy as np
+import pytest
+
+from bench import liveness_replay
+from bench.liveness_replay import _EYE_CLOSED, _EYE_OPEN, _face, _rigid, replay, synthetic_scenarios
+from core.liveness import LivenessEngine
+
+FRAMES = 60
+
+
+def sequence(eye_height, nose_shift=lambda i: 0.0, jitter=0.15, seed=1, frames=FRAMES):
+    """eye_height(i), nose_shift(i) 로 프레임마다 얼굴을 만들고 랜드마크 잡음을 더합니다."""
+    rng = np.random.default_rng(seed)
+    return np.stack([_face(eye_height(i), nose_shift=nose_shift(i))
+                     + rng.normal(0, jitter, (468, 3)).astype(np.float32) for i in range(frames)])
+
+
+def blink_at(start, length=3):
+    return lambda i: _EYE_CLOSED if start <= i < start + length else _EYE_OPEN
+
+
+def eyes_open(i):
+    return _EYE_OPEN
+
+
+def turn_head(i):
+    return 5 * np.sin(i / 6)
+
+
+@pytest.fixture
+def engine():
+    return LivenessEngine(clock=lambda: 0.0)
+
+
+@pytest.mark.parametrize("name, landmarks, expect", synthetic_scenarios(),
+                         ids=[name for name, _, _ in synthetic_scenarios()])
+def test_synthetic_scenarios(name, landmarks, expect):
+    check, passed_at = replay(landmarks)
+    assert (passed_at is not None) == (expect == "live"), check
+
+
+def test_blink_with_head_motion_passes(engine):
+    check, passed_at = replay(sequence(blink_at(25), turn_head, jitter=0.4), engine=engine)
+    assert check["live"]
+    assert check["blinks"] == 1
+    # 깜빡임이 끝나고 눈을 다시 뜬 프레임에서 통과
+    assert passed_at == 28
+
+
+def test_static_photo_fails(engine):
+    check, passed_at = replay(sequence(eyes_open), engine=engine)
+    assert passed_at is None
+    assert check["frames"] == FRAMES
+    assert set(check["missing"]) == {"blink", "motion"}
+
+
+def test_blink_without_motion_fails(engine):
+    # 눈만 깜빡이고 머리/얼굴은 그대로 (예: 깜빡이는 눈만 합성한 사진)
+    check, passed_at = replay(sequence(blink_at(25)), engine=engine)
+    assert passed_at is None
+    assert check["blinks"] == 1
+    assert check["missing"] == ["motion"]
+
+
+def test_head_motion_without_blink_fails(engine):
+    check, passed_at = replay(sequence(eyes_open, turn_head, jitter=0.4), engine=engine)
+    assert passed_at is None
+    assert check["pose_range"] >= engine.pose_range
+    assert check["missing"] == ["blink"]
+
+
+def test_moving_photo_is_not_head_motion(engine):
+    # 사진을 통째로 돌리고 흔들면 정규화한 얼굴은 거의 그대로
+    rng = np.random.default_rng(3)
+    landmarks = np.stack([_rigid(_face(blink_at(25)(i)), 0.1 * np.sin(i / 5), 1 + 0.05 * np.sin(i / 7),
+                                 8 * np.sin(i / 4), 0) + rng.normal(0, 0.15, (468, 3)).astype(np.float32)
+                          for i in range(FRAMES)])
+    check, passed_at = replay(landmarks, engine=engine)
+    assert passed_at is None
+    assert check["pose_range"] < engine.pose_range
+    assert check["motion"] < engine.motion
+
+
+def test_long_eye_closure_is_not_a_blink(engine):
+    check, passed_at = replay(sequence(blink_at(20, length=engine.blink_max_frames + 5), turn_head, jitter=0.4),
+                              engine=engine)
+    assert passed_at is None
+    assert check["blinks"] == 0
+
+
+def test_too_few_frames_fails(engine):
+    check, passed_at = replay(sequence(blink_at(2), turn_head, jitter=0.4, frames=engine.min_frames - 1),
+                              engine=engine)
+    assert passed_at is None
+    assert check["blinks"] == 1
+    assert check["missing"] == ["frames"]
+
+
+def test_face_lost_resets_session(engine):
+    live = sequence(blink_at(2), turn_head, jitter=0.4)
+    photo = sequence(eyes_open, seed=2)
+    landmarks = np.concatenate([live[:6], np.full((1, 468, 3), np.nan, dtype=np.float32), photo[7:]])
+    check, passed_at = replay(landmarks, engine=engine)
+    assert passed_at is None
+    assert check["blinks"] == 0
+
+
+def test_replay_is_deterministic():
+    first = [replay(landmarks) for _, landmarks, _ in synthetic_scenarios()]
+    second = [replay(landmarks) for _, landmarks, _ in synthetic_scenarios()]
+    assert first == second
+
+
+def test_recorded_npz_replay(tmp_path):
+    # record() 가 남기는 형식 (landmarks, fps, expect) 그대로 저장했다가 다시 읽어 재생
+    live = sequence(blink_at(25), turn_head, jitter=0.4)
+    live[10] = np.nan  # 얼굴을 놓친 프레임
+    photo = sequence(eyes_open)
+    np.savez_compressed(tmp_path / "live.npz", landmarks=live, fps=30.0, expect="live")
+    np.savez_compressed(tmp_path / "photo.npz", landmarks=photo, fps=30.0, expect="spoof")
+
+    for name, expect in (("live.npz", "live"), ("photo.npz", "spoof")):
+        landmarks, fps, recorded_expect = liveness_replay.load(tmp_path / name)
+        assert (fps, recorded_expect) == (30.0, expect)
+        _, passed_at = replay(landmarks, fps)
+        assert (passed_at is not None) == (expect == "live")
+
+
+def test_replay_cli_exit_code(tmp_path, monkeypatch):
+    np.savez_compressed(tmp_path / "photo.npz", landmarks=sequence(eyes_open), expect="live")
+    monkeypatch.setattr("sys.argv", ["liveness_replay", "--synthetic"])
+    assert liveness_replay.main() == 0
+    monkeypatch.setattr("sys.argv", ["liveness_replay", str(tmp_path / "photo.npz")])
+    assert liveness_replay.main() == 1
@@ -0,0 +1,272 @@
+"""product-app 과 worker3 가 함께 쓰는 ChromaDB / OpenAI 클라이언트.
+
+- 프로세스마다 한 번만 만드는 lazy 싱글톤 (keep-alive 커넥션 풀을 계속 재사용)
+- 컬렉션 핸들 캐시 (get_or_create_collection 왕복을 매 요청마다 하지 않음)
+- 타임아웃: chromadb 클라이언트는 timeout=None 으로 만들어지므로 여기서 지정합니다.
+- 서킷 브레이커: ChromaDB 가 연속으로 실패하면 잠시 호출하지 않고 바로 CircuitOpenError 를 냅니다.
+  (product-app 의 rag_search 는 접속 타임아웃을 기다리지 않고 LIKE 검색으로 폴백)
+
+FastAPI 에서는 lifespan 시작 시 aget_collection() 으로 미리 연결하고, 종료 시 aclose() 를 호출합니다.
+"""
+import os
+import time
+import asyncio
+import threading
+import httpx
+import chromadb
+from openai import OpenAI, AsyncOpenAI
+from . import metrics
+
+CHROMA_HOST = os.getenv("CHROMA_HOST", "chromadb-service")
+CHROMA_PORT = int(os.getenv("CHROMA_PORT", "8000"))
+CHROMA_COLLECTION = os.getenv("CHROMA_COLLECTION", "products")
+CHROMA_TIMEOUT = float(os.getenv("CHROMA_TIMEOUT", "10"))                  # ChromaDB 요청 하나의 최대 시간(초)
+CHROMA_CONNECT_TIMEOUT = float(os.getenv("CHROMA_CONNECT_TIMEOUT", "1"))   # 접속 타임아웃(초)
+CHROMA_COLLECTION_TTL = float(os.getenv("CHROMA_COLLECTION_TTL", "300"))   # 컬렉션 핸들 재확인 주기(초), reindex --recreate 대비
+CHROMA_BREAKER_FAILURES = int(os.getenv("CHROMA_BREAKER_FAILURES", "3"))   # 연속 실패가 이만큼이면 차단
+CHROMA_BREAKER_RESET = float(os.getenv("CHROMA_BREAKER_RESET", "30"))      # 차단 후 다시 시도해 보기까지(초)
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30"))                  # OpenAI 요청 타임아웃(초)
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+
+
+class CircuitOpenError(Exception):
+    """서킷이 열려 있어 호출하지 않았을 때 발생합니다."""
+
+
+class CircuitBreaker:
+    """연속 실패 횟수 기반 서킷 브레이커.
+
+    closed → (max_failures 회 연속 실패) → open → (reset_after 초 경과) → half-open
+    half-open 에서는 한 호출만 탐색으로 보내고, 성공하면 closed, 실패하면 다시 open.
+    탐색 결과가 나올 때까지 다른 호출은 막습니다.
+    """
+
+    def __init__(self, name, max_failures=CHROMA_BREAKER_FAILURES, reset_after=CHROMA_BREAKER_RESET):
+        self.name = name
+        self.max_failures = max_failures
+        self.reset_after = reset_after
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = None  # half-open 탐색 호출을 보낸 시각
+        self.rejected = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half-open" if time.monotonic() - self._opened_at >= self.reset_after else "open"
+
+    def _blocked(self, now):
+        """차단 사유 (없으면 None). _lock 을 잡은 상태에서 호출합니다."""
+        if self._opened_at is None:
+            return None
+        if now - self._opened_at < self.reset_after:
+            remaining = self.reset_after - (now - self._opened_at)
+            return f"{self.name} 호출 차단 중 ({remaining:.0f}초 후 다시 시도)"
+        # 탐색 호출이 결과 없이 사라져도 reset_after 가 지나면 다음 호출이 다시 탐색
+        if self._probing is not None and now - self._probing < self.reset_after:
+            return f"{self.name} 복구 확인 중 (다른 호출의 결과를 기다림)"
+        return None
+
+    def allow(self):
+        """호출해도 되면 그냥 반환하고, 차단 중이면 CircuitOpenError.
+
+        half-open 에서 통과한 호출은 탐색 호출이므로 반드시 success() / failure() / abort() 중 하나로 끝내야 합니다.
+        """
+        with self._lock:
+            now = time.monotonic()
+            reason = self._blocked(now)
+            if reason is None:
+                if self._opened_at is not None:
+                    self._probing = now
+                return
+            self.rejected += 1
+        raise CircuitOpenError(reason)
+
+    def check(self):
+        """호출 전에 차단 여부만 미리 확인합니다. allow() 와 달리 탐색 호출 자리를 차지하지 않습니다."""
+        with self._lock:
+            reason = self._blocked(time.monotonic())
+            if reason is None:
+                return
+            self.rejected += 1
+        raise CircuitOpenError(reason)
+
+    def success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                print(f"✅ {self.name} 복구됨, 서킷을 닫습니다.")
+            self._failures = 0
+            self._opened_at = None
+            self._probing = None
+
+    def failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = None
+            half_open = self._opened_at is not None
+            if half_open or self._failures >= self.max_failures:
+                if not half_open:
+                    print(f"⚠️ {self.name} 연속 {self._failures}회 실패, {self.reset_after:.0f}초 동안 호출을 차단합니다.")
+                self._opened_at = time.monotonic()
+
+    def abort(self):
+        """결과를 모른 채 끝난 호출(취소 등). 탐색 중이었으면 다음 호출이 다시 탐색합니다."""
+        with self._lock:
+            self._probing = None
+
+    def stats(self):
+        state = self.state
+        return {"state": state, "open": state == "open", "failures": self._failures, "rejected": self.rejected}
+
+
+chroma_breaker = CircuitBreaker("ChromaDB")
+
+_lock = threading.Lock()
+_openai = None
+_async_openai = None
+_chroma = None
+_collections = {}        # 이름 → (핸들, 가져온 시각)
+_async_chroma = None
+_async_collections = {}  # 이름 → (핸들, 가져온 시각)
+
+
+# ---- OpenAI ----
+def get_openai():
+    """동기 OpenAI 클라이언트 (httpx 커넥션 풀 재사용)."""
+    global _openai
+    if _openai is None:
+        with _lock:
+            if _openai is None:
+                _openai = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), timeout=OPENAI_TIMEOUT,
+                                 max_retries=OPENAI_MAX_RETRIES)
+    return _openai
+
+
+def get_async_openai():
+    """이벤트 루프에서 쓰는 AsyncOpenAI 클라이언트."""
+    global _async_openai
+    if _async_openai is None:
+        _async_openai = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), timeout=OPENAI_TIMEOUT,
+                                    max_retries=OPENAI_MAX_RETRIES)
+    return _async_openai
+
+
+# ---- ChromaDB (동기) ----
+def _chroma_timeout():
+    return httpx.Timeout(CHROMA_TIMEOUT, connect=CHROMA_CONNECT_TIMEOUT)
+
+
+def get_chroma():
+    """동기 ChromaDB 클라이언트. 만들 때도 서버에 확인 요청을 보내므로 브레이커를 거칩니다."""
+    global _chroma
+    if _chroma is None:
+        with _lock:
+            if _chroma is None:
+                chroma_breaker.allow()
+                try:
+                    client = chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT)
+                except Exception:
+                    chroma_breaker.failure()
+                    raise
+                chroma_breaker.success()
+                session = getattr(getattr(client, "_server", None), "_session", None)
+                if isinstance(session, httpx.Client):
+                    session.timeout = _chroma_timeout()
+                _chroma = client
+    return _chroma
+
+
+def get_collection(name=CHROMA_COLLECTION):
+    """캐시한 컬렉션 핸들. CHROMA_COLLECTION_TTL 이 지나면 get_or_create 로 다시 확인합니다."""
+    cached = _collections.get(name)
+    if cached is not None and time.monotonic() - cached[1] < CHROMA_COLLECTION_TTL:
+        return cached[0]
+    client = get_chroma()
+    collection = chroma_call(client.get_or_create_collection, name=name)
+    _collections[name] = (collection, time.monotonic())
+    return collection
+
+
+def invalidate_collection(name=CHROMA_COLLECTION):
+    """컬렉션을 지우거나 다시 만들었을 때 캐시한 핸들을 버립니다."""
+    _collections.pop(name, None)
+    _async_collections.pop(name, None)
+
+
+def chroma_call(fn, *args, **kwargs):
+    """ChromaDB 호출을 브레이커로 감쌉니다. 실패하면 컬렉션 핸들 캐시도 버립니다."""
+    chroma_breaker.allow()
+    try:
+        with metrics.span(f"chroma.{getattr(fn, '__name__', 'call')}"):
+            result = fn(*args, **kwargs)
+    except Exception:
+        chroma_breaker.failure()
+        invalidate_collection()
+        raise
+    chroma_breaker.success()
+    return result
+
+
+# ---- ChromaDB (비동기) ----
+async def achroma_call(fn, *args, timeout=CHROMA_TIMEOUT, **kwargs):
+    """비동기 ChromaDB 호출 (fn 은 코루틴 함수). 브레이커 + 전체 타임아웃."""
+    chroma_breaker.allow()
+    try:
+        with metrics.span(f"chroma.{getattr(fn, '__name__', 'call')}"):
+            result = await asyncio.wait_for(fn(*args, **kwargs), timeout)
+    except asyncio.CancelledError:
+        chroma_breaker.abort()
+        raise
+    except Exception:
+        chroma_breaker.failure()
+        invalidate_collection()
+        raise
+    chroma_breaker.success()
+    return result
+
+
+async def aget_chroma():
+    global _async_chroma
+    if _async_chroma is None:
+        _async_chroma = await achroma_call(chromadb.AsyncHttpClient, host=CHROMA_HOST, port=CHROMA_PORT)
+    return _async_chroma
+
+
+async def aget_collection(name=CHROMA_COLLECTION):
+    """캐시한 비동기 컬렉션 핸들."""
+    cached = _async_collections.get(name)
+    if cached is not None and time.monotonic() - cached[1] < CHROMA_COLLECTION_TTL:
+        return cached[0]
+    client = await aget_chroma()
+    collection = await achroma_call(client.get_or_create_collection, name=name)
+    _async_collections[name] = (collection, time.monotonic())
+    return collection
+
+
+async def aclose():
+    """lifespan 종료 시 커넥션 풀을 닫습니다."""
+    global _async_openai, _async_chroma
+    if _async_openai is not None:
+        await _async_openai.close()
+        _async_openai = None
+    _async_chroma = None
+    _async_collections.clear()
+    close()
+
+
+def close():
+    global _openai, _chroma
+    with _lock:
+        if _openai is not None:
+            _openai.close()
+            _openai = None
+        _chroma = None
+        _collections.clear()
+
+
+def stats():
+    return {"chroma_breaker": chroma_breaker.stats(), "collections": sorted(_collections),
+            "async_collections": sorted(_async_collections)}
@@ -0,0 +1,354 @@
+"""product-app 과 worker3 가 함께 쓰는 임베딩 서비스.
+
+- 정규화한 텍스트를 키로 하는 메모리 LRU+TTL 캐시
+- 선택적인 SQLite 디스크 캐시 (EMBEDDING_CACHE_PATH)
+- 같은 텍스트의 동시 요청은 한 번만 호출 (in-flight coalescing)
+- 짧은 시간 안에 모인 캐시 미스는 한 번의 embeddings.create 로 묶어서 호출 (micro-batching)
+- 네트워크 없이 쓸 수 있는 FakeEmbedder
+"""
+import os
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future
+from . import metrics
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai")  # openai | fake
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+EMBEDDING_CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", "86400"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "")  # 비어 있으면 디스크 캐시 사용 안 함
+EMBEDDING_MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", "64"))
+EMBEDDING_BATCH_WINDOW = float(os.getenv("EMBEDDING_BATCH_WINDOW", "0.005"))  # 초
+
+
+def normalize_text(text):
+    """캐시 키로 쓸 수 있게 유니코드/공백/대소문자를 정규화합니다."""
+    text = unicodedata.normalize("NFKC", text or "")
+    return " ".join(text.split()).casefold()
+
+
+class LRUTTLCache:
+    """최대 개수와 만료 시간이 있는 스레드 안전 LRU 캐시."""
+
+    def __init__(self, maxsize=EMBEDDING_CACHE_SIZE, ttl=EMBEDDING_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteEmbeddingCache:
+    """프로세스가 재시작돼도 남는 디스크 캐시. 벡터는 float32 BLOB으로 저장합니다."""
+
+    def __init__(self, path, ttl=None):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY, vec BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys):
+        if not keys:
+            return {}
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vec, created_at FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob, created_at in rows:
+                    if self.ttl and created_at + self.ttl < time.time():
+                        continue
+                    found[key] = array("f", blob).tolist()
+        return found
+
+    def set_many(self, items):
+        now = time.time()
+        rows = [(key, array("f", vec).tobytes(), now) for key, vec in items]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)", rows)
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class OpenAIEmbedder:
+    """OpenAI embeddings API 를 배치로 호출합니다."""
+
+    def __init__(self, client, model=EMBEDDING_MODEL):
+        self.client = client
+        self.model = model
+
+    def embed_batch(self, texts):
+        texts = list(texts)
+        response = self.client.embeddings.create(model=self.model, input=texts)
+        # index 로 자리를 맞춥니다. 응답에서 빠진 입력은 None (EmbeddingService 가 에러로 돌려줍니다)
+        vectors = [None] * len(texts)
+        for d in response.data:
+            if 0 <= d.index < len(texts):
+                vectors[d.index] = d.embedding
+        return vectors
+
+
+class FakeEmbedder:
+    """오프라인 테스트용 결정적 임베딩.
+
+    문자 bigram 을 해시해서 차원에 더하므로 비슷한 텍스트는 비슷한 벡터가 나옵니다.
+    """
+
+    def __init__(self, dim=64, model="fake"):
+        self.dim = dim
+        self.model = model
+        self.calls = 0
+
+    def embed_one(self, text):
+        vec = [0.0] * self.dim
+        text = f" {text} "
+        for i in range(len(text) - 1):
+            digest = hashlib.blake2b(text[i:i + 2].encode("utf-8"), digest_size=8).digest()
+            idx = int.from_bytes(digest[:4], "little") % self.dim
+            vec[idx] += 1.0 if digest[4] & 1 else -1.0
+        norm = sum(v * v for v in vec) ** 0.5 or 1.0
+        return [v / norm for v in vec]
+
+    def embed_batch(self, texts):
+        self.calls += 1
+        return [self.embed_one(t) for t in texts]
+
+
+class EmbeddingService:
+    """캐시, 요청 합치기, 마이크로 배치를 묶은 임베딩 클라이언트.
+
+    동기 코드(worker3)는 embed/embed_many, 비동기 코드(FastAPI)는 aembed 를 사용합니다.
+    실제 API 호출은 백그라운드 스레드 하나가 모아서 처리합니다.
+    """
+
+    def __init__(self, embedder, memory_cache=None, disk_cache=None,
+                 max_batch=EMBEDDING_MAX_BATCH, batch_window=EMBEDDING_BATCH_WINDOW):
+        self.embedder = embedder
+        self.memory = memory_cache if memory_cache is not None else LRUTTLCache()
+        self.disk = disk_cache
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.model = getattr(embedder, "model", "")
+
+        self._cond = threading.Condition()
+        self._inflight = {}
+        self._pending = []
+        self._thread = None
+        self._closed = False
+        self._stats = {"requests": 0, "memory_hits": 0, "disk_hits": 0, "coalesced": 0,
+                       "misses": 0, "api_calls": 0, "api_errors": 0, "api_time": 0.0}
+
+    def _submit(self, text):
+        normalized = normalize_text(text)
+        key = f"{self.model}:{normalized}"
+        with self._cond:
+            self._stats["requests"] += 1
+            cached = self.memory.get(key)
+            if cached is not None:
+                self._stats["memory_hits"] += 1
+                fut = Future()
+                fut.set_result(list(cached))
+                return fut
+            fut = self._inflight.get(key)
+            if fut is not None:
+                self._stats["coalesced"] += 1
+                return fut
+            if self._closed:
+                raise RuntimeError("EmbeddingService가 종료되었습니다.")
+            fut = Future()
+            self._inflight[key] = fut
+            self._pending.append((key, normalized))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._flush_loop, name="embedding-batcher", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+            return fut
+
+    def embed(self, text):
+        return self._submit(text).result()
+
+    def embed_many(self, texts):
+        futures = [self._submit(t) for t in texts]
+        return [f.result() for f in futures]
+
+    # 같은 키의 Future 는 합쳐진 호출자들이 함께 기다리므로, 한 호출자가 취소돼도(클라이언트 끊김,
+    # 타임아웃) 공유 Future 는 취소되지 않도록 shield 로 감쌉니다.
+    async def aembed(self, text):
+        return await asyncio.shield(asyncio.wrap_future(self._submit(text)))
+
+    async def aembed_many(self, texts):
+        futures = [asyncio.shield(asyncio.wrap_future(self._submit(t))) for t in texts]
+        return await asyncio.gather(*futures)
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return None
+            # 잠깐 기다리며 동시에 들어오는 미스를 한 배치로 모읍니다.
+            deadline = time.monotonic() + self.batch_window
+            while len(self._pending) < self.max_batch and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            return batch
+
+    def _flush_loop(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self._process(batch)
+            except Exception as e:
+                # 어떤 경우에도 기다리는 호출자가 남지 않도록
+                print(f"❌ 임베딩 배치 처리 에러: {e}")
+                for key, _ in batch:
+                    self._resolve(key, error=e)
+
+    def _resolve(self, key, value=None, error=None):
+        with self._cond:
+            fut = self._inflight.pop(key, None)
+        if fut is None or fut.done():  # 이미 취소된 Future 에 결과를 넣으면 InvalidStateError
+            return
+        if error is not None:
+            fut.set_exception(error)
+        else:
+            fut.set_result(list(value))
+
+    def _process(self, batch):
+        keys = [key for key, _ in batch]
+        texts = dict(batch)
+        found = {}
+        if self.disk is not None:
+            try:
+                found = self.disk.get_many(keys)
+            except Exception as e:
+                print(f"⚠️ 임베딩 디스크 캐시 조회 에러: {e}")
+        for key, vec in found.items():
+            self.memory.set(key, tuple(vec))
+            self._resolve(key, vec)
+
+        missing = [k for k in keys if k not in found]
+        with self._cond:
+            self._stats["disk_hits"] += len(found)
+            self._stats["misses"] += len(missing)
+        if not missing:
+            return
+
+        started = time.monotonic()
+        failed = False
+        try:
+            vectors = self.embedder.embed_batch([texts[k] for k in missing])
+        except Exception as e:
+            failed = True
+            with self._cond:
+                self._stats["api_errors"] += 1
+            for key in missing:
+                self._resolve(key, error=e)
+            return
+        finally:
+            elapsed = time.monotonic() - started
+            metrics.observe("embedding.api", elapsed, error=failed)
+            with self._cond:
+                self._stats["api_calls"] += 1
+                self._stats["api_time"] += elapsed
+
+        vectors = list(vectors)
+        done = [(key, vec) for key, vec in zip(missing, vectors) if vec is not None]
+        if len(done) < len(missing):
+            # 입력보다 적은 벡터가 왔으면 받지 못한 키는 에러로 끝냅니다 (_inflight 에 남아 호출자가 멈추지 않도록)
+            error = ValueError(f"임베딩 응답에 벡터가 부족합니다: 입력 {len(missing)}개, 벡터 {len(done)}개")
+            print(f"⚠️ {error}")
+            with self._cond:
+                self._stats["api_errors"] += 1
+            received = {key for key, _ in done}
+            for key in missing:
+                if key not in received:
+                    self._resolve(key, error=error)
+
+        for key, vec in done:
+            self.memory.set(key, tuple(vec))
+        if self.disk is not None and done:
+            try:
+                self.disk.set_many(done)
+            except Exception as e:
+                print(f"⚠️ 임베딩 디스크 캐시 저장 에러: {e}")
+        for key, vec in done:
+            self._resolve(key, vec)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats["inflight"] = len(self._inflight)
+        stats["memory_size"] = len(self.memory)
+        stats["avg_batch"] = round(stats["misses"] / stats["api_calls"], 2) if stats["api_calls"] else 0.0
+        return stats
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self.disk is not None:
+            self.disk.close()
+
+
+def create_embedding_service(openai_client=None, backend=EMBEDDING_BACKEND):
+    """환경 변수 설정대로 EmbeddingService 를 만듭니다."""
+    if backend == "fake":
+        embedder = FakeEmbedder()
+    else:
+        if openai_client is None:
+            raise ValueError("openai 백엔드에는 OpenAI 클라이언트가 필요합니다.")
+        embedder = OpenAIEmbedder(openai_client)
+    disk = SQLiteEmbeddingCache(EMBEDDING_CACHE_PATH) if EMBEDDING_CACHE_PATH else None
+    return EmbeddingService(embedder, disk_cache=disk)
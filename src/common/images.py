@@ -0,0 +1,129 @@
+"""product-app(빌드 시) 과 worker3(상품 수집 시) 가 함께 쓰는 상품 이미지 변환.
+
+원본 한 장으로 너비별(ASSET_WIDTHS) WebP + JPEG 변형을 만듭니다. 파일 이름에 내용 해시를 넣으므로
+({이름}-{너비}w.{해시}.{확장자}) 같은 이름은 항상 같은 내용이고, 브라우저/프록시가 무기한 캐시해도 됩니다.
+원본보다 큰 너비는 만들지 않습니다.
+"""
+import io
+import os
+import re
+import hashlib
+from urllib.parse import urlparse
+
+import httpx
+from PIL import Image, ImageOps
+
+ASSET_WIDTHS = tuple(int(w) for w in os.getenv("ASSET_WIDTHS", "120,240,480,960").split(","))  # 만들 너비(px)
+ASSET_QUALITY = int(os.getenv("ASSET_QUALITY", "80"))
+ASSET_MAX_SOURCE_BYTES = int(os.getenv("ASSET_MAX_SOURCE_BYTES", str(10 * 1024 * 1024)))  # 내려받을 원본 최대 크기
+ASSET_FETCH_TIMEOUT = float(os.getenv("ASSET_FETCH_TIMEOUT", "10"))  # 원본 다운로드 타임아웃(초)
+
+FORMATS = {"webp": "image/webp", "jpeg": "image/jpeg"}
+EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+HASH_LENGTH = 12
+# 해시 이름 형식 (/assets/ 요청 검증용)
+ASSET_NAME = re.compile(r"^[A-Za-z0-9_-]{1,64}-\d+w\.([0-9a-f]{%d})\.(webp|jpg)$" % HASH_LENGTH)
+
+
+class ImageError(Exception):
+    """이미지를 내려받거나 읽을 수 없을 때 발생합니다."""
+
+
+class Variant:
+    __slots__ = ("name", "width", "format", "content_type", "data")
+
+    def __init__(self, name, width, format, data):
+        self.name = name
+        self.width = width
+        self.format = format
+        self.content_type = FORMATS[format]
+        self.data = data
+
+    def to_dict(self):
+        return {"name": self.name, "width": self.width, "format": self.format}
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def verify_name(name, data):
+    """해시 이름과 내용이 맞는지 확인합니다."""
+    match = ASSET_NAME.match(name)
+    return bool(match) and match.group(1) == content_hash(data)
+
+
+def stem_for(source):
+    """원본 URL/경로에서 파일 이름 앞부분을 만듭니다 (영문/숫자/-/_ 만, 확장자 제외)."""
+    base = os.path.basename(urlparse(source).path)
+    base = base.split(".", 1)[0]  # a.jpg'.jpg 같은 이름도 a 로
+    stem = re.sub(r"[^A-Za-z0-9_-]+", "-", base).strip("-")[:40]
+    return stem or "image"
+
+
+def is_remote(url):
+    return urlparse(url or "").scheme in ("http", "https")
+
+
+def make_variants(data, source, widths=ASSET_WIDTHS, quality=ASSET_QUALITY):
+    """원본 바이트 → [Variant] (너비 오름차순, 너비마다 webp/jpeg)."""
+    try:
+        with Image.open(io.BytesIO(data)) as original:
+            image = ImageOps.exif_transpose(original)
+            image.load()
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ImageError(f"이미지를 읽을 수 없습니다: {source} ({e})") from e
+
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "P") else "RGB")
+    # JPEG 는 투명도를 지원하지 않으므로 흰 배경에 합성
+    flat = image
+    if image.mode == "RGBA":
+        flat = Image.new("RGB", image.size, (255, 255, 255))
+        flat.paste(image, mask=image.getchannel("A"))
+
+    targets = sorted({w for w in widths if w < image.width} | {min(image.width, max(widths))})
+    stem = stem_for(source)
+    variants = []
+    for width in targets:
+        height = max(1, round(image.height * width / image.width))
+        for fmt in FORMATS:
+            base = image if fmt == "webp" else flat
+            resized = base if width == image.width else base.resize((width, height), Image.LANCZOS)
+            buffer = io.BytesIO()
+            if fmt == "webp":
+                resized.save(buffer, "WEBP", quality=quality, method=6)
+            else:
+                resized.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+            encoded = buffer.getvalue()
+            variants.append(Variant(f"{stem}-{width}w.{content_hash(encoded)}.{EXTENSIONS[fmt]}", width, fmt, encoded))
+    return variants
+
+
+def fetch_image(url, client=None, max_bytes=ASSET_MAX_SOURCE_BYTES, timeout=ASSET_FETCH_TIMEOUT):
+    """원격 이미지를 max_bytes 까지만 내려받습니다."""
+    close = client is None
+    client = client or httpx.Client(timeout=timeout, follow_redirects=True)
+    try:
+        with client.stream("GET", url) as response:
+            response.raise_for_status()
+            content_type = response.headers.get("content-type", "")
+            if content_type and not content_type.startswith("image/"):
+                raise ImageError(f"이미지가 아닙니다: {url} ({content_type})")
+            chunks, size = [], 0
+            for chunk in response.iter_bytes():
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ImageError(f"이미지가 너무 큽니다: {url} (> {max_bytes} bytes)")
+                chunks.append(chunk)
+        return b"".join(chunks)
+    except httpx.HTTPError as e:
+        raise ImageError(f"이미지를 내려받지 못했습니다: {url} ({e})") from e
+    finally:
+        if close:
+            client.close()
+
+
+def variants_for_url(url, client=None):
+    """원격 이미지 URL → [Variant]. 실패하면 ImageError."""
+    return make_variants(fetch_image(url, client), url)
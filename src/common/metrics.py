@@ -0,0 +1,192 @@
+"""auth-app, product-app, worker3 가 함께 쓰는 Prometheus 지표와 요청 단위 구간(span) 측정.
+
+- operation_duration_seconds{operation}: DB 쿼리, 임베딩, Chroma, 템플릿 렌더링, 얼굴 인식, worker3 단계 등
+  span("db.query") / @timed("embedding") 로 잽니다. 예외로 끝나면 operation_errors_total 도 올립니다.
+- http_request_duration_seconds{method, route, status}: FastAPI 앱에 install(app) 하면 기록
+- component_stats{component, field}: register_stats("db_pool", pool.stats) 처럼 기존 stats() 를 등록해 두면
+  /metrics 를 읽을 때마다 숫자 값을 게이지로 내보냅니다 (풀/대기열/캐시 상태).
+- 요청 하나 안에서 잰 구간들은 Server-Timing 응답 헤더로 돌려주고 (브라우저 개발자 도구에서 확인),
+  TRACE_SLOW_MS 보다 느린 요청은 구간별 시간을 한 줄 JSON 으로 출력합니다 (Loki 에서 event="slow_request").
+
+prometheus_client 패키지가 없으면 지표는 수집하지 않고 경고만 출력합니다 (Server-Timing 은 동작).
+"""
+import os
+import json
+import time
+import asyncio
+import functools
+import contextvars
+from contextlib import contextmanager
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))           # 웹 서버가 없는 프로세스(worker3)의 /metrics 포트
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "500"))        # 이보다 느린 요청은 구간별 시간을 로그로 남김
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1") == "1"          # 응답에 Server-Timing 헤더 추가
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+try:
+    import prometheus_client
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:
+    prometheus_client = None
+    if METRICS_ENABLED:
+        print("⚠️ prometheus_client 패키지가 없어 지표를 수집하지 않습니다.")
+
+enabled = METRICS_ENABLED and prometheus_client is not None
+
+if enabled:
+    OPERATION_SECONDS = prometheus_client.Histogram(
+        "operation_duration_seconds", "구간별 처리 시간", ["operation"], buckets=BUCKETS)
+    OPERATION_ERRORS = prometheus_client.Counter(
+        "operation_errors_total", "예외로 끝난 구간 수", ["operation"])
+    REQUEST_SECONDS = prometheus_client.Histogram(
+        "http_request_duration_seconds", "HTTP 요청 처리 시간", ["method", "route", "status"], buckets=BUCKETS)
+
+# 현재 요청에서 잰 (구간, 초) 목록. 요청 밖(백그라운드 작업)에서는 None.
+_trace = contextvars.ContextVar("trace", default=None)
+_stats = {}
+
+
+def observe(operation, seconds, error=False):
+    """이미 잰 시간을 기록합니다 (다른 프로세스에서 잰 시간 등)."""
+    if enabled:
+        OPERATION_SECONDS.labels(operation).observe(seconds)
+        if error:
+            OPERATION_ERRORS.labels(operation).inc()
+    trace = _trace.get()
+    if trace is not None:
+        trace.append((operation, seconds))
+
+
+@contextmanager
+def span(operation):
+    """with 블록의 실행 시간을 operation 이름으로 기록합니다."""
+    started = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        observe(operation, time.perf_counter() - started, error)
+
+
+def timed(operation):
+    """함수(동기/async) 실행 시간을 기록하는 데코레이터."""
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(operation):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(operation):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ---- 게이지 (stats() 등록) ----
+class _StatsCollector:
+    def collect(self):
+        family = GaugeMetricFamily("component_stats", "각 구성 요소 stats() 의 숫자 값", labels=["component", "field"])
+        for component, fn in list(_stats.items()):
+            try:
+                values = fn()
+            except Exception as e:
+                print(f"⚠️ {component} 상태 수집 실패: {e}")
+                continue
+            for field, value in values.items():
+                if isinstance(value, (bool, int, float)):
+                    family.add_metric([component, field], float(value))
+        yield family
+
+
+if enabled:
+    prometheus_client.REGISTRY.register(_StatsCollector())
+
+
+def register_stats(component, fn):
+    """fn() 이 돌려주는 dict 의 숫자 값을 component_stats{component=..., field=...} 로 내보냅니다."""
+    _stats[component] = fn
+
+
+# ---- 요청 단위 추적 ----
+def summarize(trace):
+    """[(구간, 초)] → {구간: (횟수, 합계 ms)} (기록 순서 유지)."""
+    summary = {}
+    for operation, seconds in trace:
+        count, total = summary.get(operation, (0, 0.0))
+        summary[operation] = (count + 1, total + seconds * 1000)
+    return summary
+
+
+def server_timing(trace, total_seconds):
+    parts = [f'{op};dur={ms:.1f};desc="x{count}"' for op, (count, ms) in summarize(trace).items()]
+    parts.append(f"total;dur={total_seconds * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class MetricsMiddleware:
+    """요청 시간 히스토그램 + 요청별 구간 수집 (ASGI 미들웨어)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        trace = []
+        token = _trace.set(trace)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if SERVER_TIMING:
+                    header = server_timing(trace, time.perf_counter() - started).encode("latin-1", "replace")
+                    message = dict(message, headers=list(message.get("headers", [])) + [(b"server-timing", header)])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - started
+            _trace.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "other"  # 경로 템플릿 (/product/{product_id})
+            if enabled:
+                REQUEST_SECONDS.labels(scope["method"], route, str(status)).observe(elapsed)
+            if elapsed * 1000 >= TRACE_SLOW_MS:
+                print(json.dumps({
+                    "event": "slow_request", "method": scope["method"], "route": route, "status": status,
+                    "ms": round(elapsed * 1000, 1),
+                    "spans": {op: {"count": c, "ms": round(ms, 1)} for op, (c, ms) in summarize(trace).items()},
+                }, ensure_ascii=False))
+
+
+async def metrics_endpoint(request):
+    from starlette.responses import Response
+    if not enabled:
+        return Response("metrics disabled\n", status_code=503, media_type="text/plain")
+    return Response(prometheus_client.generate_latest(), media_type=prometheus_client.CONTENT_TYPE_LATEST)
+
+
+def install(app):
+    """FastAPI 앱에 요청 측정 미들웨어와 GET /metrics 를 추가합니다."""
+    app.add_middleware(MetricsMiddleware)
+    app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+
+
+def serve(port=METRICS_PORT):
+    """별도 스레드에서 /metrics HTTP 서버를 띄웁니다 (worker3 용)."""
+    if not enabled:
+        return
+    prometheus_client.start_http_server(port)
+    print(f"📈 지표 서버 시작: :{port}/metrics")
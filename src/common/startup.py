@@ -0,0 +1,151 @@
+"""auth-app 과 product-app 이 함께 쓰는 시작 준비(warm-up)와 헬스 체크.
+
+- lifespan 에서 startup.begin(warm_up) 을 호출하면 준비 작업을 백그라운드로 돌리고 바로 요청을 받습니다.
+  warm_up 안에서 await startup.step("db", pool.open) 처럼 단계마다 시간을 재고 상태를 남깁니다.
+  required 단계는 성공할 때까지 STARTUP_RETRY 초마다 다시 시도하고, 아닌 단계는 실패해도 넘어갑니다.
+- GET /healthz: 프로세스가 살아 있으면 항상 200 (livenessProbe)
+- GET /readyz : 준비가 끝나면 200, 그 전에는 503 + 단계별 상태 (readinessProbe)
+  한 번 준비되면 계속 200 입니다. 이후의 DB/Chroma 장애는 각 요청 경로의 폴백이 처리하고,
+  모든 파드가 한꺼번에 서비스에서 빠지지 않도록 합니다.
+- 콜드 스타트 측정: 프로세스 시작(/proc/self/stat) → 준비 완료, → 첫 응답(프로브/지표 요청 제외) 시간을
+  로그와 component_stats{component="startup"} 로 남깁니다.
+"""
+import os
+import time
+import asyncio
+from starlette.responses import JSONResponse
+from . import metrics
+
+STARTUP_RETRY = float(os.getenv("STARTUP_RETRY", "2"))  # 필수 단계가 실패했을 때 다시 시도하는 간격(초)
+PROBE_PATHS = ("/healthz", "/readyz", "/metrics")     # 첫 응답 측정에서 제외할 경로
+
+_imported_at = time.time()
+
+
+def process_started_at():
+    """프로세스 시작 시각(epoch 초). /proc 을 읽을 수 없으면 이 모듈을 처음 import 한 시각."""
+    try:
+        with open("/proc/self/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        # fields[0] 이 3번째 필드(state), starttime 은 22번째 필드 (부팅 후 clock tick)
+        return time.time() - uptime + int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return _imported_at
+
+
+class Startup:
+    def __init__(self, name):
+        self.name = name
+        self.started_at = process_started_at()
+        self.steps = {}  # 단계 이름 → {"status", "required", "seconds", "attempts", "error"}
+        self.ready_seconds = None           # 프로세스 시작 → 준비 완료
+        self.first_response_seconds = None  # 프로세스 시작 → 첫 응답
+        self._task = None
+
+    @property
+    def ready(self):
+        return self.ready_seconds is not None
+
+    def age(self):
+        return time.time() - self.started_at
+
+    async def step(self, name, fn, required=True, retry=STARTUP_RETRY):
+        """fn (코루틴 함수 또는 일반 함수) 을 실행하고 결과를 돌려줍니다. 선택 단계가 실패하면 None."""
+        info = self.steps[name] = {"status": "running", "required": required, "attempts": 0}
+        started = time.perf_counter()
+        while True:
+            info["attempts"] += 1
+            try:
+                result = fn()
+                if asyncio.iscoroutine(result):
+                    result = await result
+                break
+            except Exception as e:
+                info["error"] = str(e)[:200]
+                if not required:
+                    info.update(status="failed", seconds=round(time.perf_counter() - started, 3))
+                    print(f"⚠️ 시작 준비 '{name}' 실패 (건너뜀): {e}")
+                    return None
+                if info["attempts"] == 1:
+                    print(f"⚠️ 시작 준비 '{name}' 실패, {retry:g}초마다 다시 시도합니다: {e}")
+                await asyncio.sleep(retry)
+        seconds = time.perf_counter() - started
+        info.pop("error", None)
+        info.update(status="ok", seconds=round(seconds, 3))
+        metrics.observe(f"startup.{name}", seconds)
+        return result
+
+    def begin(self, warm_up):
+        """warm_up (인자 없는 코루틴 함수) 을 백그라운드로 실행합니다. 끝나면 준비 완료."""
+        self._task = asyncio.create_task(self._run(warm_up))
+
+    async def _run(self, warm_up):
+        try:
+            await warm_up()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ {self.name} 시작 준비 중단 (/readyz 503 유지): {e}")
+            return
+        self.ready_seconds = round(self.age(), 3)
+        took = ", ".join(f"{name} {info.get('seconds', 0):.2f}s" for name, info in self.steps.items())
+        print(f"✅ {self.name} 준비 완료: 프로세스 시작 후 {self.ready_seconds:.2f}초 ({took})")
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def responded(self, path):
+        if self.first_response_seconds is None and path not in PROBE_PATHS:
+            self.first_response_seconds = round(self.age(), 3)
+            print(f"⏱️ {self.name} 첫 응답: 프로세스 시작 후 {self.first_response_seconds:.2f}초 ({path})")
+
+    def report(self):
+        return {"ready": self.ready, "uptime": round(self.age(), 3), "ready_seconds": self.ready_seconds,
+                "first_response_seconds": self.first_response_seconds, "steps": self.steps}
+
+    def stats(self):
+        stats = {"ready": self.ready, "ready_seconds": self.ready_seconds or 0.0,
+                 "first_response_seconds": self.first_response_seconds or 0.0}
+        for name, info in self.steps.items():
+            stats[f"{name}_seconds"] = info.get("seconds", 0.0)
+        return stats
+
+
+class FirstResponseMiddleware:
+    """첫 응답(프로브 제외) 시각을 Startup 에 알립니다. 이후에는 확인만 하고 그대로 넘깁니다."""
+
+    def __init__(self, app, startup):
+        self.app = app
+        self.startup = startup
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.startup.first_response_seconds is not None:
+            return await self.app(scope, receive, send)
+
+        async def send_first(message):
+            if message["type"] == "http.response.start":
+                self.startup.responded(scope["path"])
+            await send(message)
+
+        await self.app(scope, receive, send_first)
+
+
+def install(app, startup):
+    """GET /healthz, /readyz 와 첫 응답 측정을 추가합니다."""
+    async def healthz(request):
+        return JSONResponse({"status": "ok"})
+
+    async def readyz(request):
+        return JSONResponse(startup.report(), status_code=200 if startup.ready else 503)
+
+    app.add_middleware(FirstResponseMiddleware, startup=startup)
+    app.add_route("/healthz", healthz, include_in_schema=False)
+    app.add_route("/readyz", readyz, include_in_schema=False)
+    metrics.register_stats("startup", startup.stats)
@@ -0,0 +1,230 @@
+"""상품 이미지 변형(썸네일/WebP) 관리와 /assets 서빙.
+
+- 빌드 시: python -m app.assets build
+  app/static/images 의 원본마다 common.images 로 너비별 WebP/JPEG 를 만들어 ASSET_DIR 에 해시 이름으로 쓰고
+  manifest.json ({"/images/a.jpg": [{"name", "width", "format"}, ...]}) 을 남깁니다. (Dockerfile 에서 실행)
+- 수집 시: worker3 가 원격 image_url 의 변형을 product_assets 테이블에 저장합니다.
+  sync_from_db() 가 (데이터 없이) 목록만 읽어 오고, 파일은 처음 요청될 때 DB 에서 꺼내 ASSET_DIR 에 씁니다.
+  기존 상품은 python -m app.assets backfill 로 채웁니다.
+- 서빙: /assets/{해시 이름} 은 내용이 바뀌지 않으므로 Cache-Control immutable.
+  ETag/Last-Modified 조건부 GET(304)과 Range 요청(206)은 StaticFiles/FileResponse 가 처리합니다.
+- 템플릿: image_set(image_url) 이 <picture> 의 WebP/JPEG srcset 을 만들어 줍니다. 변형이 없으면 None (원본 사용).
+"""
+import os
+import json
+import argparse
+from starlette.exceptions import HTTPException
+from starlette.staticfiles import StaticFiles
+from common import images
+
+ASSET_DIR = os.getenv("ASSET_DIR", "app/static/assets")
+ASSET_SOURCE_DIR = os.getenv("ASSET_SOURCE_DIR", "app/static/images")
+ASSET_CACHE_CONTROL = os.getenv("ASSET_CACHE_CONTROL", "public, max-age=31536000, immutable")
+ASSET_URL = "/assets"
+MANIFEST = "manifest.json"
+# 원본 URL 접두어 (같은 파일을 /images 와 /static/images 두 경로로 서빙)
+LOCAL_PREFIXES = ("/images/", "/static/images/")
+
+
+def source_key(url):
+    """image_url → manifest/product_assets 의 source 키. 로컬 원본은 /images/ 경로로 통일합니다."""
+    url = (url or "").strip()
+    for prefix in LOCAL_PREFIXES:
+        if url.startswith(prefix):
+            return "/images/" + url[len(prefix):]
+    return url
+
+
+class ImageSet:
+    __slots__ = ("src", "webp", "jpeg")
+
+    def __init__(self, src, webp, jpeg):
+        self.src = src    # srcset 을 모르는 브라우저용 JPEG
+        self.webp = webp  # "url 120w, url 240w, ..."
+        self.jpeg = jpeg
+
+
+class AssetCatalog:
+    def __init__(self, directory=ASSET_DIR):
+        self.directory = directory
+        self.local = {}   # 빌드 시 만든 변형 (manifest.json)
+        self.remote = {}  # worker3/backfill 이 DB 에 저장한 변형
+        self.materialized = 0
+
+    def load_manifest(self):
+        path = os.path.join(self.directory, MANIFEST)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.local = json.load(f)
+        except FileNotFoundError:
+            print(f"⚠️ {path} 가 없어 원본 이미지를 그대로 사용합니다 (python -m app.assets build).")
+            self.local = {}
+        return len(self.local)
+
+    async def sync_from_db(self, pool):
+        rows = await pool.fetchall("SELECT source, name, width, format FROM product_assets")
+        remote = {}
+        for row in rows:
+            remote.setdefault(row["source"], []).append(
+                {"name": row["name"], "width": row["width"], "format": row["format"]})
+        self.remote = remote
+        return len(remote)
+
+    def variants(self, url):
+        key = source_key(url)
+        return self.local.get(key) or self.remote.get(key) or []
+
+    def image_set(self, url, fallback_width=240):
+        variants = self.variants(url)
+        if not variants:
+            return None
+        by_format = {}
+        for v in sorted(variants, key=lambda v: v["width"]):
+            by_format.setdefault(v["format"], []).append(v)
+        jpeg = by_format.get("jpeg") or []
+        if not jpeg:
+            return None
+        # 화면 크기를 모를 때 쓸 한 장: fallback_width 이상 중 가장 작은 것 (없으면 가장 큰 것)
+        src = next((v for v in jpeg if v["width"] >= fallback_width), jpeg[-1])
+
+        def srcset(items):
+            return ", ".join(f"{ASSET_URL}/{v['name']} {v['width']}w" for v in items)
+
+        return ImageSet(f"{ASSET_URL}/{src['name']}", srcset(by_format.get("webp", [])), srcset(jpeg))
+
+    async def materialize(self, name, pool):
+        """DB 에만 있는 변형을 ASSET_DIR 에 씁니다. 이름이 형식에 맞지 않거나 없으면 False."""
+        if not images.ASSET_NAME.match(name):
+            return False
+        row = await pool.fetchone("SELECT data FROM product_assets WHERE name = %s", (name,))
+        if not row or not images.verify_name(name, row["data"]):
+            return False
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(row["data"])
+        os.replace(tmp, path)  # 동시에 요청돼도 반쯤 쓴 파일을 서빙하지 않도록
+        self.materialized += 1
+        return True
+
+    def stats(self):
+        return {"local": len(self.local), "remote": len(self.remote), "materialized": self.materialized}
+
+
+class AssetFiles(StaticFiles):
+    """해시 이름 파일을 immutable 캐시로 서빙합니다. 로컬에 없으면 DB 에서 꺼내 저장한 뒤 서빙."""
+
+    def __init__(self, catalog, pool):
+        os.makedirs(catalog.directory, exist_ok=True)
+        super().__init__(directory=catalog.directory)
+        self.catalog = catalog
+        self.pool = pool
+
+    async def get_response(self, path, scope):
+        try:
+            return await super().get_response(path, scope)
+        except HTTPException as e:
+            if e.status_code != 404:
+                raise
+            try:
+                found = await self.catalog.materialize(path, self.pool)
+            except Exception as db_error:
+                print(f"⚠️ 이미지 변형 조회 실패: {path} ({db_error})")
+                found = False
+            if not found:
+                raise
+            return await super().get_response(path, scope)
+
+    def file_response(self, full_path, *args, **kwargs):
+        response = super().file_response(full_path, *args, **kwargs)
+        if images.ASSET_NAME.match(os.path.basename(full_path)):  # manifest.json 등은 제외
+            response.headers["Cache-Control"] = ASSET_CACHE_CONTROL
+        return response
+
+
+assets = AssetCatalog()
+
+
+# ---- 빌드 / 백필 ----
+def build(source_dir=ASSET_SOURCE_DIR, directory=ASSET_DIR):
+    """source_dir 의 원본 이미지로 변형과 manifest.json 을 만듭니다."""
+    os.makedirs(directory, exist_ok=True)
+    manifest = {}
+    for filename in sorted(os.listdir(source_dir)):
+        path = os.path.join(source_dir, filename)
+        if not os.path.isfile(path):
+            continue
+        with open(path, "rb") as f:
+            data = f.read()
+        try:
+            variants = images.make_variants(data, filename)
+        except images.ImageError as e:
+            print(f"⚠️ 건너뜀: {e}")
+            continue
+        for variant in variants:
+            target = os.path.join(directory, variant.name)
+            if not os.path.exists(target):
+                with open(target, "wb") as f:
+                    f.write(variant.data)
+        manifest["/images/" + filename] = [v.to_dict() for v in variants]
+        smallest = min((v for v in variants if v.format == "webp"), key=lambda v: v.width)
+        print(f"   {filename}: {len(data) / 1024:.0f}KB → 변형 {len(variants)}개 "
+              f"(최소 {smallest.width}px WebP {len(smallest.data) / 1024:.1f}KB)")
+    with open(os.path.join(directory, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    print(f"✅ 이미지 {len(manifest)}개 변형 생성: {directory}")
+    return manifest
+
+
+def save_variants(cursor, source, variants):
+    cursor.executemany(
+        "INSERT INTO product_assets (name, source, width, format, content_type, data) "
+        "VALUES (%s, %s, %s, %s, %s, %s) ON DUPLICATE KEY UPDATE name = name",
+        [(v.name, source, v.width, v.format, v.content_type, v.data) for v in variants]
+    )
+
+
+def backfill(limit=None):
+    """product_assets 에 변형이 없는 원격 image_url 을 내려받아 저장합니다 (worker3 이전에 들어온 상품용)."""
+    from .database import get_db
+    import httpx
+    done = failed = 0
+    with get_db() as conn, httpx.Client(timeout=images.ASSET_FETCH_TIMEOUT, follow_redirects=True) as client:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT DISTINCT p.image_url FROM products p LEFT JOIN product_assets a ON a.source = p.image_url "
+            "WHERE a.name IS NULL AND (p.image_url LIKE 'http://%' OR p.image_url LIKE 'https://%')"
+            + (" LIMIT %d" % limit if limit else "")
+        )
+        for row in cursor.fetchall():
+            url = row["image_url"]
+            try:
+                save_variants(cursor, url, images.variants_for_url(url, client))
+                done += 1
+            except images.ImageError as e:
+                print(f"⚠️ {e}")
+                failed += 1
+        if done:
+            cursor.execute("UPDATE cache_versions SET version = version + 1 WHERE name = 'products'")
+    print(f"✅ 이미지 백필 완료: {done}개 (실패 {failed})")
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_parser = sub.add_parser("build", help="static/images 원본의 변형 + manifest.json 생성")
+    build_parser.add_argument("--source", default=ASSET_SOURCE_DIR)
+    build_parser.add_argument("--out", default=ASSET_DIR)
+    backfill_parser = sub.add_parser("backfill", help="원격 image_url 의 변형을 product_assets 에 저장")
+    backfill_parser.add_argument("--limit", type=int)
+    args = parser.parse_args()
+    if args.command == "build":
+        build(args.source, args.out)
+    else:
+        backfill(args.limit)
+
+
+if __name__ == "__main__":
+    main()
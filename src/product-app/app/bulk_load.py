@@ -0,0 +1,328 @@
+"""상품 대량 적재 도구 (create_db.py 대체).
+
+    cd src/product-app
+    python -m app.bulk_load app/products.json                        # MariaDB (DB_* 환경 변수)
+    python -m app.bulk_load products.ndjson --target sqlite --sqlite-path ./db/products.db
+    python -m app.bulk_load products.csv --mode load-data --chunk-size 20000
+    python -m app.bulk_load products.ndjson --embed                  # 같은 흐름에서 ChromaDB 까지 반영
+
+- JSON 배열 / NDJSON / CSV 를 조금씩 읽으므로 파일 크기와 관계없이 메모리는 chunk 크기만큼만 씁니다.
+- chunk 단위로 executemany(여러 행 INSERT) 또는 LOAD DATA LOCAL INFILE 로 적재하고 chunk 마다 커밋합니다.
+- 상품명(name, UNIQUE)이 같으면 나머지 컬럼을 갱신합니다 (id 는 유지).
+"""
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+COLUMNS = ("name", "category", "price", "description", "stock", "image_url")
+READ_SIZE = 1 << 16
+
+UPSERT_MARIADB = (
+    f"INSERT INTO products ({', '.join(COLUMNS)}) VALUES ({', '.join(['%s'] * len(COLUMNS))})"
+    " ON DUPLICATE KEY UPDATE category = VALUES(category), price = VALUES(price),"
+    " description = VALUES(description), stock = VALUES(stock), image_url = VALUES(image_url)"
+)
+UPSERT_SQLITE = (
+    f"INSERT INTO products ({', '.join(COLUMNS)}) VALUES ({', '.join(['?'] * len(COLUMNS))})"
+    " ON CONFLICT(name) DO UPDATE SET category = excluded.category, price = excluded.price,"
+    " description = excluded.description, stock = excluded.stock, image_url = excluded.image_url"
+)
+
+
+# ---- 입력 읽기 ----
+def iter_json_array(f):
+    """JSON 배열 파일에서 원소를 하나씩 꺼냅니다. 파일 전체를 읽지 않습니다."""
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    started = False
+    eof = False
+    while True:
+        # 공백, 배열 시작/구분 기호 건너뛰기
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if not started and pos < len(buf):
+                if buf[pos] != "[":
+                    raise ValueError("JSON 배열 형식이 아닙니다.")
+                started = True
+                pos += 1
+                continue
+            if pos < len(buf) or eof:
+                break
+            chunk = f.read(READ_SIZE)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+        if pos >= len(buf) or buf[pos] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = f.read(READ_SIZE)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+        yield item
+        pos = end
+        if pos > READ_SIZE:
+            buf, pos = buf[pos:], 0
+
+
+def iter_ndjson(f):
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def iter_csv(f):
+    yield from csv.DictReader(f)
+
+
+READERS = {"json": iter_json_array, "ndjson": iter_ndjson, "csv": iter_csv}
+
+
+def detect_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".ndjson", ".jsonl"):
+        return "ndjson"
+    if ext == ".csv":
+        return "csv"
+    return "json"
+
+
+def to_row(item):
+    """입력 레코드 하나를 INSERT 값 튜플로. 상품명이 없으면 None."""
+    name = (item.get("name") or "").strip()
+    if not name:
+        return None
+    return (
+        name,
+        item.get("category") or "미분류",
+        int(float(item.get("price") or 0)),
+        item.get("description") or "",
+        int(float(item.get("stock") or 0)),
+        item.get("image_url") or "",
+    )
+
+
+def read_chunks(path, fmt=None, chunk_size=5000):
+    """입력 파일을 chunk_size 행씩 (행 목록, 건너뛴 수) 로 내보냅니다."""
+    reader = READERS[fmt or detect_format(path)]
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        chunk, skipped = [], 0
+        for item in reader(f):
+            row = to_row(item)
+            if row is None:
+                skipped += 1
+                continue
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk, skipped
+                chunk, skipped = [], 0
+        if chunk or skipped:
+            yield chunk, skipped
+
+
+# ---- 쓰기 ----
+class MariaDBWriter:
+    def __init__(self, mode="executemany"):
+        import pymysql
+        from .database import DB_HOST, DB_USER, DB_PASSWORD, DB_NAME
+        self.mode = mode
+        self.conn = pymysql.connect(host=DB_HOST, user=DB_USER, password=DB_PASSWORD, db=DB_NAME,
+                                    charset="utf8mb4", autocommit=False,
+                                    local_infile=(mode == "load-data"))
+        if mode == "load-data":
+            with self.conn.cursor() as cursor:
+                # 인덱스 없는 임시 테이블에 빠르게 올린 뒤 이름 기준으로 products 에 합칩니다.
+                cursor.execute(
+                    "CREATE TEMPORARY TABLE IF NOT EXISTS products_load ("
+                    " name VARCHAR(255), category VARCHAR(100), price INT, description TEXT,"
+                    " stock INT, image_url VARCHAR(255))"
+                )
+
+    def write(self, rows):
+        with self.conn.cursor() as cursor:
+            if self.mode == "load-data":
+                self._load_data(cursor, rows)
+            else:
+                # pymysql 은 INSERT ... VALUES 의 executemany 를 여러 행 INSERT 로 묶어 보냅니다.
+                cursor.executemany(UPSERT_MARIADB, rows)
+        self.conn.commit()
+
+    def _load_data(self, cursor, rows):
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".tsv", delete=False) as f:
+            for row in rows:
+                f.write("\t".join(_escape_tsv(v) for v in row) + "\n")
+            path = f.name
+        try:
+            cursor.execute("TRUNCATE TABLE products_load")
+            cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE products_load CHARACTER SET utf8mb4"
+                f" FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n'"
+                f" ({', '.join(COLUMNS)})",
+                (path,)
+            )
+            cursor.execute(
+                f"INSERT INTO products ({', '.join(COLUMNS)}) SELECT {', '.join(COLUMNS)} FROM products_load"
+                " ON DUPLICATE KEY UPDATE category = VALUES(category), price = VALUES(price),"
+                " description = VALUES(description), stock = VALUES(stock), image_url = VALUES(image_url)"
+            )
+        finally:
+            os.unlink(path)
+
+    def ids_for(self, names):
+        placeholders = ", ".join(["%s"] * len(names))
+        with self.conn.cursor() as cursor:
+            cursor.execute(f"SELECT id, name, category, description FROM products WHERE name IN ({placeholders})",
+                           names)
+            return [dict(zip(("id", "name", "category", "description"), r)) for r in cursor.fetchall()]
+
+    def finish(self):
+        # product-app 페이지 캐시 무효화
+        with self.conn.cursor() as cursor:
+            try:
+                cursor.execute("INSERT INTO cache_versions (name, version) VALUES ('products', 1) "
+                               "ON DUPLICATE KEY UPDATE version = version + 1")
+            except Exception as e:
+                print(f"⚠️ cache_versions 갱신 실패 (python -m app.migrations 필요): {e}")
+        self.conn.commit()
+        self.conn.close()
+
+
+def _escape_tsv(value):
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+class SQLiteWriter:
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            category TEXT NOT NULL,
+            price INTEGER NOT NULL,
+            description TEXT,
+            stock INTEGER DEFAULT 0,
+            image_url TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS uq_products_name ON products (name)")
+
+    def write(self, rows):
+        with self.conn:
+            self.conn.executemany(UPSERT_SQLITE, rows)
+
+    def ids_for(self, names):
+        placeholders = ", ".join(["?"] * len(names))
+        cursor = self.conn.execute(
+            f"SELECT id, name, category, description FROM products WHERE name IN ({placeholders})", names)
+        return [dict(zip(("id", "name", "category", "description"), r)) for r in cursor.fetchall()]
+
+    def finish(self):
+        self.conn.close()
+
+
+# ---- 임베딩 ----
+class ChromaEmitter:
+    """적재한 chunk 를 임베딩해서 ChromaDB 에 upsert 합니다. 다음 chunk 적재와 겹쳐서 실행됩니다."""
+
+    def __init__(self):
+        from common import clients
+        from common.embedding import create_embedding_service
+        self.embeddings = create_embedding_service(clients.get_openai())
+        self.collection = clients.get_collection()
+        self._pool = ThreadPoolExecutor(max_workers=1)
+        self._pending = None
+        self.count = 0
+
+    def _emit(self, products):
+        texts = [f"{p['name']} {p['category']} {p['description']}" for p in products]
+        now = time.time()
+        self.collection.upsert(
+            ids=[str(p["id"]) for p in products],
+            embeddings=self.embeddings.embed_many(texts),
+            metadatas=[{"name": p["name"], "category": p["category"], "description": p["description"],
+                        "updated_at": now} for p in products],
+            documents=texts
+        )
+        self.count += len(products)
+
+    def submit(self, products):
+        self.wait()  # 한 chunk 만 앞서 나가도록
+        self._pending = self._pool.submit(self._emit, products)
+
+    def wait(self):
+        if self._pending is not None:
+            self._pending.result()
+            self._pending = None
+
+    def close(self):
+        self.wait()
+        self._pool.shutdown()
+        self.embeddings.close()
+
+
+def load(path, target="mariadb", fmt=None, chunk_size=5000, mode="executemany",
+         sqlite_path="./db/products.db", embed=False, writer=None, emitter=None, quiet=False):
+    """파일을 적재하고 {"rows", "skipped", "seconds", "rows_per_sec"} 를 반환합니다."""
+    if writer is None:
+        writer = SQLiteWriter(sqlite_path) if target == "sqlite" else MariaDBWriter(mode)
+    if embed and emitter is None:
+        emitter = ChromaEmitter()
+
+    started = time.monotonic()
+    total = skipped_total = 0
+    try:
+        for rows, skipped in read_chunks(path, fmt, chunk_size):
+            skipped_total += skipped
+            if not rows:
+                continue
+            writer.write(rows)
+            total += len(rows)
+            if emitter is not None:
+                emitter.submit(writer.ids_for([r[0] for r in rows]))
+            if not quiet:
+                elapsed = time.monotonic() - started
+                print(f"   {total:>10}행  {total / elapsed:10.0f}행/초")
+        if emitter is not None:
+            emitter.close()
+    finally:
+        writer.finish()
+
+    elapsed = time.monotonic() - started
+    result = {"rows": total, "skipped": skipped_total, "seconds": round(elapsed, 2),
+              "rows_per_sec": round(total / elapsed) if elapsed else 0}
+    if not quiet:
+        print(f"✅ 적재 완료: {total}행 (건너뜀 {skipped_total}), {elapsed:.1f}초, {result['rows_per_sec']}행/초")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="JSON 배열 / NDJSON(.ndjson, .jsonl) / CSV 파일")
+    parser.add_argument("--format", choices=sorted(READERS), help="확장자로 알 수 없을 때 지정")
+    parser.add_argument("--target", choices=["mariadb", "sqlite"], default="mariadb")
+    parser.add_argument("--sqlite-path", default="./db/products.db")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--mode", choices=["executemany", "load-data"], default="executemany",
+                        help="MariaDB 적재 방식 (load-data 는 서버의 local_infile 이 켜져 있어야 함)")
+    parser.add_argument("--embed", action="store_true", help="적재한 상품을 임베딩해서 ChromaDB 에도 저장")
+    args = parser.parse_args()
+    load(args.path, args.target, args.format, args.chunk_size, args.mode, args.sqlite_path, args.embed)
+
+
+if __name__ == "__main__":
+    main()
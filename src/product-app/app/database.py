@@ -1,6 +1,11 @@
 import pymysql  # sqlite3 대신 pymysql 사용
 import os
-from contextlib import contextmanager
+import time
+import asyncio
+import threading
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+from common import metrics
 
 # 환경 변수에서 접속 정보를 가져옵니다 (deploy.sh에서 넣어줄 정보)
 DB_HOST = os.getenv("DB_HOST", "mariadb")
@@ -8,18 +13,271 @@ DB_USER = os.getenv("DB_USER", "root")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "1234")
 DB_NAME = os.getenv("DB_NAME", "shop")
 
-@contextmanager
-def get_db():
-    # MariaDB에 접속
-    conn = pymysql.connect(
+# 커넥션 풀 설정
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "2"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))        # 커넥션 대기 최대 시간(초)
+DB_POOL_RECYCLE = float(os.getenv("DB_POOL_RECYCLE", "3600"))     # 이 시간이 지난 커넥션은 새로 연결(초)
+DB_POOL_PING_AFTER = float(os.getenv("DB_POOL_PING_AFTER", "30"))  # 이 시간 이상 놀던 커넥션은 ping 후 재사용(초)
+
+
+def connect():
+    """MariaDB 커넥션을 하나 새로 엽니다."""
+    return pymysql.connect(
         host=DB_HOST,
         user=DB_USER,
         password=DB_PASSWORD,
         db=DB_NAME,
         charset='utf8mb4',
+        autocommit=True,  # 풀에서 재사용해도 오래된 스냅샷을 보지 않도록
         cursorclass=pymysql.cursors.DictCursor  # sqlite3.Row와 비슷한 역할
     )
+
+
+@contextmanager
+def get_db():
+    # MariaDB에 접속 (스크립트/배치용 동기 커넥션)
+    conn = connect()
     try:
         yield conn
     finally:
-        conn.close()
\ No newline at end of file
+        conn.close()
+
+
+class PoolTimeout(Exception):
+    """풀에서 제한 시간 안에 커넥션을 얻지 못했을 때 발생합니다."""
+
+
+class _PooledConnection:
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self._lock = threading.Lock()
+        self._busy = False       # 스레드에서 이 커넥션을 쓰는 중
+        self._abandoned = False  # 취소된 요청이 버린 커넥션 (쓰던 스레드가 끝나면 닫음)
+
+    async def run(self, fn, *args):
+        """이 커넥션을 쓰는 블로킹 호출 fn(*args) 를 스레드에서 실행합니다."""
+        return await asyncio.to_thread(self._call, fn, *args)
+
+    def _call(self, fn, *args):
+        with self._lock:
+            if self._abandoned:
+                raise RuntimeError("이미 버려진 커넥션입니다.")
+            self._busy = True
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._busy = False
+                close = self._abandoned
+            if close:
+                _close_quietly(self.conn)
+
+    def abandon(self):
+        """버린 커넥션으로 표시합니다. 스레드가 쓰는 중이면 그 스레드가 끝날 때 닫고 False,
+        아무도 쓰지 않아 지금 닫아도 되면 True."""
+        with self._lock:
+            self._abandoned = True
+            return not self._busy
+
+
+class AsyncConnectionPool:
+    """pymysql 커넥션을 재사용하는 비동기 풀.
+
+    블로킹 I/O(접속, 쿼리, ping)는 모두 스레드에서 실행되므로 이벤트 루프를 막지 않습니다.
+    """
+
+    def __init__(self, connect_fn=connect, min_size=DB_POOL_MIN, max_size=DB_POOL_MAX,
+                 acquire_timeout=DB_POOL_TIMEOUT, recycle=DB_POOL_RECYCLE, ping_after=DB_POOL_PING_AFTER):
+        if min_size > max_size:
+            raise ValueError("min_size는 max_size보다 클 수 없습니다.")
+        self._connect = connect_fn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+
+        self._idle = deque()
+        self._slots = None
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+
+        # 누적 통계
+        self._created = 0
+        self._discarded = 0
+        self._acquired = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+
+    @property
+    def size(self):
+        return len(self._idle) + self._in_use
+
+    async def open(self):
+        """min_size 만큼 커넥션을 미리 열어둡니다."""
+        self._closed = False
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_size)
+        missing = self.min_size - self.size
+        if missing > 0:
+            conns = await asyncio.gather(*[self._new_connection() for _ in range(missing)])
+            self._idle.extend(conns)
+
+    async def close(self):
+        """놀고 있는 커넥션을 모두 닫습니다. 사용 중인 커넥션은 반납 시 닫힙니다."""
+        self._closed = True
+        while self._idle:
+            await self._discard(self._idle.popleft())
+
+    async def _new_connection(self):
+        conn = await asyncio.to_thread(self._connect)
+        self._created += 1
+        return _PooledConnection(conn)
+
+    async def _discard(self, pooled):
+        self._discarded += 1
+        await asyncio.to_thread(_close_quietly, pooled.conn)
+
+    async def _is_healthy(self, pooled):
+        if not getattr(pooled.conn, "open", True):
+            return False
+        now = time.monotonic()
+        if now - pooled.created_at > self.recycle:
+            return False
+        if now - pooled.last_used > self.ping_after:
+            try:
+                await asyncio.to_thread(pooled.conn.ping, False)
+            except Exception:
+                return False
+        return True
+
+    async def _checkout(self):
+        while self._idle:
+            pooled = self._idle.pop()  # 가장 최근에 쓴 커넥션부터 (LIFO)
+            if await self._is_healthy(pooled):
+                return pooled
+            await self._discard(pooled)
+        return await self._new_connection()
+
+    @asynccontextmanager
+    async def acquire(self):
+        """커넥션(_PooledConnection)을 빌려오고, 블록이 끝나면 풀에 반납합니다.
+
+        커넥션을 쓰는 블로킹 호출은 pooled.run() 으로 실행해야 취소됐을 때 안전하게 닫힙니다.
+        """
+        if self._closed:
+            raise RuntimeError("커넥션 풀이 닫혀 있습니다.")
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_size)
+
+        started = time.monotonic()
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            raise PoolTimeout(f"{self.acquire_timeout}초 안에 DB 커넥션을 얻지 못했습니다.")
+        finally:
+            self._waiting -= 1
+
+        self._in_use += 1
+        try:
+            pooled = await self._checkout()
+        except BaseException:
+            self._in_use -= 1
+            self._slots.release()
+            raise
+        self._acquired += 1
+        self._wait_total += time.monotonic() - started
+        metrics.observe("db.pool_wait", time.monotonic() - started)
+
+        broken = abandoned = False
+        try:
+            yield pooled
+        except asyncio.CancelledError:
+            # 취소(타임아웃, 클라이언트 끊김)돼도 스레드의 쿼리는 계속 이 커넥션을 쓰고 있을 수 있습니다.
+            # 다른 요청에 빌려주지 않고, 쓰는 중인 스레드가 끝난 뒤에 닫습니다.
+            abandoned = True
+            raise
+        except BaseException:
+            # 끊긴 커넥션, 중간에 멈춘 쿼리/스트림 등 상태를 알 수 없는 커넥션은 풀에 되돌리지 않습니다.
+            broken = True
+            raise
+        finally:
+            self._in_use -= 1
+            pooled.last_used = time.monotonic()
+            if abandoned:
+                self._discarded += 1
+                # 쓰는 중인 스레드가 있으면 그 스레드가 끝나면서 닫고, 없으면 취소가 늦어지지 않게 기다리지 않고 닫습니다.
+                if pooled.abandon():
+                    asyncio.get_running_loop().run_in_executor(None, _close_quietly, pooled.conn)
+            elif broken or self._closed:
+                await self._discard(pooled)
+            else:
+                self._idle.append(pooled)
+            self._slots.release()
+
+    async def fetchall(self, query, params=None):
+        async with self.acquire() as pooled:
+            with metrics.span("db.query"):
+                return await pooled.run(_run, pooled.conn, query, params, True)
+
+    async def fetchone(self, query, params=None):
+        async with self.acquire() as pooled:
+            with metrics.span("db.query"):
+                return await pooled.run(_run, pooled.conn, query, params, False)
+
+    async def stream(self, query, params=None, batch_size=500):
+        """서버 측 커서(SSDictCursor)로 결과를 batch_size 행씩 읽어 한 행씩 내보냅니다.
+
+        전체 결과를 메모리에 올리지 않습니다. 중간에 소비가 끊기면 남은 결과를
+        읽어 버리는 대신 acquire() 가 커넥션을 풀에서 제외합니다.
+        """
+        async with self.acquire() as pooled:
+            cursor = await pooled.run(pooled.conn.cursor, pymysql.cursors.SSDictCursor)
+            with metrics.span("db.stream_execute"):
+                await pooled.run(cursor.execute, query, params)
+            while True:
+                rows = await pooled.run(cursor.fetchmany, batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+            await pooled.run(cursor.close)
+
+    def stats(self):
+        """풀 상태와 누적 통계를 dict로 반환합니다."""
+        return {
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "size": self.size,
+            "idle": len(self._idle),
+            "in_use": self._in_use,
+            "waiting": self._waiting,
+            "created": self._created,
+            "discarded": self._discarded,
+            "acquired": self._acquired,
+            "timeouts": self._timeouts,
+            "avg_wait_ms": round(self._wait_total / self._acquired * 1000, 3) if self._acquired else 0.0,
+        }
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+def _run(conn, query, params, many):
+    with conn.cursor() as cursor:
+        cursor.execute(query, params)
+        return cursor.fetchall() if many else cursor.fetchone()
+
+
+# 앱 전체에서 공유하는 풀 (main.py의 lifespan에서 open/close)
+pool = AsyncConnectionPool()
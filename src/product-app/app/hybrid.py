@@ -0,0 +1,163 @@
+"""하이브리드 상품 검색 (벡터 유사도 + 문자열 일치).
+
+- 벡터 검색(로컬 인덱스 또는 ChromaDB)과 문자열 검색(TextIndex.rank 또는 DB)을 동시에 실행합니다.
+- 두 순위를 Reciprocal Rank Fusion 으로 합칩니다: score = Σ weight / (HYBRID_RRF_K + 순위)
+  단, 검색어의 모든 단어를 상품명에 포함하는 상품(모델 번호 검색 등)은 RRF 순서를 유지한 채 앞으로 올립니다.
+- 이름/카테고리/가격/재고 필터를 적용하고, 합친 순서를 그대로 유지합니다.
+- 검색어+필터별로 필터링까지 끝난 후보 목록을 캐시해서 다음 페이지는 다시 검색하지 않고 잘라서 줍니다.
+  상품이 바뀌면 (cache_versions) clear() 로 비웁니다.
+
+한쪽 검색이 실패해도 (ChromaDB 장애, 임베딩 실패 등) 나머지 결과만으로 순위를 만듭니다.
+"""
+import os
+import asyncio
+from common.embedding import LRUTTLCache, normalize_text
+
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "100"))        # 검색 방식별로 가져올 후보 수
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))                    # RRF 상수 (클수록 하위 순위도 고르게 반영)
+HYBRID_VECTOR_WEIGHT = float(os.getenv("HYBRID_VECTOR_WEIGHT", "1.0"))
+HYBRID_LEXICAL_WEIGHT = float(os.getenv("HYBRID_LEXICAL_WEIGHT", "1.0"))
+HYBRID_EXACT_BOOST = os.getenv("HYBRID_EXACT_BOOST", "1") == "1"       # 모든 단어가 상품명에 있으면 앞으로
+HYBRID_PAGE_SIZE = int(os.getenv("HYBRID_PAGE_SIZE", "20"))
+HYBRID_CACHE_SIZE = int(os.getenv("HYBRID_CACHE_SIZE", "512"))         # 캐시할 검색(검색어+필터) 수
+HYBRID_CACHE_TTL = float(os.getenv("HYBRID_CACHE_TTL", "60"))          # 후보 목록 캐시 유지 시간(초)
+
+
+def rrf_fuse(rankings, weights=None, k=HYBRID_RRF_K):
+    """{출처: [id, ...](좋은 순)} 를 합쳐 [(id, score), ...] 를 점수 순으로 반환합니다.
+
+    점수가 같으면 어느 한쪽에서라도 더 높은 순위였던 id 가 앞에 옵니다.
+    """
+    weights = weights or {}
+    scores = {}
+    best_rank = {}
+    for source, ids in rankings.items():
+        weight = weights.get(source, 1.0)
+        for rank, pid in enumerate(ids, start=1):
+            scores[pid] = scores.get(pid, 0.0) + weight / (k + rank)
+            best_rank[pid] = min(best_rank.get(pid, rank), rank)
+    return sorted(scores.items(), key=lambda item: (-item[1], best_rank[item[0]]))
+
+
+def promote_exact(query, ranked):
+    """[(행, score)] 중 검색어의 모든 단어를 상품명에 포함하는 항목을 (순서 유지) 앞으로 옮깁니다."""
+    words = [normalize_text(w.strip('"*')) for w in query.split()]
+    words = [w for w in words if w]
+    if not words:
+        return ranked
+    exact, rest = [], []
+    for item in ranked:
+        name = normalize_text(item[0].get("name"))
+        (exact if all(w in name for w in words) else rest).append(item)
+    return exact + rest
+
+
+def matches(row, name=None, category=None, min_price=None, max_price=None, in_stock=False):
+    """필터 조건에 맞는지. name 은 부분 일치, category 는 대소문자/공백 무시 정확히 일치."""
+    if name and normalize_text(name) not in normalize_text(row.get("name")):
+        return False
+    if category and normalize_text(category) != normalize_text(row.get("category")):
+        return False
+    price = row.get("price") or 0
+    if min_price is not None and price < min_price:
+        return False
+    if max_price is not None and price > max_price:
+        return False
+    if in_stock and (row.get("stock") or 0) <= 0:
+        return False
+    return True
+
+
+def _product_id(pid):
+    # ChromaDB id 는 문자열, DB/TextIndex id 는 정수
+    try:
+        return int(pid)
+    except (TypeError, ValueError):
+        return None
+
+
+class SearchPage:
+    __slots__ = ("items", "total", "page", "size", "sources")
+
+    def __init__(self, items, total, page, size, sources):
+        self.items = items      # [(행, score)], 순위 순
+        self.total = total      # 필터를 통과한 전체 후보 수
+        self.page = page
+        self.size = size
+        self.sources = sources  # {출처: 후보 수 또는 에러 메시지}
+
+    @property
+    def rows(self):
+        return [row for row, _ in self.items]
+
+    @property
+    def has_next(self):
+        return self.page * self.size < self.total
+
+
+class HybridSearch:
+    """vector_search(query, k, category) / lexical_search(query, k) 는 id 목록(좋은 순)을,
+    fetch_rows(ids) 는 {id: 행} 을 돌려주는 코루틴 함수입니다.
+    """
+
+    def __init__(self, vector_search, lexical_search, fetch_rows, candidates=HYBRID_CANDIDATES,
+                 weights=None, rrf_k=HYBRID_RRF_K, exact_boost=HYBRID_EXACT_BOOST, cache=None):
+        self.sources = {"vector": vector_search, "lexical": lexical_search}
+        self.fetch_rows = fetch_rows
+        self.candidates = candidates
+        self.weights = weights or {"vector": HYBRID_VECTOR_WEIGHT, "lexical": HYBRID_LEXICAL_WEIGHT}
+        self.rrf_k = rrf_k
+        self.exact_boost = exact_boost
+        self.cache = cache if cache is not None else LRUTTLCache(HYBRID_CACHE_SIZE, HYBRID_CACHE_TTL)
+        self.hits = 0
+        self.misses = 0
+
+    async def _retrieve(self, source, query, category):
+        if source == "vector":
+            return await self.sources[source](query, self.candidates, category)
+        return await self.sources[source](query, self.candidates)
+
+    async def ranked(self, query, **filters):
+        """필터를 통과한 (행, score) 전체 후보 목록과 출처별 결과. 같은 검색은 캐시에서 꺼냅니다."""
+        key = (normalize_text(query),) + tuple(sorted(filters.items()))
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+
+        names = list(self.sources)
+        results = await asyncio.gather(*(self._retrieve(s, query, filters.get("category")) for s in names),
+                                       return_exceptions=True)
+        rankings, sources = {}, {}
+        for source, result in zip(names, results):
+            if isinstance(result, Exception):
+                print(f"⚠️ {source} 검색 실패 (나머지 결과만 사용): {result}")
+                sources[source] = f"error: {result}"
+                continue
+            ids = [pid for pid in map(_product_id, result) if pid is not None]
+            rankings[source] = ids
+            sources[source] = len(ids)
+        if not rankings:
+            raise results[0]
+
+        fused = rrf_fuse(rankings, self.weights, self.rrf_k)
+        rows = await self.fetch_rows([pid for pid, _ in fused]) if fused else {}
+        ranked = [(rows[pid], score) for pid, score in fused
+                  if pid in rows and matches(rows[pid], **filters)]
+        if self.exact_boost:
+            ranked = promote_exact(query, ranked)
+        entry = (ranked, sources)
+        self.cache.set(key, entry)
+        return entry
+
+    async def search(self, query, page=1, size=HYBRID_PAGE_SIZE, **filters):
+        ranked, sources = await self.ranked(query, **filters)
+        start = (page - 1) * size
+        return SearchPage(ranked[start:start + size], len(ranked), page, size, sources)
+
+    def clear(self):
+        self.cache.clear()
+
+    def stats(self):
+        return {"cached": len(self.cache), "hits": self.hits, "misses": self.misses}
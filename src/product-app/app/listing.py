@@ -0,0 +1,89 @@
+"""상품 목록 페이지네이션 (keyset cursor) 과 컬럼 projection.
+
+OFFSET 대신 마지막으로 본 행의 (정렬값, id) 를 커서로 넘겨서
+몇 번째 페이지든 인덱스 범위 조회 한 번으로 읽습니다.
+"""
+import json
+import base64
+import binascii
+
+# 목록 화면에 필요한 컬럼만 조회합니다 (긴 description 제외)
+LISTING_COLUMNS = "id, name, category, price, stock, image_url"
+API_COLUMNS = ("id", "name", "category", "price", "stock", "image_url", "description", "created_at")
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+# 정렬 이름 → (정렬 컬럼, 내림차순 여부). id 는 항상 보조 정렬 키로 붙습니다.
+SORTS = {
+    "id": (None, False),
+    "newest": (None, True),
+    "price_asc": ("price", False),
+    "price_desc": ("price", True),
+}
+
+
+class InvalidCursor(ValueError):
+    """디코딩할 수 없거나 정렬 방식과 맞지 않는 커서."""
+
+
+def encode_cursor(sort, row):
+    column, _ = SORTS[sort]
+    key = [row[column], row["id"]] if column else [row["id"]]
+    raw = json.dumps([sort] + key, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(sort, cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise InvalidCursor("잘못된 커서입니다.")
+    column, _ = SORTS[sort]
+    expected = 3 if column else 2
+    if not isinstance(values, list) or len(values) != expected or values[0] != sort:
+        raise InvalidCursor("정렬 방식과 맞지 않는 커서입니다.")
+    return values[1:]
+
+
+def check_sort(sort):
+    if sort not in SORTS:
+        raise InvalidCursor(f"지원하지 않는 정렬입니다: {sort} (가능: {', '.join(SORTS)})")
+    return sort
+
+
+def listing_query(where, params, sort="id", cursor=None, limit=None, columns=LISTING_COLUMNS):
+    """WHERE 절에 keyset 조건과 ORDER BY / LIMIT 을 붙인 (sql, params) 를 만듭니다.
+
+    limit 이 있으면 다음 페이지 존재 여부를 알기 위해 limit + 1 행을 읽습니다.
+    """
+    column, desc = SORTS[check_sort(sort)]
+    params = list(params)
+    op = "<" if desc else ">"
+    direction = "DESC" if desc else "ASC"
+
+    if cursor:
+        key = decode_cursor(sort, cursor)
+        if column:
+            where += f" AND ({column} {op} %s OR ({column} = %s AND id {op} %s))"
+            params.extend([key[0], key[0], key[1]])
+        else:
+            where += f" AND id {op} %s"
+            params.append(key[0])
+
+    order = f"{column} {direction}, id {direction}" if column else f"id {direction}"
+    sql = f"SELECT {columns} FROM products WHERE {where} ORDER BY {order}"
+    if limit:
+        sql += " LIMIT %s"
+        params.append(limit + 1)
+    return sql, params
+
+
+def make_page(rows, sort, limit):
+    """limit + 1 로 읽은 행에서 (이번 페이지 행, 다음 커서) 를 만듭니다."""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(sort, rows[-1])
+    return rows, None
+
@@ -1,102 +1,315 @@
 from fastapi import FastAPI, Request, Query, HTTPException
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
-from .database import get_db
-import chromadb
-import os
-from openai import OpenAI
+from fastapi.responses import JSONResponse, StreamingResponse
+from contextlib import asynccontextmanager
+from .database import pool
+from .vector_index import vector_index, VECTOR_INDEX_ENABLED, VECTOR_INDEX_REFRESH
+from .text_index import text_index, TEXT_INDEX_ENABLED, TEXT_INDEX_REFRESH, TEXT_INDEX_FULL_RELOAD
+from .search import build_product_filter, match_clause, relevance_clause
+from .hybrid import HybridSearch, HYBRID_PAGE_SIZE
+from .page_cache import cached_page, watch_versions, page_cache, PAGE_CACHE_ENABLED
+from .assets import assets, AssetFiles
+from .listing import (listing_query, make_page, check_sort, InvalidCursor,
+                      LISTING_COLUMNS, API_COLUMNS, DEFAULT_LIMIT, MAX_LIMIT)
+from common.embedding import create_embedding_service
+from common import clients, metrics, startup
+import json
+import asyncio
 
-app = FastAPI()
+def sync_vector_index():
+    collection = clients.get_collection()
+    return clients.chroma_call(vector_index.sync_from_chroma, collection)
+
+async def load_vector_index():
+    count = await asyncio.to_thread(sync_vector_index)
+    print(f"벡터 인덱스 동기화 완료: {count}개")
+    return count
+
+async def refresh_vector_index():
+    """ChromaDB 내용을 주기적으로 프로세스 내 벡터 인덱스에 반영합니다 (첫 동기화는 warm_up 에서)."""
+    while True:
+        await asyncio.sleep(VECTOR_INDEX_REFRESH)
+        try:
+            await load_vector_index()
+        except Exception as e:
+            print(f"벡터 인덱스 동기화 실패 (원격 검색 사용): {e}")
+
+async def load_text_index():
+    count = await text_index.sync_from_db(pool, full=True)
+    print(f"텍스트 인덱스 적재 완료: {count}개")
+    return count
+
+async def refresh_text_index(last_full):
+    """추가/수정된 상품은 주기적으로, 삭제는 전체 재적재 주기마다 메모리 역색인에 반영합니다.
+    last_full: 마지막 전체 적재 시각 (loop.time(), warm_up 에서 실패했으면 0)"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(TEXT_INDEX_REFRESH)
+        full = loop.time() - last_full >= TEXT_INDEX_FULL_RELOAD
+        try:
+            count = await text_index.sync_from_db(pool, full=full)
+            if full:
+                last_full = loop.time()
+                print(f"텍스트 인덱스 적재 완료: {count}개")
+        except Exception as e:
+            print(f"텍스트 인덱스 동기화 실패 (DB 검색 사용): {e}")
+
+async def sync_assets():
+    """worker3 가 저장한 이미지 변형 목록을 읽습니다 (product_assets 가 없으면 원본 이미지 사용)."""
+    try:
+        count = await assets.sync_from_db(pool)
+        print(f"이미지 변형 목록 동기화 완료: {count}개")
+    except Exception as e:
+        print(f"이미지 변형 목록 동기화 실패 (원본 이미지 사용): {e}")
+
+async def on_products_changed():
+    """worker3 가 상품을 쓰면 (cache_versions 증가) 캐시를 비우기 전에 메모리 인덱스부터 맞춥니다."""
+    if TEXT_INDEX_ENABLED and text_index.loaded:
+        await text_index.sync_from_db(pool)
+    await sync_assets()
+    hybrid.clear()
+
+async def load_assets():
+    assets.load_manifest()
+    await sync_assets()
+
+def compile_templates():
+    """Jinja 템플릿을 미리 컴파일해 둡니다 (첫 페이지 요청이 파싱 비용을 내지 않도록)."""
+    names = templates.env.list_templates()
+    for name in names:
+        templates.env.get_template(name)
+    return len(names)
+
+# 시작 준비: DB 풀이 열리고 템플릿이 준비되면 /readyz 200. 인덱스/Chroma/임베딩 예열은 실패해도 진행
+# (각 요청 경로에 DB 검색/원격 검색 폴백이 있으므로)
+warmup = startup.Startup("product-app")
+background_tasks = []
+
+async def warm_up():
+    await warmup.step("db_pool", pool.open)  # DB 가 아직 없으면 열릴 때까지 다시 시도
+    print(f"DB 커넥션 풀 준비 완료: {pool.stats()}")
+    await warmup.step("templates", compile_templates)
+    loop = asyncio.get_running_loop()
+    optional = [warmup.step("assets", load_assets, required=False),
+                warmup.step("chroma", clients.aget_collection, required=False),
+                warmup.step("embedding", lambda: embeddings.aembed("상품"), required=False)]
+    if TEXT_INDEX_ENABLED:
+        optional.append(warmup.step("text_index", load_text_index, required=False))
+    if VECTOR_INDEX_ENABLED:
+        optional.append(warmup.step("vector_index", load_vector_index, required=False))
+    await asyncio.gather(*optional)
+
+    if VECTOR_INDEX_ENABLED:
+        background_tasks.append(asyncio.create_task(refresh_vector_index()))
+    if TEXT_INDEX_ENABLED:
+        last_full = loop.time() if text_index.loaded else 0.0
+        background_tasks.append(asyncio.create_task(refresh_text_index(last_full)))
+    if PAGE_CACHE_ENABLED:
+        background_tasks.append(asyncio.create_task(watch_versions(pool, on_change=on_products_changed)))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 준비 작업은 백그라운드로 돌리고 바로 요청을 받습니다 (/healthz 는 바로 200, /readyz 는 준비 후 200)
+    warmup.begin(warm_up)
+    yield
+    await warmup.stop()
+    for task in background_tasks:
+        task.cancel()
+    await pool.close()
+    embeddings.close()
+    await clients.aclose()
+
+app = FastAPI(lifespan=lifespan)
+metrics.install(app)
+startup.install(app, warmup)
 
 # 정적 파일 및 이미지 경로 설정
+# /assets: 썸네일/WebP 변형 (해시 이름, immutable 캐시). /static, /images 의 원본은 기존 image_url 호환용
+app.mount("/assets", AssetFiles(assets, pool), name="assets")
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 app.mount("/images", StaticFiles(directory="app/static/images"), name="images")
 
 templates = Jinja2Templates(directory="app/templates")
+templates.env.globals["image_set"] = assets.image_set
 
-OPENAI_KEY = os.getenv("OPENAI_API_KEY")
-openai_client = OpenAI(api_key=OPENAI_KEY)
+def render_template(name, context):
+    with metrics.span("template.render"):
+        return templates.TemplateResponse(name, context)
 
-def get_chroma_collection():
-    chroma_client = chromadb.HttpClient(host="chromadb-service", port=8000)
-    return chroma_client.get_or_create_collection(name="products")
+embeddings = create_embedding_service(clients.get_openai())
 
-def get_embedding(text):
-    response = openai_client.embeddings.create(
-        model="text-embedding-ada-002",
-        input=text
-    )
-    return response.data[0].embedding
+@metrics.timed("embedding")
+async def get_embedding(text):
+    # 캐시/요청 합치기/배치 처리는 EmbeddingService가 담당
+    return await embeddings.aembed(text)
 
-@app.get("/product")
-async def index(request: Request, name: str = Query(None), category: str = Query(None)):
-    with get_db() as conn:
-        cursor = conn.cursor()
-        query = "SELECT * FROM products WHERE 1=1"
-        params = []
-        if name:
-            query += " AND name LIKE %s"
-            params.append(f"%{name}%")
-        if category:
-            query += " AND category LIKE %s"
-            params.append(f"%{category}%")
-        cursor.execute(query, params)
-        products = cursor.fetchall()
-    return templates.TemplateResponse("index.html", {"request": request, "products": products})
+def next_page_url(request, next_cursor):
+    """현재 검색 조건을 유지한 다음 페이지 상대 경로."""
+    if not next_cursor:
+        return None
+    return f"{request.url.path}?{request.url.include_query_params(cursor=next_cursor).query}"
 
-@app.get("/product/search")
-async def rag_search(request: Request, q: str = Query(...)):
-    """RAG 기반 의미론적 검색"""
-    try:
-        # 1. 검색어 임베딩
-        embedding = get_embedding(q)
-
-        # 2. ChromaDB에서 유사 상품 검색
-        collection = get_chroma_collection()
-        results = collection.query(
-            query_embeddings=[embedding],
-            n_results=5
-        )
-
-        # 3. 검색된 상품 id로 MariaDB에서 상세 정보 조회
-        product_ids = results['ids'][0]
-        products = []
-        if product_ids:
-            with get_db() as conn:
-                cursor = conn.cursor()
-                placeholders = ','.join(['%s'] * len(product_ids))
-                cursor.execute(f"SELECT * FROM products WHERE id IN ({placeholders})", product_ids)
-                products = cursor.fetchall()
-
-        return templates.TemplateResponse("index.html", {
-            "request": request,
-            "products": products,
-            "search_query": q
-        })
-    except Exception as e:
-        print(f"RAG 검색 에러: {e}")
-        # ChromaDB 에러 시 일반 검색으로 폴백
-        with get_db() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM products WHERE name LIKE %s OR description LIKE %s",
-                         (f"%{q}%", f"%{q}%"))
-            products = cursor.fetchall()
-        return templates.TemplateResponse("index.html", {
+@app.get("/product")
+async def index(request: Request, name: str = Query(None), category: str = Query(None),
+                sort: str = Query("id"), cursor: str = Query(None),
+                limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT)):
+    async def render():
+        try:
+            if TEXT_INDEX_ENABLED and text_index.loaded and not (name or category):
+                # 조건 없는 목록은 정렬해 둔 키에서 바로 자릅니다 (이분 탐색 + limit 행)
+                products, next_cursor = text_index.page(None, None, sort, cursor, limit)
+            elif TEXT_INDEX_ENABLED and text_index.loaded:
+                # 메모리 n-gram 인덱스로 DB 없이 필터링. 일치 상품이 많을 수 있으므로 이벤트 루프 밖에서
+                products, next_cursor = await asyncio.to_thread(text_index.page, name, category, sort, cursor, limit)
+            else:
+                where, params = build_product_filter(name, category)
+                query, params = listing_query(where, params, sort, cursor, limit)
+                products, next_cursor = make_page(await pool.fetchall(query, params), sort, limit)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return render_template("index.html", {
             "request": request,
             "products": products,
-            "search_query": q
+            "search_name": name,
+            "search_category": category,
+            "sort": sort,
+            "next_url": next_page_url(request, next_cursor)
         })
 
+    return await cached_page(request, render)
+
+@app.get("/api/products")
+async def api_products(name: str = Query(None), category: str = Query(None),
+                       sort: str = Query("id"), cursor: str = Query(None),
+                       fields: str = Query(None, description="쉼표로 구분한 컬럼 목록 (기본: 목록용 컬럼)")):
+    """상품 목록을 NDJSON 으로 스트리밍합니다. 서버 측 커서를 쓰므로 전체를 메모리에 올리지 않습니다."""
+    columns = LISTING_COLUMNS
+    if fields:
+        selected = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in selected if f not in API_COLUMNS]
+        if unknown or not selected:
+            raise HTTPException(status_code=400, detail=f"지원하지 않는 컬럼: {unknown} (가능: {', '.join(API_COLUMNS)})")
+        if "id" not in selected:
+            selected.insert(0, "id")
+        columns = ", ".join(selected)
+    try:
+        check_sort(sort)
+        where, params = build_product_filter(name, category)
+        query, params = listing_query(where, params, sort, cursor, columns=columns)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def rows():
+        async for row in pool.stream(query, params):
+            yield json.dumps(row, ensure_ascii=False, default=str) + "\n"
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+@metrics.timed("search.vector")
+async def vector_candidates(q, k, category=None):
+    """임베딩 유사도 순 상품 id (최신 상태의 로컬 인덱스 우선, 아니면 ChromaDB 원격 조회)."""
+    where = {"category": category} if category else None
+    if VECTOR_INDEX_ENABLED and vector_index.is_fresh():
+        embedding = await get_embedding(q)
+        return [pid for pid, _ in vector_index.search(embedding, k=k, where=where)]
+    # ChromaDB 가 차단 중이면 임베딩도 만들지 않고 바로 실패 (문자열 검색 결과만 사용)
+    clients.chroma_breaker.check()
+    embedding = await get_embedding(q)
+    collection = await clients.aget_collection()
+    results = await clients.achroma_call(
+        collection.query,
+        query_embeddings=[embedding],
+        n_results=k,
+        where=where
+    )
+    return results['ids'][0]
+
+@metrics.timed("search.lexical")
+async def lexical_candidates(q, k):
+    """문자열 일치 순 상품 id (메모리 n-gram 인덱스 우선, 아니면 name, description FULLTEXT)."""
+    if TEXT_INDEX_ENABLED and text_index.loaded:
+        return [pid for pid, _ in text_index.rank(q, k)]
+    relevance = relevance_clause(("name", "description"), q)
+    if relevance:
+        # MATCH ... AGAINST 관련도 순
+        where, params = relevance
+        query, params = f"SELECT id FROM products WHERE {where} ORDER BY {where} DESC LIMIT %s", params * 2 + [k]
+    else:
+        # 색인되지 않는 짧은 검색어는 부분 일치
+        where, params, _ = match_clause(("name", "description"), q)
+        query, params = f"SELECT id FROM products WHERE {where} ORDER BY id LIMIT %s", params + [k]
+    rows = await pool.fetchall(query, params)
+    return [row["id"] for row in rows]
+
+@metrics.timed("search.fetch_rows")
+async def fetch_products(ids):
+    if TEXT_INDEX_ENABLED and text_index.loaded:
+        return text_index.rows(ids)
+    placeholders = ','.join(['%s'] * len(ids))
+    rows = await pool.fetchall(f"SELECT {LISTING_COLUMNS} FROM products WHERE id IN ({placeholders})", ids)
+    return {row["id"]: row for row in rows}
+
+hybrid = HybridSearch(vector_candidates, lexical_candidates, fetch_products)
+
+# /metrics 의 component_stats 게이지
+metrics.register_stats("db_pool", pool.stats)
+metrics.register_stats("embedding", embeddings.stats)
+metrics.register_stats("chroma_breaker", clients.chroma_breaker.stats)
+metrics.register_stats("page_cache", page_cache.stats)
+metrics.register_stats("hybrid_cache", hybrid.stats)
+metrics.register_stats("vector_index", lambda: {"size": len(vector_index), "fresh": vector_index.is_fresh()})
+metrics.register_stats("assets", assets.stats)
+metrics.register_stats("text_index", lambda: {"size": len(text_index), "loaded": text_index.loaded})
+
+async def hybrid_page(q, page, size, name, category, min_price, max_price, in_stock):
+    filters = {"name": name, "category": category, "min_price": min_price, "max_price": max_price,
+               "in_stock": in_stock}
+    return await hybrid.search(q, page=page, size=size, **filters)
+
+@app.get("/product/search")
+async def rag_search(request: Request, q: str = Query(...), name: str = Query(None), category: str = Query(None),
+                     min_price: int = Query(None, ge=0), max_price: int = Query(None, ge=0),
+                     in_stock: bool = Query(False), page: int = Query(1, ge=1)):
+    """하이브리드 검색 (임베딩 유사도 + 문자열 일치, RRF 로 합친 순서 유지)"""
+    result = await hybrid_page(q, page, HYBRID_PAGE_SIZE, name, category, min_price, max_price, in_stock)
+    next_url = None
+    if result.has_next:
+        next_url = f"{request.url.path}?{request.url.include_query_params(page=page + 1).query}"
+    return render_template("index.html", {
+        "request": request,
+        "products": result.rows,
+        "search_query": q,
+        "search_name": name,
+        "search_category": category,
+        "next_url": next_url
+    })
+
+@app.get("/api/search")
+async def api_search(q: str = Query(...), name: str = Query(None), category: str = Query(None),
+                     min_price: int = Query(None, ge=0), max_price: int = Query(None, ge=0),
+                     in_stock: bool = Query(False), page: int = Query(1, ge=1),
+                     size: int = Query(HYBRID_PAGE_SIZE, ge=1, le=MAX_LIMIT)):
+    """하이브리드 검색 결과를 점수와 함께 JSON 으로 반환합니다."""
+    result = await hybrid_page(q, page, size, name, category, min_price, max_price, in_stock)
+    return {
+        "query": q,
+        "page": page,
+        "total": result.total,
+        "has_next": result.has_next,
+        "sources": result.sources,
+        "items": [dict(row, score=round(score, 6)) for row, score in result.items],
+    }
+
 @app.get("/product/{product_id}")
 async def detail(request: Request, product_id: int):
-    with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM products WHERE id = %s", (product_id,))
-        product = cursor.fetchone()
-    if not product:
-        raise HTTPException(status_code=404, detail="상품을 찾을 수 없습니다.")
-    return templates.TemplateResponse("detail.html", {"request": request, "product": product})
+    async def render():
+        product = await pool.fetchone("SELECT * FROM products WHERE id = %s", (product_id,))
+        if not product:
+            raise HTTPException(status_code=404, detail="상품을 찾을 수 없습니다.")
+        return render_template("detail.html", {"request": request, "product": product})
+
+    return await cached_page(request, render)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,128 @@
+"""MariaDB 스키마 마이그레이션.
+
+배포 후 한 번 실행합니다:  python -m app.migrations
+적용된 버전은 schema_migrations 테이블에 기록되므로 여러 번 실행해도 안전합니다.
+"""
+import pymysql
+from .database import get_db
+
+
+def _check_duplicate_names(cursor):
+    """같은 이름의 상품이 있으면 UNIQUE 인덱스를 만들 수 없으므로 목록을 보여주고 멈춥니다."""
+    cursor.execute(
+        "SELECT name, COUNT(*) AS count FROM products GROUP BY name HAVING COUNT(*) > 1 LIMIT 20"
+    )
+    duplicates = cursor.fetchall()
+    if duplicates:
+        names = ", ".join(f"{row['name']}({row['count']})" for row in duplicates)
+        raise RuntimeError(f"중복된 상품명이 있어 UNIQUE 인덱스를 만들 수 없습니다. 먼저 정리해 주세요: {names}")
+
+
+# MySQL 은 ngram 파서로 한국어를 n-gram 단위로 색인할 수 있지만
+# MariaDB 에는 ngram 파서가 없어서 기본 파서(공백 단위 단어)를 사용합니다.
+# 단어 일부(부분 문자열) 검색은 app/text_index.py 의 메모리 n-gram 인덱스가 담당합니다.
+MIGRATIONS = [
+    (1, "상품명/카테고리 B-tree 인덱스 (정확/접두어 검색용)", [
+        "CREATE INDEX idx_products_name ON products (name)",
+        "CREATE INDEX idx_products_category ON products (category)",
+    ]),
+    (2, "상품명+설명 FULLTEXT 인덱스 (검색 관련도 정렬용)", [
+        "CREATE FULLTEXT INDEX ft_products_name_description ON products (name, description){parser}",
+    ]),
+    (3, "가격순 keyset 페이지네이션용 (price, id) 인덱스", [
+        "CREATE INDEX idx_products_price_id ON products (price, id)",
+    ]),
+    (4, "변경 감지용 updated_at 컬럼", [
+        "ALTER TABLE products ADD COLUMN updated_at TIMESTAMP NOT NULL"
+        " DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP",
+        "CREATE INDEX idx_products_updated_at ON products (updated_at)",
+    ]),
+    (5, "페이지 캐시 무효화용 버전 카운터", [
+        "CREATE TABLE IF NOT EXISTS cache_versions ("
+        " name VARCHAR(64) PRIMARY KEY,"
+        " version BIGINT NOT NULL DEFAULT 0)",
+        "INSERT IGNORE INTO cache_versions (name, version) VALUES ('products', 0)",
+    ]),
+    (6, "상품명 UNIQUE 인덱스 (worker3 일괄 조회 + 중복 INSERT 방지)", [
+        # 기본 collation(utf8mb4_general_ci)이라 대소문자/끝 공백만 다른 이름도 같은 이름으로 봅니다.
+        _check_duplicate_names,
+        "CREATE UNIQUE INDEX uq_products_name ON products (name)",
+        # UNIQUE 인덱스가 정확/접두어 검색도 처리하므로 기존 일반 인덱스는 지웁니다.
+        "DROP INDEX idx_products_name ON products",
+    ]),
+    (7, "ChromaDB 반영용 outbox (worker3 가 상품 INSERT 와 같은 트랜잭션에서 기록)", [
+        "CREATE TABLE IF NOT EXISTS product_outbox ("
+        " id BIGINT AUTO_INCREMENT PRIMARY KEY,"
+        " product_id INT NOT NULL,"
+        " attempts INT NOT NULL DEFAULT 0,"
+        " next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,"
+        " last_error TEXT,"
+        " created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,"
+        " INDEX idx_product_outbox_due (next_attempt_at, id))",
+    ]),
+    (8, "원격 상품 이미지의 썸네일/WebP 변형 (worker3 가 수집 시 저장, product-app 이 /assets 로 서빙)", [
+        "CREATE TABLE IF NOT EXISTS product_assets ("
+        " name VARCHAR(128) PRIMARY KEY,"
+        " source VARCHAR(255) NOT NULL,"
+        " width INT NOT NULL,"
+        " format VARCHAR(8) NOT NULL,"
+        " content_type VARCHAR(32) NOT NULL,"
+        " data MEDIUMBLOB NOT NULL,"
+        " created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,"
+        " INDEX idx_product_assets_source (source))",
+    ]),
+]
+
+# init.sql 로 먼저 만든 경우 이미 존재하므로 건너뜁니다.
+ER_DUP_FIELDNAME = 1060  # 같은 이름의 컬럼이 있음
+ER_DUP_KEYNAME = 1061    # 같은 이름의 인덱스가 있음
+ER_CANT_DROP_FIELD_OR_KEY = 1091  # 지울 인덱스가 이미 없음
+
+
+def _fulltext_parser(cursor):
+    cursor.execute("SELECT VERSION() AS version")
+    version = cursor.fetchone()["version"]
+    return "" if "MariaDB" in version else " WITH PARSER ngram"
+
+
+def migrate(conn):
+    """아직 적용되지 않은 마이그레이션을 순서대로 적용하고, 적용한 버전 목록을 반환합니다."""
+    cursor = conn.cursor()
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        " version INT PRIMARY KEY,"
+        " description VARCHAR(255),"
+        " applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+    )
+    cursor.execute("SELECT version FROM schema_migrations")
+    applied = {row["version"] for row in cursor.fetchall()}
+    parser = _fulltext_parser(cursor)
+
+    done = []
+    for version, description, statements in MIGRATIONS:
+        if version in applied:
+            continue
+        print(f"🔧 마이그레이션 {version}: {description}")
+        for sql in statements:
+            if callable(sql):
+                sql(cursor)
+                continue
+            try:
+                cursor.execute(sql.format(parser=parser))
+            except pymysql.err.OperationalError as e:
+                if e.args[0] not in (ER_DUP_FIELDNAME, ER_DUP_KEYNAME, ER_CANT_DROP_FIELD_OR_KEY):
+                    raise
+                print(f"   - 이미 존재하여 건너뜀: {e.args[1]}")
+        cursor.execute(
+            "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+            (version, description),
+        )
+        conn.commit()
+        done.append(version)
+    return done
+
+
+if __name__ == "__main__":
+    with get_db() as conn:
+        applied = migrate(conn)
+    print(f"✅ 마이그레이션 완료: {applied or '변경 없음'}")
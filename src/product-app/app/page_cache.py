@@ -0,0 +1,208 @@
+"""렌더링된 상품 페이지 캐시.
+
+- 프로세스 내 LRU (바이트 크기 기준 제거) + 선택적인 Redis 공유 백엔드 (CACHE_REDIS_URL)
+- 캐시 키에 데이터 버전을 넣고, 버전은 worker3 가 상품을 쓸 때마다 올리는
+  cache_versions 테이블에서 읽습니다. TTL 로 지우지 않고 버전이 바뀔 때만 무효화됩니다.
+- ETag / If-None-Match 로 변경이 없으면 304 를 돌려줍니다.
+"""
+import os
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from fastapi import Response
+
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "1") == "1"
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+PAGE_CACHE_CONTROL = os.getenv("PAGE_CACHE_CONTROL", "public, max-age=0, must-revalidate")
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "")
+CACHE_VERSION_POLL = float(os.getenv("CACHE_VERSION_POLL", "1"))  # cache_versions 확인 주기(초)
+CACHE_VERSION_NAME = "products"
+
+
+class CachedPage:
+    __slots__ = ("body", "etag", "media_type")
+
+    def __init__(self, body, media_type="text/html; charset=utf-8", etag=None):
+        self.body = body
+        self.media_type = media_type
+        self.etag = etag or '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+    def to_bytes(self):
+        return self.etag.encode() + b"\n" + self.media_type.encode() + b"\n" + self.body
+
+    @classmethod
+    def from_bytes(cls, raw):
+        etag, media_type, body = raw.split(b"\n", 2)
+        return cls(body, media_type.decode(), etag.decode())
+
+
+class SizeLimitedLRU:
+    """본문 바이트 합계가 max_bytes 를 넘으면 오래 안 쓴 항목부터 지웁니다."""
+
+    def __init__(self, max_bytes=PAGE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            page = self._data.get(key)
+            if page is not None:
+                self._data.move_to_end(key)
+            return page
+
+    def set(self, key, page):
+        weight = len(page.body)
+        if weight > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.size -= len(old.body)
+            self._data[key] = page
+            self.size += weight
+            while self.size > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self.size -= len(evicted.body)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisBackend:
+    """여러 파드가 함께 쓰는 캐시. 키에 버전이 들어가므로 만료 시간은 두지 않고
+    오래된 키는 Redis 의 maxmemory-policy(allkeys-lru)로 정리합니다."""
+
+    def __init__(self, url):
+        import redis.asyncio as redis  # 선택 의존성
+        self.client = redis.from_url(url)
+
+    async def get(self, key):
+        raw = await self.client.get(key)
+        return CachedPage.from_bytes(raw) if raw else None
+
+    async def set(self, key, page):
+        await self.client.set(key, page.to_bytes())
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class PageCache:
+    def __init__(self, memory=None, shared=None):
+        self.memory = memory if memory is not None else SizeLimitedLRU()
+        self.shared = shared
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, request):
+        query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+        return f"page:v{self.version}:{request.url.path}?{query}"
+
+    async def get(self, key):
+        page = self.memory.get(key)
+        if page is None and self.shared is not None:
+            try:
+                page = await self.shared.get(key)
+            except Exception as e:
+                print(f"⚠️ 공유 캐시 조회 실패: {e}")
+            if page is not None:
+                self.memory.set(key, page)
+        if page is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return page
+
+    async def set(self, key, page):
+        self.memory.set(key, page)
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, page)
+            except Exception as e:
+                print(f"⚠️ 공유 캐시 저장 실패: {e}")
+
+    def set_version(self, version):
+        """버전이 바뀌면 메모리 캐시를 비웁니다. 바뀌었으면 True."""
+        if version == self.version:
+            return False
+        self.version = version
+        self.memory.clear()
+        return True
+
+    def stats(self):
+        return {"version": self.version, "entries": len(self.memory), "bytes": self.memory.size,
+                "hits": self.hits, "misses": self.misses}
+
+
+def not_modified(request, etag):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def page_response(request, page):
+    headers = {"ETag": page.etag, "Cache-Control": PAGE_CACHE_CONTROL}
+    if not_modified(request, page.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=page.body, media_type=page.media_type, headers=headers)
+
+
+async def cached_page(request, render):
+    """캐시된 페이지가 있으면 그대로, 없으면 render() 결과를 저장해서 돌려줍니다.
+
+    버전을 아직 모르면(DB 미연결 등) 캐시에 넣지 않습니다.
+    """
+    if not PAGE_CACHE_ENABLED or page_cache.version is None:
+        response = await render()
+        return page_response(request, CachedPage(response.body, response.media_type))
+    key = page_cache.key(request)
+    page = await page_cache.get(key)
+    if page is None:
+        response = await render()
+        page = CachedPage(response.body, response.media_type)
+        await page_cache.set(key, page)
+    return page_response(request, page)
+
+
+async def fetch_version(pool):
+    row = await pool.fetchone("SELECT version FROM cache_versions WHERE name = %s", (CACHE_VERSION_NAME,))
+    return row["version"] if row else 0
+
+
+async def watch_versions(pool, on_change=None):
+    """cache_versions 를 주기적으로 확인하고, 바뀌면 on_change() 후 캐시를 무효화합니다."""
+    while True:
+        try:
+            version = await fetch_version(pool)
+            if version != page_cache.version:
+                if on_change is not None:
+                    await on_change()
+                page_cache.set_version(version)
+        except Exception as e:
+            print(f"캐시 버전 확인 실패 (캐시 사용 안 함): {e}")
+            page_cache.set_version(None)
+        await asyncio.sleep(CACHE_VERSION_POLL)
+
+
+def _create_shared():
+    if not CACHE_REDIS_URL:
+        return None
+    try:
+        return RedisBackend(CACHE_REDIS_URL)
+    except ImportError:
+        print("⚠️ CACHE_REDIS_URL 이 있지만 redis 패키지가 없어 메모리 캐시만 사용합니다.")
+        return None
+
+
+page_cache = PageCache(shared=_create_shared())
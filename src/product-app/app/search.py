@@ -0,0 +1,90 @@
+"""상품 검색 조건(WHERE 절) 생성기.
+
+/product 필터는 메모리 n-gram 인덱스(app/text_index.py)와 같은 결과를 돌려줘야 하므로 의미를 맞춥니다.
+- "따옴표"로 감싼 검색어 → 정확히 일치 (column = ?, B-tree 인덱스 사용)
+- * 로 끝나는 검색어     → 접두어 일치 (column LIKE 'term%', B-tree 인덱스 사용)
+- 그 외                  → 부분 문자열 일치 (column LIKE '%term%', 기존 검색과 같음)
+  MariaDB 에는 ngram 파서가 없어 FULLTEXT 로는 "아이폰" 안의 "폰" 을 찾을 수 없으므로,
+  부분 일치는 메모리 인덱스가 빠른 경로이고 DB 는 인덱스가 아직 없을 때의 대체 경로입니다.
+
+관련도 순위(lexical_candidates)는 결과 집합이 같을 필요가 없으므로 relevance_clause() 의 FULLTEXT 를 씁니다.
+"""
+import os
+import re
+
+# MariaDB innodb_ft_min_token_size 와 맞춰야 합니다 (기본 3). 이보다 짧은 단어는 FULLTEXT에 색인되지 않습니다.
+FT_MIN_TOKEN = int(os.getenv("FT_MIN_TOKEN", "3"))
+
+_BOOLEAN_OPERATORS = re.compile(r'[+\-<>()~*"@]')
+
+
+def escape_like(term):
+    """LIKE 패턴 특수문자를 ESCAPE '!' 기준으로 이스케이프합니다."""
+    return term.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+
+
+def _fulltext_words(term):
+    words = _BOOLEAN_OPERATORS.sub(" ", term).split()
+    return [w for w in words if len(w) >= FT_MIN_TOKEN]
+
+
+def match_mode(term):
+    """검색어에 맞는 매칭 방식(exact / prefix / contains)을 고릅니다. TextIndex._match 와 같은 규칙입니다."""
+    if len(term) >= 2 and term[0] == term[-1] == '"':
+        return "exact"
+    if term.endswith("*"):
+        return "prefix"
+    return "contains"
+
+
+def match_clause(columns, term, placeholder="%s"):
+    """(sql, params, mode) 를 반환합니다. 여러 컬럼이면 그중 하나라도 맞으면 일치."""
+    if isinstance(columns, str):
+        columns = (columns,)
+    term = " ".join(term.split())  # 메모리 인덱스처럼 연속 공백은 하나로
+    mode = match_mode(term)
+
+    if mode == "exact":
+        value = term[1:-1]
+        parts = [f"{col} = {placeholder}" for col in columns]
+        params = [value] * len(columns)
+    else:
+        if mode == "prefix":
+            pattern = escape_like(term.rstrip("*")) + "%"
+        else:
+            pattern = "%" + escape_like(term) + "%"
+        parts = [f"{col} LIKE {placeholder} ESCAPE '!'" for col in columns]
+        params = [pattern] * len(columns)
+
+    sql = parts[0] if len(parts) == 1 else "(" + " OR ".join(parts) + ")"
+    return sql, params, mode
+
+
+def relevance_clause(columns, term, placeholder="%s"):
+    """FULLTEXT 관련도 검색 (sql, params). 색인되는 단어(FT_MIN_TOKEN 이상)가 없으면 None.
+
+    MATCH ... AGAINST 를 ORDER BY 에도 쓰면 관련도 순이 됩니다. 단어 접두어 일치라서 부분 문자열
+    필터(match_clause)와 결과가 다를 수 있으므로 순위 후보를 뽑을 때만 씁니다.
+    """
+    if isinstance(columns, str):
+        columns = (columns,)
+    words = _fulltext_words(term.strip().strip('"'))
+    if not words:
+        return None
+    boolean_query = " ".join(f"+{w}*" for w in words)
+    return f"MATCH({', '.join(columns)}) AGAINST ({placeholder} IN BOOLEAN MODE)", [boolean_query]
+
+
+def build_product_filter(name=None, category=None, placeholder="%s"):
+    """/product 의 name, category 필터를 WHERE 절과 파라미터로 만듭니다."""
+    where = "1=1"
+    params = []
+    if name:
+        sql, p, _ = match_clause("name", name, placeholder)
+        where += f" AND {sql}"
+        params.extend(p)
+    if category:
+        sql, p, _ = match_clause("category", category, placeholder)
+        where += f" AND {sql}"
+        params.extend(p)
+    return where, params
@@ -0,0 +1,253 @@
+"""메모리 역색인 (문자 n-gram).
+
+한국어는 띄어쓰기 단위 FULLTEXT 로는 "에어팟" 안의 "팟" 같은 부분 검색이 안 되므로,
+상품명/카테고리를 문자 1-gram, 2-gram 으로 색인해서 DB 없이 /product 필터를 처리합니다.
+후보는 n-gram 교집합으로 좁히고, 마지막에 실제 문자열 비교로 확인합니다.
+"""
+import os
+import math
+import time
+import heapq
+import bisect
+import asyncio
+import threading
+from collections import defaultdict
+from .listing import LISTING_COLUMNS, SORTS, DEFAULT_LIMIT, check_sort, decode_cursor, make_page
+
+TEXT_INDEX_ENABLED = os.getenv("TEXT_INDEX_ENABLED", "1") == "1"
+TEXT_INDEX_REFRESH = float(os.getenv("TEXT_INDEX_REFRESH", "30"))           # 추가/수정 상품 반영 주기(초)
+TEXT_INDEX_FULL_RELOAD = float(os.getenv("TEXT_INDEX_FULL_RELOAD", "300"))  # 삭제까지 반영하는 전체 재적재 주기(초)
+
+INDEXED_FIELDS = ("name", "category")
+RANK_FIELD_WEIGHTS = {"name": 1.0, "category": 0.3}  # rank() 에서 필드별 가중치
+SORT_COLUMNS = {column for column, _ in SORTS.values()}  # page() 용으로 정렬해 두는 키 (None 은 id)
+
+
+def _normalize(text):
+    return " ".join(str(text or "").split()).casefold()
+
+
+def _sort_key(column, row):
+    """listing_query() 의 ORDER BY 와 같은 정렬 키 (정렬값, id)."""
+    return (row[column], row["id"]) if column else (row["id"],)
+
+
+def char_ngrams(text):
+    """문자 1-gram 과 2-gram 집합."""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+class TextIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+        self.loaded = False
+        self.loaded_at = None
+
+    def _reset(self):
+        self._rows = {}
+        self._texts = {f: {} for f in INDEXED_FIELDS}
+        self._postings = {f: defaultdict(set) for f in INDEXED_FIELDS}
+        self._sorted = {column: [] for column in SORT_COLUMNS}  # 정렬 키 목록 (항상 오름차순 유지)
+        self.max_id = 0
+        self.max_updated = None
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _add_row(self, row, keep_sorted=True):
+        pid = row["id"]
+        if pid in self._rows:
+            self._remove_row(pid)
+        self._rows[pid] = row
+        if keep_sorted:
+            for column, keys in self._sorted.items():
+                bisect.insort(keys, _sort_key(column, row))
+        for field in INDEXED_FIELDS:
+            text = _normalize(row.get(field))
+            self._texts[field][pid] = text
+            for gram in char_ngrams(text):
+                self._postings[field][gram].add(pid)
+        self.max_id = max(self.max_id, pid)
+        updated = row.get("updated_at")
+        if updated is not None and (self.max_updated is None or updated > self.max_updated):
+            self.max_updated = updated
+
+    def _remove_row(self, pid):
+        row = self._rows.pop(pid, None)
+        if row is not None:
+            for column, keys in self._sorted.items():
+                key = _sort_key(column, row)
+                i = bisect.bisect_left(keys, key)
+                if i < len(keys) and keys[i] == key:
+                    del keys[i]
+        for field in INDEXED_FIELDS:
+            text = self._texts[field].pop(pid, "")
+            postings = self._postings[field]
+            for gram in char_ngrams(text):
+                ids = postings.get(gram)
+                if ids is not None:
+                    ids.discard(pid)
+                    if not ids:
+                        del postings[gram]
+
+    def load(self, rows):
+        """전체를 다시 색인합니다."""
+        with self._lock:
+            self._reset()
+            for row in rows:
+                self._add_row(row, keep_sorted=False)
+            for column in self._sorted:
+                self._sorted[column] = sorted(_sort_key(column, row) for row in self._rows.values())
+            self.loaded = True
+            self.loaded_at = time.monotonic()
+
+    def add(self, rows):
+        with self._lock:
+            for row in rows:
+                self._add_row(row)
+
+    def remove(self, ids):
+        with self._lock:
+            for pid in ids:
+                self._remove_row(pid)
+
+    def _match(self, field, term):
+        # 메모리 인덱스는 길이 제한이 없으므로 "..." 는 정확히, * 는 접두어, 나머지는 부분 일치
+        term = term.strip()
+        if len(term) >= 2 and term[0] == term[-1] == '"':
+            mode, term = "exact", term[1:-1]
+        elif term.endswith("*"):
+            mode, term = "prefix", term.rstrip("*")
+        else:
+            mode = "contains"
+        term = _normalize(term)
+        if not term:
+            return None
+
+        postings = self._postings[field]
+        grams = [term] if len(term) == 1 else [term[i:i + 2] for i in range(len(term) - 1)]
+        sets = sorted((postings.get(g, set()) for g in grams), key=len)
+        candidates = set(sets[0])
+        for s in sets[1:]:
+            if not candidates:
+                break
+            candidates &= s
+
+        texts = self._texts[field]
+        if mode == "exact":
+            return {pid for pid in candidates if texts[pid] == term}
+        if mode == "prefix":
+            return {pid for pid in candidates if texts[pid].startswith(term)}
+        return {pid for pid in candidates if term in texts[pid]}
+
+    def filter(self, name=None, category=None):
+        """name, category 조건에 맞는 상품 행을 id 순으로 반환합니다."""
+        with self._lock:
+            result = None
+            for field, term in (("name", name), ("category", category)):
+                if not term:
+                    continue
+                ids = self._match(field, term)
+                if ids is None:
+                    continue
+                result = ids if result is None else result & ids
+            if result is None:
+                return [self._rows[pid] for pid in sorted(self._rows)]
+            return [self._rows[pid] for pid in sorted(result)]
+
+    def page(self, name=None, category=None, sort="id", cursor=None, limit=DEFAULT_LIMIT):
+        """filter() 결과를 listing_query() 와 같은 정렬/커서 규칙으로, 전체 정렬 없이 (행, 다음 커서) 로 자릅니다.
+
+        조건이 없으면 미리 정렬해 둔 키에서 커서 위치를 이분 탐색해 limit + 1 개만 자릅니다.
+        조건이 있으면 일치하는 상품 중 커서 다음의 limit + 1 개만 힙으로 고릅니다.
+        """
+        column, desc = SORTS[check_sort(sort)]
+        after = tuple(decode_cursor(sort, cursor)) if cursor else None
+        with self._lock:
+            result = None
+            for field, term in (("name", name), ("category", category)):
+                if not term:
+                    continue
+                ids = self._match(field, term)
+                if ids is None:
+                    continue
+                result = ids if result is None else result & ids
+
+            if result is None:
+                keys = self._sorted[column]
+                if desc:
+                    end = bisect.bisect_left(keys, after) if after else len(keys)
+                    page_keys = keys[max(0, end - limit - 1):end][::-1]
+                else:
+                    start = bisect.bisect_right(keys, after) if after else 0
+                    page_keys = keys[start:start + limit + 1]
+                rows = [self._rows[key[-1]] for key in page_keys]
+            else:
+                matched = (_sort_key(column, self._rows[pid]) for pid in result)
+                if after:
+                    matched = (key for key in matched if (key < after if desc else key > after))
+                pick = heapq.nlargest if desc else heapq.nsmallest
+                rows = [self._rows[key[-1]] for key in pick(limit + 1, matched)]
+        return make_page(rows, sort, limit)
+
+    def rank(self, query, k=100):
+        """검색어와 겹치는 n-gram 의 IDF 합으로 관련도 상위 k개의 (id, score) 를 점수 순으로 반환합니다.
+
+        filter() 는 모든 단어를 포함하는 상품만 돌려주지만, rank() 는 일부 단어만 맞아도 점수를 줍니다.
+        검색어 단어가 상품명에 통째로 들어 있으면 그 단어의 점수를 한 번 더 더합니다.
+        """
+        words = [_normalize(w.strip('"*')) for w in str(query or "").split()]
+        words = [w for w in words if w]
+        if not words or k <= 0:
+            return []
+        with self._lock:
+            total = len(self._rows) or 1
+            scores = defaultdict(float)
+            word_weight = {}
+            for field, weight in RANK_FIELD_WEIGHTS.items():
+                postings = self._postings[field]
+                for word in words:
+                    grams = {word} if len(word) == 1 else {word[i:i + 2] for i in range(len(word) - 1)}
+                    word_score = 0.0
+                    for gram in grams:
+                        ids = postings.get(gram)
+                        if not ids:
+                            continue
+                        idf = math.log(1 + total / len(ids))
+                        word_score += idf
+                        for pid in ids:
+                            scores[pid] += weight * idf
+                    if field == "name":
+                        word_weight[word] = word_score
+            # 상위 후보만 단어 전체 일치 여부로 다시 점수를 매깁니다.
+            top = heapq.nlargest(k * 4, scores.items(), key=lambda item: (item[1], -item[0]))
+            names = self._texts["name"]
+            rescored = [(pid, score + sum(w for word, w in word_weight.items() if word in names.get(pid, "")))
+                        for pid, score in top]
+        rescored.sort(key=lambda item: (-item[1], item[0]))
+        return rescored[:k]
+
+    def rows(self, ids):
+        """id 목록의 상품 행을 {id: 행} 으로 반환합니다 (없는 id 는 빠짐)."""
+        with self._lock:
+            return {pid: self._rows[pid] for pid in ids if pid in self._rows}
+
+    async def sync_from_db(self, pool, full=False):
+        """DB에서 추가/수정된 상품(updated_at 기준)만, 또는 full=True 면 전체를 읽어 반영합니다."""
+        if full or not self.loaded or self.max_updated is None:
+            rows = await pool.fetchall(f"SELECT {LISTING_COLUMNS}, updated_at FROM products")
+            await asyncio.to_thread(self.load, rows)
+        else:
+            # TIMESTAMP 는 초 단위라서 같은 초에 바뀐 행을 놓치지 않도록 >= 로 다시 읽습니다.
+            rows = await pool.fetchall(
+                f"SELECT {LISTING_COLUMNS}, updated_at FROM products WHERE updated_at >= %s",
+                (self.max_updated,)
+            )
+            self.add(rows)
+        return len(self)
+
+
+text_index = TextIndex()
@@ -0,0 +1,183 @@
+import os
+import time
+import threading
+import numpy as np
+
+# 프로세스 내 벡터 인덱스 설정 (ChromaDB가 원본, 여기는 읽기 전용 복제본)
+VECTOR_INDEX_ENABLED = os.getenv("VECTOR_INDEX_ENABLED", "1") == "1"
+VECTOR_INDEX_REFRESH = float(os.getenv("VECTOR_INDEX_REFRESH", "30"))          # 동기화 주기(초)
+VECTOR_INDEX_MAX_STALENESS = float(os.getenv("VECTOR_INDEX_MAX_STALENESS", "120"))  # 이보다 오래되면 원격 조회
+CHROMA_PAGE_SIZE = 1000
+
+
+class _Snapshot:
+    """검색에 쓰는 불변 데이터 묶음. 갱신 시 통째로 교체합니다."""
+
+    def __init__(self, ids, matrix, metadatas):
+        self.ids = ids              # (N,) object 배열
+        self.matrix = matrix        # (N, D) float32, 행마다 L2 정규화
+        self.metadatas = metadatas  # 행 순서와 같은 dict 리스트
+        self.positions = {pid: i for i, pid in enumerate(ids)}
+        self._columns = {}
+
+    def column(self, field):
+        col = self._columns.get(field)
+        if col is None:
+            col = np.array([(m or {}).get(field) for m in self.metadatas], dtype=object)
+            self._columns[field] = col
+        return col
+
+
+def _normalize(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class VectorIndex:
+    """정규화된 임베딩 행렬 위에서 exact top-k 코사인 검색을 합니다.
+
+    ChromaDB 컬렉션에서 시작 시 전체를 불러오고, 이후에는 메타데이터의
+    updated_at 값을 기준으로 새로 upsert 된 항목만 가져와 반영합니다.
+    """
+
+    def __init__(self, max_staleness=VECTOR_INDEX_MAX_STALENESS):
+        self.max_staleness = max_staleness
+        self._snapshot = _Snapshot(np.array([], dtype=object), np.zeros((0, 0), np.float32), [])
+        self._lock = threading.Lock()  # 갱신끼리만 직렬화 (검색은 스냅샷을 읽기만 함)
+        self._high_water = 0.0
+        self.synced_at = None
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._snapshot.ids)
+
+    def is_fresh(self):
+        if not self.loaded or self.synced_at is None:
+            return False
+        return time.monotonic() - self.synced_at <= self.max_staleness
+
+    def load(self, ids, embeddings, metadatas=None):
+        """인덱스 전체를 교체합니다."""
+        ids = list(ids)
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in ids]
+        matrix = _normalize(embeddings) if ids else np.zeros((0, 0), np.float32)
+        with self._lock:
+            self._snapshot = _Snapshot(np.array(ids, dtype=object), matrix, metadatas)
+            self._high_water = max([_updated_at(m) for m in metadatas], default=0.0)
+            self.loaded = True
+
+    def upsert(self, ids, embeddings, metadatas=None):
+        """기존 id는 교체하고 새 id는 뒤에 붙입니다."""
+        ids = list(ids)
+        if not ids:
+            return
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in ids]
+        vectors = _normalize(embeddings)
+        with self._lock:
+            snap = self._snapshot
+            if len(snap.ids) == 0:
+                matrix, all_ids, all_meta = vectors, ids, metadatas
+            else:
+                matrix = snap.matrix.copy()
+                all_ids = list(snap.ids)
+                all_meta = list(snap.metadatas)
+                new_rows, new_ids, new_meta = [], [], []
+                for i, pid in enumerate(ids):
+                    pos = snap.positions.get(pid)
+                    if pos is None:
+                        new_rows.append(i)
+                        new_ids.append(pid)
+                        new_meta.append(metadatas[i])
+                    else:
+                        matrix[pos] = vectors[i]
+                        all_meta[pos] = metadatas[i]
+                if new_rows:
+                    matrix = np.vstack([matrix, vectors[new_rows]])
+                    all_ids.extend(new_ids)
+                    all_meta.extend(new_meta)
+            self._snapshot = _Snapshot(np.array(all_ids, dtype=object), matrix, all_meta)
+            self._high_water = max([self._high_water] + [_updated_at(m) for m in metadatas])
+            self.loaded = True
+
+    def search(self, query, k=5, where=None):
+        """코사인 유사도 상위 k개의 (id, score)를 유사도 순으로 반환합니다."""
+        snap = self._snapshot
+        if len(snap.ids) == 0 or k <= 0:
+            return []
+        q = _normalize(query)[0]
+        if q.shape[0] != snap.matrix.shape[1]:
+            raise ValueError(f"임베딩 차원이 다릅니다: {q.shape[0]} != {snap.matrix.shape[1]}")
+
+        if where:
+            mask = np.ones(len(snap.ids), dtype=bool)
+            for field, value in where.items():
+                mask &= snap.column(field) == value
+            rows = np.flatnonzero(mask)
+            if len(rows) == 0:
+                return []
+            scores = snap.matrix[rows] @ q
+        else:
+            rows = None
+            scores = snap.matrix @ q
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        picked = rows[top] if rows is not None else top
+        return [(snap.ids[i], float(scores[j])) for i, j in zip(picked, top)]
+
+    def sync_from_chroma(self, collection):
+        """ChromaDB와 동기화합니다. 처음이거나 개수가 어긋나면 전체를 다시 읽습니다."""
+        remote_count = collection.count()
+        if not self.loaded or remote_count < len(self):
+            self._full_load(collection)
+        else:
+            where = {"updated_at": {"$gt": self._high_water}}
+            ids, embeddings, metadatas = _fetch_all(collection, where=where)
+            self.upsert(ids, embeddings, metadatas)
+            if len(self) != remote_count:
+                # updated_at 없이 들어온 항목이 있으면 전체를 다시 맞춥니다.
+                self._full_load(collection)
+        self.synced_at = time.monotonic()
+        return len(self)
+
+    def _full_load(self, collection):
+        ids, embeddings, metadatas = _fetch_all(collection)
+        self.load(ids, embeddings, metadatas)
+
+
+def _updated_at(metadata):
+    try:
+        return float((metadata or {}).get("updated_at") or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _fetch_all(collection, where=None):
+    """컬렉션을 페이지 단위로 읽어 (ids, embeddings, metadatas)를 반환합니다."""
+    ids, embeddings, metadatas = [], [], []
+    offset = 0
+    while True:
+        page = collection.get(
+            where=where,
+            include=["embeddings", "metadatas"],
+            limit=CHROMA_PAGE_SIZE,
+            offset=offset,
+        )
+        page_ids = page.get("ids") or []
+        if not page_ids:
+            break
+        ids.extend(page_ids)
+        embeddings.extend(page["embeddings"])
+        metadatas.extend(page.get("metadatas") or [{} for _ in page_ids])
+        if len(page_ids) < CHROMA_PAGE_SIZE:
+            break
+        offset += CHROMA_PAGE_SIZE
+    return ids, embeddings, metadatas
+
+
+vector_index = VectorIndex()
@@ -0,0 +1,196 @@
+"""하이브리드 검색 오프라인 벤치마크: 벡터만 vs 문자열만 vs RRF 하이브리드.
+
+    cd src/product-app
+    python -m bench.hybrid_bench --rows 50000 --queries 40
+
+synthetic 상품(search_bench.make_products)에 "개념 벡터" 임베딩을 붙여 네트워크 없이 실행합니다.
+상품 임베딩은 브랜드/품목/수식어/카테고리 개념 벡터의 합 + 잡음이고, 동의어(휴대폰 → 스마트폰)는
+같은 개념 벡터를 씁니다. 그래서 벡터 검색은 동의어에 강하고, 문자열 검색은 모델 번호 같은 정확한
+토큰에 강합니다. 질의 유형별로 정답(브랜드+품목 일치 = 2점, 품목만 일치 = 1점 등)을 정하고
+nDCG@10, MRR, P@10 과 질의당 지연(p50/p95)을 출력합니다.
+"""
+import argparse
+import asyncio
+import math
+import random
+import statistics
+import time
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+from app.hybrid import HybridSearch, HYBRID_CANDIDATES
+from app.text_index import TextIndex
+from app.vector_index import VectorIndex
+from bench.search_bench import make_products, BRANDS, ITEMS, SUFFIXES, CATEGORIES
+
+SYNONYMS = {"스마트폰": "휴대폰", "노트북": "랩탑", "이어폰": "헤드셋", "운동화": "스니커즈", "가방": "백팩",
+            "모니터": "디스플레이", "청소기": "클리너", "후드티": "후드", "충전기": "어댑터", "태블릿": "패드"}
+CONCEPT_WEIGHTS = {"brand": 1.0, "item": 1.5, "suffix": 0.3, "category": 0.5}
+K = 10
+
+
+class ConceptEmbedder:
+    def __init__(self, dim=64, noise=0.4, seed=7):
+        rng = np.random.default_rng(seed)
+        self.dim = dim
+        self.noise = noise
+        self.concepts = {}
+        for kind, words in (("brand", BRANDS), ("item", ITEMS), ("suffix", SUFFIXES), ("category", CATEGORIES)):
+            for word in words:
+                self.concepts[word] = (kind, rng.normal(size=dim))
+        for item, synonym in SYNONYMS.items():
+            self.concepts[synonym] = self.concepts[item]
+
+    def embed(self, text):
+        vec = np.zeros(self.dim)
+        for word in text.split():
+            concept = self.concepts.get(word)
+            if concept is not None:
+                vec += CONCEPT_WEIGHTS[concept[0]] * concept[1]
+        rng = np.random.default_rng(zlib.crc32(text.encode()))
+        return vec + self.noise * rng.normal(size=self.dim)
+
+
+def parse(product):
+    brand, item, suffix, number = product["name"].split(" ")
+    return brand, item, suffix, number
+
+
+def make_queries(products, n, seed=3):
+    """(유형, 검색어, {id: 관련도}) 목록."""
+    rng = random.Random(seed)
+    by_brand_item, by_item, by_item_suffix = defaultdict(set), defaultdict(set), defaultdict(set)
+    for p in products:
+        brand, item, suffix, _ = parse(p)
+        by_brand_item[brand, item].add(p["id"])
+        by_item[item].add(p["id"])
+        by_item_suffix[item, suffix].add(p["id"])
+
+    def graded(best, good):
+        judgments = {pid: 1 for pid in good}
+        judgments.update({pid: 2 for pid in best})
+        return judgments
+
+    queries = []
+    synonym_items = list(SYNONYMS)
+    for _ in range(n):
+        brand, item = rng.choice(BRANDS), rng.choice(ITEMS)
+        queries.append(("정확한 단어", f"{brand} {item}", graded(by_brand_item[brand, item], by_item[item])))
+
+        item = rng.choice(synonym_items)
+        queries.append(("동의어", f"{brand} {SYNONYMS[item]}", graded(by_brand_item[brand, item], by_item[item])))
+
+        p = rng.choice(products)
+        brand, item, suffix, number = parse(p)
+        queries.append(("모델 번호", f"{item} {number}", graded({p["id"]}, by_item_suffix[item, suffix])))
+    return queries
+
+
+def ndcg(ranked, judgments, k=K):
+    dcg = sum(judgments.get(pid, 0) / math.log2(i + 2) for i, pid in enumerate(ranked[:k]))
+    ideal = sorted(judgments.values(), reverse=True)[:k]
+    idcg = sum(g / math.log2(i + 2) for i, g in enumerate(ideal))
+    return dcg / idcg if idcg else 0.0
+
+
+def mrr(ranked, judgments):
+    for i, pid in enumerate(ranked):
+        if judgments.get(pid, 0) == 2:
+            return 1.0 / (i + 1)
+    return 0.0
+
+
+def precision(ranked, judgments, k=K):
+    return sum(1 for pid in ranked[:k] if judgments.get(pid, 0) > 0) / k
+
+
+async def run(args):
+    products = list(make_products(args.rows))
+    for p in products:
+        p["description"] = ""
+    embedder = ConceptEmbedder()
+
+    started = time.perf_counter()
+    text_index = TextIndex()
+    text_index.load(products)
+    vector_index = VectorIndex()
+    vector_index.load([str(p["id"]) for p in products],
+                      np.array([embedder.embed(f"{p['name']} {p['category']}") for p in products]),
+                      [{"category": p["category"]} for p in products])
+    print(f"synthetic 상품 {len(products)}개 색인: {time.perf_counter() - started:.1f}s")
+
+    async def vector_search(q, k, category=None):
+        where = {"category": category} if category else None
+        return [pid for pid, _ in vector_index.search(embedder.embed(q), k=k, where=where)]
+
+    async def lexical_search(q, k):
+        return [pid for pid, _ in text_index.rank(q, k)]
+
+    async def fetch_rows(ids):
+        return text_index.rows(ids)
+
+    hybrid = HybridSearch(vector_search, lexical_search, fetch_rows)
+    methods = {
+        "벡터": lambda q: vector_search(q, HYBRID_CANDIDATES),
+        "문자열": lambda q: lexical_search(q, HYBRID_CANDIDATES),
+        "하이브리드": lambda q: hybrid_ids(q),
+    }
+
+    async def hybrid_ids(q):
+        page = await hybrid.search(q, page=1, size=K)
+        return [row["id"] for row in page.rows]
+
+    queries = make_queries(products, args.queries)
+    scores = defaultdict(lambda: defaultdict(list))  # 방법 → 유형 → [(ndcg, mrr, p@10)]
+    latency = defaultdict(list)
+    for kind, q, judgments in queries:
+        for method, fn in methods.items():
+            started = time.perf_counter()
+            ranked = [int(pid) for pid in await fn(q)]
+            latency[method].append((time.perf_counter() - started) * 1000)
+            scores[method][kind].append((ndcg(ranked, judgments), mrr(ranked, judgments),
+                                         precision(ranked, judgments)))
+
+    # 캐시한 후보 목록에서 다음 페이지 꺼내기
+    for _, q, _ in queries:
+        started = time.perf_counter()
+        await hybrid.search(q, page=2, size=K)
+        latency["하이브리드 2페이지(캐시)"].append((time.perf_counter() - started) * 1000)
+    # 필터(카테고리 + 가격 + 재고) 적용
+    hybrid.clear()
+    for _, q, _ in queries:
+        started = time.perf_counter()
+        await hybrid.search(q, page=1, size=K, category=random.choice(CATEGORIES), max_price=1_500_000,
+                            in_stock=True)
+        latency["하이브리드 + 필터"].append((time.perf_counter() - started) * 1000)
+
+    kinds = list(dict.fromkeys(kind for kind, _, _ in queries))
+    print(f"\n== 관련도 (질의 유형별 {args.queries}개, nDCG@{K} / MRR / P@{K})")
+    print(f"{'':<12}" + "".join(f"{kind:>26}" for kind in kinds))
+    for method in methods:
+        cells = []
+        for kind in kinds:
+            values = scores[method][kind]
+            cells.append(" / ".join(f"{statistics.mean(v[i] for v in values):.3f}" for i in range(3)))
+        print(f"{method:<12}" + "".join(f"{c:>26}" for c in cells))
+
+    print("\n== 지연 (ms)")
+    print(f"{'':<26}{'p50':>10}{'p95':>10}")
+    for method, samples in latency.items():
+        samples.sort()
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        print(f"{method:<26}{statistics.median(samples):>10.2f}{p95:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=40, help="질의 유형별 질의 수")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""상품 대량 적재 벤치마크: 기존 create_db.py 방식 vs app.bulk_load.
+
+    cd src/product-app
+    python -m bench.load_bench --rows 1000000
+    python -m bench.load_bench --rows 1000000 --mariadb   # DB_* 환경 변수의 MariaDB 에도 적재 (products 에 행이 추가됨)
+
+synthetic 상품을 NDJSON 과 JSON 배열 파일로 흘려 쓴 뒤 다음을 비교합니다.
+- 기존 방식: json.load 로 전체를 읽고 한 행씩 INSERT (SQLite)
+- bulk_load: 스트리밍 읽기 + chunk 단위 executemany upsert (SQLite, 선택적으로 MariaDB executemany / LOAD DATA)
+각 방식은 별도 프로세스에서 실행해 행/초와 최대 RSS 증가량을 출력합니다.
+
+기존 방식은 상품명 인덱스가 없어 다시 실행하면 같은 상품이 중복으로 쌓입니다. bulk_load 는 upsert 를 위해
+UNIQUE(name) 인덱스를 유지하므로 SQLite 에서는 행/초가 더 낮게 나올 수 있습니다 (대신 메모리는 chunk 크기만큼만 사용).
+"""
+import argparse
+import json
+import os
+import sqlite3
+import multiprocessing
+import resource
+import tempfile
+import time
+
+from app.bulk_load import load, SQLiteWriter, MariaDBWriter
+from bench.search_bench import make_products
+
+
+def write_files(rows, directory):
+    """같은 상품을 NDJSON / JSON 배열 두 형식으로 씁니다. 메모리에는 한 행씩만 올립니다."""
+    ndjson_path = os.path.join(directory, "products.ndjson")
+    json_path = os.path.join(directory, "products.json")
+    with open(ndjson_path, "w", encoding="utf-8") as nd, open(json_path, "w", encoding="utf-8") as js:
+        js.write("[\n")
+        for i, p in enumerate(make_products(rows)):
+            p.pop("id")
+            p["description"] = f"{p['name']} 상품 설명입니다."
+            line = json.dumps(p, ensure_ascii=False)
+            nd.write(line + "\n")
+            js.write(("," if i else "") + line + "\n")
+        js.write("]\n")
+    return ndjson_path, json_path
+
+
+def legacy_load(json_path, db_path):
+    """기존 create_db.py 와 같은 방식."""
+    with open(json_path, "r", encoding="utf-8") as f:
+        products = json.load(f)
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS products (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, category TEXT NOT NULL,
+        price INTEGER NOT NULL, description TEXT, stock INTEGER DEFAULT 0, image_url TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    cursor = conn.cursor()
+    for product in products:
+        cursor.execute("INSERT INTO products (name, category, price, description, stock, image_url) "
+                       "VALUES (?, ?, ?, ?, ?, ?)",
+                       (product["name"], product["category"], product["price"], product["description"],
+                        product["stock"], product["image_url"]))
+    conn.commit()
+    conn.close()
+    return len(products)
+
+
+def _run(method, path, db, chunk_size):
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    if method == "legacy":
+        rows = legacy_load(path, db)
+    else:
+        writer = SQLiteWriter(db) if method == "sqlite" else MariaDBWriter(method)
+        rows = load(path, chunk_size=chunk_size, writer=writer, quiet=True)["rows"]
+    elapsed = time.perf_counter() - started
+    return rows, elapsed, (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base) / 1024
+
+
+def measure(label, method, path, db=None, chunk_size=5000):
+    """새 프로세스에서 한 번 적재합니다 (최대 RSS 가 앞선 측정의 영향을 받지 않도록)."""
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        rows, elapsed, peak_mb = pool.apply(_run, (method, path, db, chunk_size))
+    print(f"{label:<34} {rows:>9}행 {elapsed:8.1f}초 {rows / elapsed:10.0f}행/초  최대 메모리 +{peak_mb:7.1f}MB")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--skip-legacy", action="store_true", help="기존 방식 측정 생략 (메모리가 부족할 때)")
+    parser.add_argument("--mariadb", action="store_true", help="MariaDB executemany / LOAD DATA 도 측정")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        ndjson_path, json_path = write_files(args.rows, tmp)
+        print(f"📦 synthetic 상품 {args.rows}개 생성: {time.perf_counter() - started:.1f}초 "
+              f"(NDJSON {os.path.getsize(ndjson_path) / 2**20:.0f}MB)")
+
+        if not args.skip_legacy:
+            measure("기존 (json.load + 행별 INSERT)", "legacy", json_path, os.path.join(tmp, "legacy.db"))
+
+        bulk_db = os.path.join(tmp, "bulk.db")
+        measure("bulk_load SQLite (JSON 배열)", "sqlite", json_path, os.path.join(tmp, "bulk_json.db"),
+                args.chunk_size)
+        measure("bulk_load SQLite (NDJSON)", "sqlite", ndjson_path, bulk_db, args.chunk_size)
+        measure("bulk_load SQLite (NDJSON, 재적재 upsert)", "sqlite", ndjson_path, bulk_db, args.chunk_size)
+
+        if args.mariadb:
+            measure("bulk_load MariaDB (executemany)", "executemany", ndjson_path, chunk_size=args.chunk_size)
+            measure("bulk_load MariaDB (LOAD DATA)", "load-data", ndjson_path, chunk_size=args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
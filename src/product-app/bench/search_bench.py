@@ -0,0 +1,150 @@
+"""/product 필터 검색 벤치마크: 전체 스캔 vs 인덱스.
+
+    cd src/product-app
+    python -m bench.search_bench --rows 100000
+    python -m bench.search_bench --rows 100000 --mariadb   # DB_* 환경 변수의 MariaDB 에서 LIKE vs MATCH 비교
+
+synthetic 상품을 만들어 다음을 비교합니다.
+- 메모리: 모든 행을 부분 문자열로 비교(LIKE '%x%' 와 같음) vs TextIndex(n-gram 역색인)
+- SQLite: LIKE '%x%' 전체 스캔 vs 접두어 LIKE (B-tree 인덱스)
+- MariaDB(선택): LIKE '%x%' vs MATCH ... AGAINST (FULLTEXT 인덱스)
+"""
+import argparse
+import random
+import sqlite3
+import statistics
+import time
+
+from app.text_index import TextIndex
+from app.search import build_product_filter, relevance_clause
+
+BRANDS = ["삼성", "애플", "엘지", "나이키", "아디다스", "로지텍", "소니", "샤오미", "다이슨", "필립스"]
+ITEMS = ["스마트폰", "노트북", "모니터", "키보드", "마우스", "운동화", "트랙수트", "이어폰", "청소기", "면도기",
+         "태블릿", "스피커", "충전기", "가방", "후드티"]
+SUFFIXES = ["프로", "울트라", "미니", "에어", "맥스", "라이트", "플러스", "2024", "에디션", "스페셜"]
+CATEGORIES = ["전자제품", "패션", "생활가전", "스포츠", "액세서리"]
+QUERIES = [("에어", None), ("노트북", None), ("팟", None), ("삼성 모니터", None), ("키보드", "전자제품"),
+           (None, "패션"), ("존재하지않는상품", None)]
+
+
+def make_products(n, seed=42):
+    rng = random.Random(seed)
+    for i in range(1, n + 1):
+        yield {
+            "id": i,
+            "name": f"{rng.choice(BRANDS)} {rng.choice(ITEMS)} {rng.choice(SUFFIXES)} {i}",
+            "category": rng.choice(CATEGORIES),
+            "price": rng.randrange(1000, 3_000_000, 100),
+            "stock": rng.randrange(0, 500),
+            "image_url": f"/images/p{i}.jpg",
+        }
+
+
+def timeit(fn, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), len(result)
+
+
+def report(title, rows):
+    print(f"\n== {title}")
+    print(f"{'query':<28}{'scan(ms)':>12}{'index(ms)':>12}{'speedup':>10}{'hits':>8}")
+    for label, scan_ms, index_ms, hits in rows:
+        speedup = scan_ms / index_ms if index_ms else float("inf")
+        print(f"{label:<28}{scan_ms:>12.3f}{index_ms:>12.3f}{speedup:>9.1f}x{hits:>8}")
+
+
+def bench_memory(products, repeat):
+    started = time.perf_counter()
+    index = TextIndex()
+    index.load(products)
+    print(f"TextIndex 색인: {len(index)}행, {time.perf_counter() - started:.2f}s")
+
+    def scan(name, category):
+        n = (name or "").casefold()
+        c = (category or "").casefold()
+        return [p for p in products
+                if (not name or n in p["name"].casefold()) and (not category or c in p["category"].casefold())]
+
+    rows = []
+    for name, category in QUERIES:
+        scan_ms, hits = timeit(lambda: scan(name, category), repeat)
+        index_ms, index_hits = timeit(lambda: index.filter(name, category), repeat)
+        assert hits == index_hits, (name, category, hits, index_hits)
+        rows.append((f"{name} / {category}", scan_ms, index_ms, hits))
+    report("메모리: 부분 문자열 스캔 vs n-gram 역색인", rows)
+
+
+def bench_sqlite(products, repeat):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT COLLATE NOCASE, category TEXT COLLATE NOCASE,"
+                 " price INTEGER, stock INTEGER, image_url TEXT)")
+    conn.executemany("INSERT INTO products VALUES (:id, :name, :category, :price, :stock, :image_url)", products)
+    conn.execute("CREATE INDEX idx_products_name ON products (name COLLATE NOCASE)")
+    conn.execute("CREATE INDEX idx_products_category ON products (category COLLATE NOCASE)")
+    conn.execute("PRAGMA case_sensitive_like = OFF")
+
+    rows = []
+    for term in ["삼성", "애플 노트북", "로지텍"]:
+        scan_ms, hits = timeit(lambda: conn.execute(
+            "SELECT * FROM products WHERE name LIKE ?", (f"%{term}%",)).fetchall(), repeat)
+        where, params = build_product_filter(f"{term}*", placeholder="?")
+        index_ms, index_hits = timeit(lambda: conn.execute(
+            f"SELECT * FROM products WHERE {where}", params).fetchall(), repeat)
+        rows.append((f"{term}*", scan_ms, index_ms, index_hits))
+    report("SQLite: LIKE '%x%' 스캔 vs 접두어 LIKE (인덱스)", rows)
+    conn.close()
+
+
+def bench_mariadb(products, repeat):
+    from app.database import get_db
+
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DROP TABLE IF EXISTS products_bench")
+        cursor.execute(
+            "CREATE TABLE products_bench (id INT PRIMARY KEY, name VARCHAR(255), category VARCHAR(100),"
+            " price INT, stock INT, image_url VARCHAR(255), description TEXT,"
+            " INDEX idx_name (name), FULLTEXT INDEX ft_name (name))"
+        )
+        batch = [(p["id"], p["name"], p["category"], p["price"], p["stock"], p["image_url"], "") for p in products]
+        for start in range(0, len(batch), 5000):
+            cursor.executemany("INSERT INTO products_bench VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                               batch[start:start + 5000])
+        conn.commit()
+
+        def run(sql, params):
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+        rows = []
+        for term in ["노트북", "다이슨 청소기", "트랙수트"]:
+            scan_ms, _ = timeit(lambda: run("SELECT * FROM products_bench WHERE name LIKE %s", (f"%{term}%",)), repeat)
+            where, params = relevance_clause("name", term)
+            index_ms, hits = timeit(lambda: run(f"SELECT * FROM products_bench WHERE {where}", params), repeat)
+            rows.append((term, scan_ms, index_ms, hits))
+        report("MariaDB: LIKE '%x%' 스캔 vs FULLTEXT", rows)
+        cursor.execute("DROP TABLE products_bench")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--mariadb", action="store_true", help="DB_* 환경 변수의 MariaDB 에서도 측정")
+    args = parser.parse_args()
+
+    products = list(make_products(args.rows))
+    print(f"synthetic 상품 {len(products)}개 생성")
+    bench_memory(products, args.repeat)
+    bench_sqlite(products, args.repeat)
+    if args.mariadb:
+        bench_mariadb(products, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
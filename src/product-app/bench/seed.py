@@ -0,0 +1,102 @@
+"""부하 테스트용 상품 카탈로그 준비 (loadtest/ 참고).
+
+    cd src/product-app   (컨테이너에서는 /app)
+    EMBEDDING_BACKEND=fake python -m bench.seed --rows 10000 --reset --embed      # MariaDB + ChromaDB
+    python -m bench.seed --rows 10000 --reset --target sqlite --sqlite-path /tmp/products.db
+
+search_bench.make_products 로 같은 rows 면 항상 같은 상품(이름/카테고리/가격/재고)을 만들고,
+app.bulk_load 로 적재합니다. --reset 은 기존 상품을 비우고 id 를 1 부터 다시 매기므로
+카탈로그 크기별로 같은 데이터를 다시 만들 수 있습니다.
+--embed 는 ChromaDB 에도 upsert 합니다. EMBEDDING_BACKEND=fake 면 OpenAI 없이 결정적인 벡터가 들어가고,
+같은 설정으로 띄운 product-app 의 검색어 임베딩도 같은 FakeEmbedder 를 씁니다.
+
+MariaDB 에 products 테이블이 없으면 만들고 app.migrations 를 적용합니다 (인덱스/cache_versions 등).
+"""
+import argparse
+import json
+import os
+import tempfile
+
+from app.bulk_load import load, SQLiteWriter, MariaDBWriter
+from bench.search_bench import make_products
+
+CREATE_PRODUCTS = """
+CREATE TABLE IF NOT EXISTS products (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    category VARCHAR(100),
+    price INT DEFAULT 0,
+    description TEXT,
+    stock INT DEFAULT 0,
+    image_url VARCHAR(255),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+def write_catalog(rows, path):
+    """synthetic 상품 rows 개를 NDJSON 으로 씁니다 (id 는 적재 순서대로 DB 가 매김)."""
+    with open(path, "w", encoding="utf-8") as f:
+        for p in make_products(rows):
+            p.pop("id")
+            p["description"] = f"{p['name']} 상품입니다. {p['category']} 카테고리."
+            f.write(json.dumps(p, ensure_ascii=False) + "\n")
+
+
+def prepare_mariadb(reset):
+    from app.database import get_db
+    from app.migrations import migrate
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(CREATE_PRODUCTS)
+        migrate(conn)
+        if reset:
+            cursor.execute("TRUNCATE TABLE products")  # AUTO_INCREMENT 도 1 부터
+            cursor.execute("TRUNCATE TABLE product_outbox")
+            print("🗑️ products 테이블을 비웠습니다.")
+
+
+def reset_chroma():
+    from common import clients
+    try:
+        clients.get_chroma().delete_collection(clients.CHROMA_COLLECTION)
+        print(f"🗑️ {clients.CHROMA_COLLECTION} 컬렉션을 지웠습니다.")
+    except Exception:
+        pass
+    clients.invalidate_collection()
+
+
+def seed(rows, target="mariadb", sqlite_path="./db/loadtest.db", reset=False, embed=False, chunk_size=5000,
+         mode="executemany"):
+    if target == "sqlite":
+        if reset and os.path.exists(sqlite_path):
+            os.remove(sqlite_path)
+        writer = SQLiteWriter(sqlite_path)
+    else:
+        prepare_mariadb(reset)
+        writer = MariaDBWriter(mode)
+    if embed and reset:
+        reset_chroma()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.ndjson")
+        write_catalog(rows, path)
+        print(f"📦 synthetic 상품 {rows}개 적재 ({target}{', ChromaDB' if embed else ''})")
+        return load(path, chunk_size=chunk_size, embed=embed, writer=writer)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000, help="카탈로그 크기")
+    parser.add_argument("--target", choices=["mariadb", "sqlite"], default="mariadb")
+    parser.add_argument("--sqlite-path", default="./db/loadtest.db")
+    parser.add_argument("--reset", action="store_true", help="기존 상품(과 --embed 면 ChromaDB 컬렉션)을 비우고 적재")
+    parser.add_argument("--embed", action="store_true", help="ChromaDB 에도 임베딩 저장")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--mode", choices=["executemany", "load-data"], default="executemany")
+    args = parser.parse_args()
+    seed(args.rows, args.target, args.sqlite_path, args.reset, args.embed, args.chunk_size, args.mode)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""common.clients.CircuitBreaker 테스트 (네트워크 없음).
+
+half-open 에서 탐색 호출 하나만 통과하고, 그 결과에 따라 닫히거나 다시 열리는지 확인합니다.
+"""
+import time
+
+import pytest
+
+from common.clients import CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture
+def breaker():
+    breaker = CircuitBreaker("test", max_failures=2, reset_after=0.05)
+    for _ in range(2):
+        breaker.allow()
+        breaker.failure()
+    return breaker
+
+
+def half_open(breaker):
+    time.sleep(breaker.reset_after)
+    assert breaker.state == "half-open"
+
+
+def test_opens_after_consecutive_failures(breaker):
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_half_open_lets_one_probe_through(breaker):
+    half_open(breaker)
+    breaker.allow()  # 탐색 호출
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    breaker.success()
+    assert breaker.state == "closed"
+    breaker.allow()
+    breaker.allow()
+
+
+def test_failed_probe_reopens(breaker):
+    half_open(breaker)
+    breaker.allow()
+    breaker.failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+    half_open(breaker)
+    breaker.allow()  # 다시 열린 뒤에는 새 탐색 호출이 통과
+
+
+def test_check_does_not_take_the_probe(breaker):
+    half_open(breaker)
+    breaker.check()
+    breaker.check()
+    breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+
+def test_aborted_probe_frees_the_slot(breaker):
+    half_open(breaker)
+    breaker.allow()
+    breaker.abort()
+    breaker.allow()
+
+
+def test_lost_probe_expires(breaker):
+    half_open(breaker)
+    breaker.allow()  # 결과를 알리지 않은 탐색 호출
+    time.sleep(breaker.reset_after)
+    breaker.allow()
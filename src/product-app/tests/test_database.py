@@ -0,0 +1,107 @@
+"""app.database.AsyncConnectionPool 테스트 (가짜 커넥션, DB 없음).
+
+취소된 요청의 커넥션이 다른 요청에 빌려지지 않고, 쓰던 스레드가 끝난 뒤에 닫히는지 확인합니다.
+"""
+import asyncio
+import threading
+
+from app.database import AsyncConnectionPool
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        assert self.conn.open, "닫힌 커넥션에서 쿼리를 실행했습니다."
+        self.conn.running = True
+        self.conn.gate.wait(5)
+        self.conn.running = False
+        assert self.conn.open, "쿼리가 끝나기 전에 커넥션이 닫혔습니다."
+
+    def fetchall(self):
+        return [{"id": self.conn.number}]
+
+    def fetchone(self):
+        return {"id": self.conn.number}
+
+
+class FakeConnection:
+    def __init__(self, number, gate):
+        self.number = number
+        self.gate = gate
+        self.open = True
+        self.running = False
+        self.closed_while_running = False
+
+    def cursor(self, *args):
+        return FakeCursor(self)
+
+    def ping(self, reconnect):
+        pass
+
+    def close(self):
+        self.closed_while_running = self.running
+        self.open = False
+
+
+def make_pool(gate):
+    conns = []
+
+    def connect():
+        conn = FakeConnection(len(conns), gate)
+        conns.append(conn)
+        return conn
+
+    return AsyncConnectionPool(connect, min_size=0, max_size=2, acquire_timeout=1), conns
+
+
+def test_connection_is_reused():
+    gate = threading.Event()
+    gate.set()
+    pool, conns = make_pool(gate)
+
+    async def scenario():
+        first = await pool.fetchone("SELECT 1")
+        second = await pool.fetchall("SELECT 1")
+        return first, second
+
+    assert asyncio.run(scenario()) == ({"id": 0}, [{"id": 0}])
+    assert len(conns) == 1
+    assert pool.stats()["discarded"] == 0
+
+
+def test_cancelled_query_closes_connection_after_thread_finishes():
+    gate = threading.Event()
+    pool, conns = make_pool(gate)
+
+    async def scenario():
+        task = asyncio.create_task(pool.fetchone("SELECT SLEEP(10)"))
+        while not (conns and conns[0].running):
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+        # 스레드는 아직 쿼리 중: 닫지도, 다른 요청에 빌려주지도 않음
+        assert conns[0].open
+        assert pool.stats()["idle"] == 0
+
+        gate.set()
+        for _ in range(100):
+            if not conns[0].open:
+                break
+            await asyncio.sleep(0.01)
+        return await pool.fetchone("SELECT 1")
+
+    assert asyncio.run(scenario()) == {"id": 1}
+    assert not conns[0].open
+    assert not conns[0].closed_while_running
+    stats = pool.stats()
+    assert stats["discarded"] == 1
+    assert stats["in_use"] == 0
@@ -0,0 +1,145 @@
+"""common.embedding.EmbeddingService 테스트 (FakeEmbedder, 네트워크 없음).
+
+요청 합치기, 배치, 캐시, 한 호출자의 취소가 다른 호출자에 번지지 않는지, 배치 에러 전달을 확인합니다.
+"""
+import asyncio
+import threading
+
+import pytest
+
+from common.embedding import EmbeddingService, FakeEmbedder
+
+
+class GatedEmbedder(FakeEmbedder):
+    """gate 가 열릴 때까지 API 호출을 붙잡아 두는 FakeEmbedder. fail 에 든 텍스트가 있으면 배치 전체 실패."""
+
+    def __init__(self, fail=()):
+        super().__init__()
+        self.gate = threading.Event()
+        self.fail = set(fail)
+        self.batches = []
+
+    def embed_batch(self, texts):
+        self.gate.wait(5)
+        self.batches.append(list(texts))
+        if self.fail & set(texts):
+            raise ValueError("잘못된 입력")
+        return super().embed_batch(texts)
+
+
+@pytest.fixture
+def service():
+    services = []
+
+    def make(embedder, **options):
+        options.setdefault("batch_window", 0.02)
+        svc = EmbeddingService(embedder, **options)
+        services.append(svc)
+        return svc
+
+    yield make
+    for svc in services:
+        svc.close()
+
+
+def test_concurrent_misses_are_coalesced_and_batched(service):
+    embedder = GatedEmbedder()
+    svc = service(embedder)
+
+    async def run():
+        tasks = [asyncio.ensure_future(svc.aembed(t)) for t in ["hello", "hello", " Hello ", "other"]]
+        await asyncio.sleep(0.05)
+        embedder.gate.set()
+        return await asyncio.gather(*tasks)
+
+    hello, hello2, hello3, other = asyncio.run(run())
+    assert hello == hello2 == hello3 == FakeEmbedder().embed_one("hello")
+    assert other == FakeEmbedder().embed_one("other")
+    assert embedder.batches == [["hello", "other"]]
+    stats = svc.stats()
+    assert (stats["requests"], stats["coalesced"], stats["api_calls"], stats["inflight"]) == (4, 2, 1, 0)
+
+
+def test_memory_cache_hit_skips_api(service):
+    embedder = FakeEmbedder()
+    svc = service(embedder)
+    first = svc.embed("캐시 테스트")
+    assert svc.embed("캐시 테스트") == first
+    assert svc.embed_many(["캐시 테스트", "캐시 테스트"]) == [first, first]
+    assert embedder.calls == 1
+    assert svc.stats()["memory_hits"] == 3
+
+
+def test_cancelled_caller_does_not_affect_others(service):
+    embedder = GatedEmbedder()
+    svc = service(embedder)
+
+    async def run():
+        cancelled = asyncio.ensure_future(svc.aembed("hello"))
+        coalesced = asyncio.ensure_future(svc.aembed("hello"))
+        other = asyncio.ensure_future(svc.aembed("other"))
+        await asyncio.sleep(0.05)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        embedder.gate.set()
+        results = await asyncio.gather(cancelled, coalesced, other, return_exceptions=True)
+        return results
+
+    cancelled, coalesced, other = asyncio.run(run())
+    assert isinstance(cancelled, asyncio.CancelledError)
+    assert coalesced == FakeEmbedder().embed_one("hello")
+    assert other == FakeEmbedder().embed_one("other")
+    # 취소된 키도 결과가 캐시에 남아 다음 호출은 API 를 부르지 않음
+    assert svc.embed("hello") == coalesced
+    assert len(embedder.batches) == 1
+
+
+def test_cancelled_aembed_many_keeps_shared_keys_alive(service):
+    embedder = GatedEmbedder()
+    svc = service(embedder)
+
+    async def run():
+        many = asyncio.ensure_future(svc.aembed_many(["a", "b"]))
+        single = asyncio.ensure_future(svc.aembed("b"))
+        await asyncio.sleep(0.05)
+        many.cancel()
+        embedder.gate.set()
+        return await asyncio.gather(many, single, return_exceptions=True)
+
+    many, single = asyncio.run(run())
+    assert isinstance(many, asyncio.CancelledError)
+    assert single == FakeEmbedder().embed_one("b")
+
+
+def test_batch_error_reaches_every_waiter(service):
+    embedder = GatedEmbedder(fail={"bad"})
+    embedder.gate.set()
+    svc = service(embedder)
+
+    async def run():
+        tasks = [svc.aembed("bad"), svc.aembed("bad"), svc.aembed("ok")]
+        return await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), 5)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert svc.stats()["api_errors"] == 1
+    assert svc.stats()["inflight"] == 0
+    # 실패는 캐시하지 않으므로 다음 호출은 다시 시도
+    assert svc.embed("ok") == FakeEmbedder().embed_one("ok")
+
+
+def test_short_response_fails_only_missing_keys(service):
+    class Short(FakeEmbedder):
+        def embed_batch(self, texts):
+            return super().embed_batch(texts)[:-1]
+
+    svc = service(Short())
+
+    async def run():
+        tasks = [svc.aembed(t) for t in ["one", "two", "three"]]
+        return await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), 5)
+
+    one, two, three = asyncio.run(run())
+    assert one == FakeEmbedder().embed_one("one") and two == FakeEmbedder().embed_one("two")
+    assert isinstance(three, ValueError)
+    assert svc.stats()["inflight"] == 0
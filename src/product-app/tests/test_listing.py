@@ -0,0 +1,96 @@
+"""app.listing keyset 페이지네이션 테스트 (sqlite 메모리 DB, MariaDB 없음).
+
+모든 정렬에서 커서로 끝까지 넘겼을 때 빠지거나 겹치는 행이 없는지, 같은 가격이 여러 페이지에 걸쳐도
+순서가 유지되는지, TextIndex.page() 가 같은 페이지를 만드는지 확인합니다.
+"""
+import sqlite3
+
+import pytest
+
+from app.listing import SORTS, InvalidCursor, decode_cursor, encode_cursor, listing_query, make_page
+from app.text_index import TextIndex
+
+# 같은 가격이 여러 개씩 (페이지 경계에 동점이 걸치도록)
+PRICES = [3000, 1000, 1000, 2000, 1000, 3000, 2000, 1000, 3000, 1000, 2000, 2000, 1000]
+ROWS = [
+    {"id": i, "name": f"{'케이스' if i % 3 else '충전기'} {i}", "category": "액세서리",
+     "price": price, "stock": 1, "image_url": None}
+    for i, price in enumerate(PRICES, start=1)
+]
+
+
+@pytest.fixture(scope="module")
+def db():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT, category TEXT,"
+                 " price INTEGER, stock INTEGER, image_url TEXT)")
+    conn.executemany("INSERT INTO products VALUES (:id, :name, :category, :price, :stock, :image_url)", ROWS)
+    yield conn
+    conn.close()
+
+
+def expected_order(rows, sort):
+    column, desc = SORTS[sort]
+    return [r["id"] for r in sorted(rows, key=lambda r: (r[column], r["id"]) if column else r["id"],
+                                    reverse=desc)]
+
+
+def sql_pages(db, sort, limit, where="1=1", params=()):
+    """listing_query + make_page 로 마지막 페이지까지 넘긴 id 페이지 목록."""
+    pages, cursor = [], None
+    while True:
+        sql, args = listing_query(where, params, sort, cursor, limit)
+        rows = [dict(r) for r in db.execute(sql.replace("%s", "?"), args)]
+        rows, cursor = make_page(rows, sort, limit)
+        pages.append([r["id"] for r in rows])
+        if cursor is None:
+            return pages
+        assert len(pages) <= len(ROWS), "커서가 앞으로 나아가지 않습니다."
+
+
+@pytest.mark.parametrize("sort", list(SORTS))
+def test_cursor_round_trip(sort):
+    column, _ = SORTS[sort]
+    row = ROWS[4]
+    key = decode_cursor(sort, encode_cursor(sort, row))
+    assert key == ([row[column], row["id"]] if column else [row["id"]])
+
+
+@pytest.mark.parametrize("sort", list(SORTS))
+@pytest.mark.parametrize("limit", [1, 2, 3, 5, len(ROWS), len(ROWS) + 1])
+def test_pages_cover_every_row_once(db, sort, limit):
+    pages = sql_pages(db, sort, limit)
+    assert [pid for page in pages for pid in page] == expected_order(ROWS, sort)
+    assert all(len(page) == limit for page in pages[:-1])
+
+
+@pytest.mark.parametrize("sort", list(SORTS))
+@pytest.mark.parametrize("limit", [1, 2, 4])
+def test_text_index_pages_match_sql(db, sort, limit):
+    index = TextIndex()
+    index.load(ROWS)
+
+    pages, cursor = [], None
+    while True:
+        rows, cursor = index.page(sort=sort, cursor=cursor, limit=limit)
+        pages.append([r["id"] for r in rows])
+        if cursor is None:
+            break
+    assert pages == sql_pages(db, sort, limit)
+
+    pages, cursor = [], None
+    while True:
+        rows, cursor = index.page(name="케이스", sort=sort, cursor=cursor, limit=limit)
+        pages.append([r["id"] for r in rows])
+        if cursor is None:
+            break
+    assert pages == sql_pages(db, sort, limit, "name LIKE %s", ["%케이스%"])
+
+
+def test_cursor_from_another_sort_is_rejected():
+    cursor = encode_cursor("price_asc", ROWS[0])
+    with pytest.raises(InvalidCursor):
+        decode_cursor("newest", cursor)
+    with pytest.raises(InvalidCursor):
+        decode_cursor("id", "not-a-cursor")
@@ -0,0 +1,18 @@
+"""pytest 설정: 테스트에서 worker3 모듈과 공용 모듈(common)을 import 할 수 있게 합니다.
+
+외부 서비스 없이 돌도록 임베딩/GPT 설명은 fake 백엔드, 설명 캐시는 끕니다.
+
+    cd src/worker-notion
+    python -m pytest tests
+"""
+import os
+import sys
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (APP_DIR, os.path.dirname(APP_DIR)):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+os.environ.setdefault("EMBEDDING_BACKEND", "fake")
+os.environ.setdefault("DESCRIPTION_CACHE_PATH", "")
+os.environ.setdefault("OPENAI_API_KEY", "test")
@@ -0,0 +1,310 @@
+"""worker3 의 새 상품 설명(GPT) 생성.
+
+- 프롬프트 해시를 키로 하는 SQLite 캐시 (DESCRIPTION_CACHE_PATH)
+  같은 상품명+카테고리는 재시도/실패한 주기, 재시작 뒤에도 다시 생성하지 않습니다.
+- 같은 프롬프트는 한 번만 요청 (한 호출 안의 중복 + 다른 스레드에서 진행 중인 요청 합치기)
+- 묶음 생성: 캐시 미스를 DESCRIPTION_BATCH_SIZE 개씩 한 번의 chat.completions 요청(JSON 응답)으로 만듭니다.
+  응답을 해석하지 못한 묶음은 한 개씩 다시 요청합니다.
+- 동시 요청 수(OPENAI_CONCURRENCY)와 초당 요청 수(DESCRIPTION_RATE) 제한
+- 끝내 실패하면 기본 문구를 돌려주지만 캐시하지 않습니다.
+- 네트워크 없이 쓰는 FakeDescriber (DESCRIPTION_BACKEND=fake, FAKE_LLM_LATENCY 로 응답 시간 흉내)
+
+    python enrichment.py bench --products 2000 --duplicates 0.3 --latency 0.8   # 오프라인 처리량 측정
+"""
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import argparse
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from common import metrics
+from notion_api import TokenBucket
+
+DESCRIPTION_BACKEND = os.getenv("DESCRIPTION_BACKEND", os.getenv("EMBEDDING_BACKEND", "openai"))  # openai | fake
+DESCRIPTION_MODEL = os.getenv("DESCRIPTION_MODEL", "gpt-3.5-turbo")
+DESCRIPTION_CACHE_PATH = os.getenv("DESCRIPTION_CACHE_PATH", "worker3_descriptions.sqlite3")  # 비우면 캐시 안 함
+DESCRIPTION_BATCH_SIZE = int(os.getenv("DESCRIPTION_BATCH_SIZE", "20"))    # 요청 하나에 묶을 상품 수 (1 이면 한 개씩)
+OPENAI_CONCURRENCY = int(os.getenv("OPENAI_CONCURRENCY", "4"))             # 동시에 보낼 GPT 요청 수
+DESCRIPTION_RATE = float(os.getenv("DESCRIPTION_RATE", "2"))               # 초당 GPT 요청 수 (0 이면 제한 없음)
+FAKE_LLM_LATENCY = float(os.getenv("FAKE_LLM_LATENCY", "0"))               # FakeDescriber 요청 하나의 지연(초)
+FALLBACK_DESCRIPTION = "멋진 상품입니다!"
+
+
+def description_prompt(name, category):
+    return f"상품명: {name}, 카테고리: {category}. 이 상품을 홍보하는 짧고 매력적인 문구 한 줄을 써줘."
+
+
+def prompt_key(model, prompt):
+    """캐시 키. 묶음으로 만들어도 상품 하나의 프롬프트로 저장하므로 생성 방식과 상관없이 재사용됩니다."""
+    normalized = " ".join(prompt.split())
+    return hashlib.blake2b(f"{model}\n{normalized}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+def bulk_prompt(products):
+    lines = [f"{i}. 상품명: {name}, 카테고리: {category}" for i, (name, category) in enumerate(products, 1)]
+    return ("아래 상품마다 홍보하는 짧고 매력적인 문구 한 줄을 써줘. "
+            f'상품 순서대로 {len(products)}개를 {{"descriptions": ["문구", ...]}} 형식의 JSON 으로만 답해줘.\n'
+            + "\n".join(lines))
+
+
+def parse_bulk(content, count):
+    """묶음 응답 → 문구 목록. 개수나 형식이 맞지 않으면 ValueError."""
+    data = json.loads(content)
+    texts = data.get("descriptions") if isinstance(data, dict) else data
+    if not isinstance(texts, list) or len(texts) != count:
+        raise ValueError(f"묶음 응답 개수가 맞지 않습니다 ({count}개 요청)")
+    texts = [t.strip() if isinstance(t, str) else "" for t in texts]
+    if not all(texts):
+        raise ValueError("묶음 응답에 빈 문구가 있습니다")
+    return texts
+
+
+class SQLiteDescriptionCache:
+    """프롬프트 해시 → 생성한 문구. worker3 가 재시작돼도 남습니다."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS descriptions ("
+            " key TEXT PRIMARY KEY, text TEXT NOT NULL, model TEXT, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys):
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, text FROM descriptions WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def set_many(self, items, model=""):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO descriptions VALUES (?, ?, ?, ?)",
+                                   [(key, text, model, now) for key, text in items])
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM descriptions").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class OpenAIDescriber:
+    """chat.completions 로 문구를 만듭니다. 여러 상품은 한 요청에 JSON 으로 묶습니다."""
+
+    def __init__(self, client, model=DESCRIPTION_MODEL):
+        self.client = client
+        self.model = model
+
+    def describe_batch(self, products):
+        if len(products) == 1:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": description_prompt(*products[0])}]
+            )
+            return [response.choices[0].message.content.strip()]
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": bulk_prompt(products)}],
+            response_format={"type": "json_object"}
+        )
+        return parse_bulk(response.choices[0].message.content, len(products))
+
+
+class FakeDescriber:
+    """오프라인 테스트용 결정적 문구. 요청 하나마다 latency 초 걸리는 것처럼 흉내 냅니다."""
+
+    def __init__(self, latency=FAKE_LLM_LATENCY, model="fake"):
+        self.latency = latency
+        self.model = model
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def describe_batch(self, products):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        texts = []
+        for name, category in products:
+            tag = hashlib.blake2b(f"{name}|{category}".encode("utf-8"), digest_size=2).hexdigest()
+            texts.append(f"{category} 고민은 이제 끝! 매일 손이 가는 {name} (#{tag})")
+        return texts
+
+
+class DescriptionService:
+    """캐시, 요청 합치기, 묶음 생성, 속도 제한을 묶은 설명 생성기. describe_many 는 여러 스레드에서 불러도 됩니다."""
+
+    def __init__(self, describer, cache=None, batch_size=DESCRIPTION_BATCH_SIZE,
+                 concurrency=OPENAI_CONCURRENCY, rate=DESCRIPTION_RATE, fallback=FALLBACK_DESCRIPTION):
+        self.describer = describer
+        self.cache = cache
+        self.batch_size = max(1, batch_size)
+        self.model = getattr(describer, "model", "")
+        self.fallback = fallback
+        self.bucket = TokenBucket(rate, max(1, concurrency)) if rate > 0 else None
+        self._pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="gpt")
+        self._lock = threading.Lock()
+        self._inflight = {}  # 프롬프트 키 → 생성 중인 Future
+        self._stats = {"requests": 0, "cache_hits": 0, "coalesced": 0, "generated": 0,
+                       "api_calls": 0, "api_errors": 0, "bulk_fallbacks": 0, "fallbacks": 0}
+
+    def describe_many(self, products):
+        """[(상품명, 카테고리)] → 같은 순서의 문구 목록."""
+        keys = [prompt_key(self.model, description_prompt(name, category)) for name, category in products]
+        unique = dict(zip(keys, products))
+        results = {}
+        if self.cache is not None and unique:
+            try:
+                results = self.cache.get_many(list(unique))
+            except sqlite3.Error as e:
+                print(f"⚠️ 설명 캐시 조회 에러: {e}")
+
+        futures, mine = {}, []
+        with self._lock:
+            self._stats["requests"] += len(keys)
+            self._stats["cache_hits"] += sum(1 for k in keys if k in results)
+            for key in unique:
+                if key in results:
+                    continue
+                future = self._inflight.get(key)
+                if future is None:
+                    future = self._inflight[key] = Future()
+                    mine.append(key)
+                else:
+                    self._stats["coalesced"] += 1
+                futures[key] = future
+            self._stats["coalesced"] += len(keys) - len(unique)
+
+        jobs = [self._pool.submit(self._generate, [(k, unique[k]) for k in mine[i:i + self.batch_size]])
+                for i in range(0, len(mine), self.batch_size)]
+        for job in jobs:
+            job.result()
+        for key, future in futures.items():
+            results[key] = future.result()
+
+        texts = []
+        for key in keys:
+            text = results.get(key)
+            if text is None:
+                with self._lock:
+                    self._stats["fallbacks"] += 1
+                text = self.fallback
+            texts.append(text)
+        return texts
+
+    def _call(self, products):
+        if self.bucket is not None:
+            self.bucket.acquire()
+        with self._lock:
+            self._stats["api_calls"] += 1
+        try:
+            with metrics.span("worker.gpt"):
+                return self.describer.describe_batch(products)
+        except Exception:
+            with self._lock:
+                self._stats["api_errors"] += 1
+            raise
+
+    def _generate(self, items):
+        """items: [(키, (상품명, 카테고리))]. 결과를 Future 에 넣습니다 (실패한 것은 None). 예외를 내지 않습니다."""
+        generated = {}
+        try:
+            generated = dict(zip((k for k, _ in items), self._call([p for _, p in items])))
+        except Exception as e:
+            print(f"⚠️ GPT 에러: {e}")
+            if len(items) > 1:
+                with self._lock:
+                    self._stats["bulk_fallbacks"] += 1
+                for key, product in items:
+                    try:
+                        generated[key] = self._call([product])[0]
+                    except Exception as item_error:
+                        print(f"⚠️ GPT 에러 ({product[0]}): {item_error}")
+        if generated and self.cache is not None:
+            try:
+                self.cache.set_many(list(generated.items()), self.model)
+            except sqlite3.Error as e:
+                print(f"⚠️ 설명 캐시 저장 에러: {e}")
+        with self._lock:
+            self._stats["generated"] += len(generated)
+            for key, _ in items:
+                self._inflight.pop(key).set_result(generated.get(key))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["inflight"] = len(self._inflight)
+        if self.bucket is not None:
+            stats["rate_wait"] = round(self.bucket.waited, 3)
+        return stats
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        if self.cache is not None:
+            self.cache.close()
+
+
+def create_description_service(openai_client=None, backend=DESCRIPTION_BACKEND, **options):
+    """환경 변수 설정대로 DescriptionService 를 만듭니다."""
+    if backend == "fake":
+        describer = FakeDescriber()
+    else:
+        if openai_client is None:
+            raise ValueError("openai 백엔드에는 OpenAI 클라이언트가 필요합니다.")
+        describer = OpenAIDescriber(openai_client)
+    cache = SQLiteDescriptionCache(DESCRIPTION_CACHE_PATH) if DESCRIPTION_CACHE_PATH else None
+    return DescriptionService(describer, cache=cache, **options)
+
+
+def bench(args):
+    """FakeDescriber 로 새 상품 args.products 개를 SYNC_BATCH_SIZE 묶음처럼 나눠 설명을 만들고 처리량을 봅니다."""
+    import tempfile
+    count = args.products
+    unique = max(1, int(count * (1 - args.duplicates)))
+    products = [(f"상품 {i % unique}", ["전자기기", "의류", "식품", "도서"][i % 4]) for i in range(count)]
+    with tempfile.TemporaryDirectory() as tmp:
+        for run in ("cold", "warm"):
+            describer = FakeDescriber(args.latency)
+            service = DescriptionService(describer, SQLiteDescriptionCache(os.path.join(tmp, "cache.sqlite3")),
+                                         batch_size=args.batch_size, concurrency=args.concurrency, rate=args.rate)
+            started = time.perf_counter()
+            for i in range(0, count, args.chunk):
+                service.describe_many(products[i:i + args.chunk])
+            elapsed = time.perf_counter() - started
+            print(f"📈 {run}: 상품 {count:,}개 / {elapsed:.2f}초 = {count / elapsed:,.0f}개/초, "
+                  f"LLM 요청 {describer.calls}회 / {service.stats()}")
+            service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench_parser = sub.add_parser("bench", help="FakeDescriber 로 설명 생성 처리량 측정")
+    bench_parser.add_argument("--products", type=int, default=2000)
+    bench_parser.add_argument("--duplicates", type=float, default=0.3, help="이름+카테고리가 겹치는 비율")
+    bench_parser.add_argument("--chunk", type=int, default=50, help="describe_many 한 번에 넘길 상품 수 (SYNC_BATCH_SIZE)")
+    bench_parser.add_argument("--batch-size", type=int, default=DESCRIPTION_BATCH_SIZE)
+    bench_parser.add_argument("--concurrency", type=int, default=OPENAI_CONCURRENCY)
+    bench_parser.add_argument("--rate", type=float, default=0)
+    bench_parser.add_argument("--latency", type=float, default=0.8, help="가짜 LLM 요청 하나의 지연(초)")
+    args = parser.parse_args()
+    bench(args)
+
+
+if __name__ == "__main__":
+    main()
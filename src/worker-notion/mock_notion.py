@@ -0,0 +1,214 @@
+"""테스트용 로컬 노션 API 서버.
+
+worker3 가 쓰는 엔드포인트만 흉내 냅니다.
+- POST  /v1/databases/{id}/query : last_edited_time 필터, 정렬, page_size / start_cursor 페이지네이션
+- PATCH /v1/pages/{id}           : 속성 갱신 + last_edited_time 변경
+- POST  /v1/pages                : 페이지 추가 (테스트 데이터 준비용)
+- GET   /_stats                  : 받은 요청 수
+
+rate_limit 을 주면 노션처럼 평균 초당 rate_limit 회(같은 수만큼의 순간 몰림 허용)를 넘는 요청에
+429 + Retry-After 를 돌려주고,
+latency 를 주면 요청마다 그만큼 지연시킵니다 (실제 API 왕복 시간 흉내).
+
+    cd src/worker-notion
+    python mock_notion.py --pages 500 --port 8765 --rate-limit 3 --latency 0.2
+    NOTION_API_URL=http://127.0.0.1:8765/v1 NOTION_DB_ID=mock EMBEDDING_BACKEND=fake python worker3.py
+    (EMBEDDING_BACKEND=fake 면 GPT 설명도 enrichment.FakeDescriber 로 만듭니다. FAKE_LLM_LATENCY=0.8 로 응답 시간 흉내)
+
+노션처럼 last_edited_time 은 분 단위로 잘라서 기록합니다.
+tests/test_sync.py 가 serve() 로 이 서버를 띄워 worker3.sync_once 를 확인합니다.
+"""
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MAX_PAGE_SIZE = 100
+
+
+def notion_time(dt=None):
+    dt = (dt or datetime.now(timezone.utc)).replace(second=0, microsecond=0)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def make_page(name, category=None, price=None, stock=None, image_url=None, description="", edited=None):
+    """노션 API 응답과 같은 모양의 페이지 dict."""
+    return {
+        "object": "page",
+        "id": str(uuid.uuid4()),
+        "last_edited_time": edited or notion_time(),
+        "properties": {
+            "name": {"title": [{"plain_text": name}]},
+            "category": {"select": {"name": category} if category else None},
+            "price": {"number": price},
+            "stock": {"number": stock},
+            "image_url": {"url": image_url},
+            "description": {"rich_text": [{"plain_text": description}] if description else []},
+        },
+    }
+
+
+def _apply_properties(page, properties):
+    """PATCH 요청 형식(text.content)의 속성을 응답 형식(plain_text)으로 반영합니다."""
+    for key, value in properties.items():
+        if "rich_text" in value:
+            value = {"rich_text": [{"plain_text": t.get("text", {}).get("content", t.get("plain_text", ""))}
+                                   for t in value["rich_text"]]}
+        elif "title" in value:
+            value = {"title": [{"plain_text": t.get("text", {}).get("content", t.get("plain_text", ""))}
+                               for t in value["title"]]}
+        page["properties"][key] = value
+
+
+class MockNotion:
+    def __init__(self, pages=(), rate_limit=None, latency=0.0):
+        self.pages = {p["id"]: p for p in pages}
+        self.rate_limit = rate_limit
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.requests = {"query": 0, "patch": 0, "create": 0, "throttled": 0}
+        self._tokens = rate_limit or 0
+        self._updated = time.monotonic()
+
+    def admit(self):
+        """토큰 버킷이 비어 있으면 False (429)."""
+        if self.latency:
+            time.sleep(self.latency)
+        if not self.rate_limit:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate_limit, self._tokens + (now - self._updated) * self.rate_limit)
+            self._updated = now
+            if self._tokens < 1:
+                self.requests["throttled"] += 1
+                return False
+            self._tokens -= 1
+            return True
+
+    def query(self, body):
+        with self.lock:
+            self.requests["query"] += 1
+            pages = list(self.pages.values())
+        condition = (body.get("filter") or {}).get("last_edited_time") or {}
+        if "on_or_after" in condition:
+            pages = [p for p in pages if p["last_edited_time"] >= condition["on_or_after"]]
+        if "after" in condition:
+            pages = [p for p in pages if p["last_edited_time"] > condition["after"]]
+        pages.sort(key=lambda p: (p["last_edited_time"], p["id"]))
+        if any(s.get("direction") == "descending" for s in body.get("sorts", [])):
+            pages.reverse()
+        size = min(int(body.get("page_size", MAX_PAGE_SIZE)), MAX_PAGE_SIZE)
+        start = int(body.get("start_cursor") or 0)
+        chunk = pages[start:start + size]
+        has_more = start + size < len(pages)
+        return {"object": "list", "results": chunk, "has_more": has_more,
+                "next_cursor": str(start + size) if has_more else None}
+
+    def patch(self, page_id, body):
+        with self.lock:
+            self.requests["patch"] += 1
+            page = self.pages.get(page_id)
+            if page is None:
+                return None
+            _apply_properties(page, body.get("properties", {}))
+            page["last_edited_time"] = notion_time()
+            return page
+
+    def create(self, body):
+        page = make_page("")
+        _apply_properties(page, body.get("properties", {}))
+        with self.lock:
+            self.requests["create"] += 1
+            self.pages[page["id"]] = page
+        return page
+
+
+class _Handler(BaseHTTPRequestHandler):
+    notion = None  # serve() 에서 설정
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send(self, status, payload):
+        raw = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_GET(self):
+        if self.path == "/_stats":
+            return self._send(200, dict(self.notion.requests, pages=len(self.notion.pages)))
+        self._send(404, {"message": "not found"})
+
+    def _throttled(self):
+        if self.notion.admit():
+            return False
+        raw = b'{"object": "error", "code": "rate_limited"}'
+        self.send_response(429)
+        self.send_header("Retry-After", "1")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+        return True
+
+    def do_POST(self):
+        if self._throttled():
+            return
+        if re.fullmatch(r"/v1/databases/[^/]+/query", self.path):
+            return self._send(200, self.notion.query(self._body()))
+        if self.path == "/v1/pages":
+            return self._send(200, self.notion.create(self._body()))
+        self._send(404, {"message": "not found"})
+
+    def do_PATCH(self):
+        if self._throttled():
+            return
+        match = re.fullmatch(r"/v1/pages/([^/]+)", self.path)
+        page = self.notion.patch(match.group(1), self._body()) if match else None
+        if page is None:
+            return self._send(404, {"object": "error", "message": "page not found"})
+        self._send(200, page)
+
+
+def serve(notion, host="127.0.0.1", port=0):
+    """백그라운드 스레드로 서버를 띄우고 (server, base_url) 을 반환합니다. port=0 이면 빈 포트."""
+    handler = type("Handler", (_Handler,), {"notion": notion})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def sample_pages(n):
+    categories = ["전자제품", "패션", "생활가전", None]
+    return [make_page(f"테스트 상품 {i}", categories[i % len(categories)], 1000 * (i + 1), i % 50,
+                      description="" if i % 3 == 0 else f"테스트 상품 {i} 설명")
+            for i in range(n)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate-limit", type=float, default=None, help="초당 허용 요청 수 (넘으면 429)")
+    parser.add_argument("--latency", type=float, default=0.0, help="요청마다 추가할 지연(초)")
+    args = parser.parse_args()
+    notion = MockNotion(sample_pages(args.pages), args.rate_limit, args.latency)
+    server, url = serve(notion, args.host, args.port)
+    print(f"🧪 mock 노션 서버: {url} (페이지 {args.pages}개)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
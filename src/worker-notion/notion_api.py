@@ -0,0 +1,121 @@
+"""속도 제한을 지키는 노션 API 클라이언트.
+
+노션 API 는 통합(integration)당 평균 초당 3회로 제한되고, 넘으면 429 와 Retry-After 를 돌려줍니다.
+- TokenBucket: 모든 스레드가 함께 쓰는 토큰 버킷. 429 를 받으면 Retry-After 동안 전체를 멈춥니다.
+- NotionClient: keep-alive 세션 + 429/5xx 재시도 + 페이지네이션
+"""
+import os
+import time
+import threading
+import requests
+from common import metrics
+
+NOTION_API_URL = os.getenv("NOTION_API_URL", "https://api.notion.com/v1")  # 테스트 시 mock_notion.py 주소
+NOTION_VERSION = "2022-06-28"
+NOTION_RATE = float(os.getenv("NOTION_RATE", "3"))          # 초당 요청 수
+NOTION_BURST = int(os.getenv("NOTION_BURST", "3"))          # 한 번에 몰아서 보낼 수 있는 요청 수
+NOTION_MAX_RETRIES = int(os.getenv("NOTION_MAX_RETRIES", "5"))
+NOTION_TIMEOUT = float(os.getenv("NOTION_TIMEOUT", "30"))
+
+
+class TokenBucket:
+    """초당 rate 개의 토큰이 burst 개까지 쌓이는 버킷. acquire() 는 토큰이 생길 때까지 기다립니다."""
+
+    def __init__(self, rate=NOTION_RATE, burst=NOTION_BURST, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.waited = 0.0
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self._clock()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            self.waited += wait
+            self._sleep(wait)
+
+    def pause(self, seconds):
+        """서버가 Retry-After 를 보내면 그동안 모든 요청을 멈추고 토큰도 비웁니다."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+            self._tokens = 0.0
+            self._updated = self._paused_until
+
+
+class NotionError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+class NotionClient:
+    def __init__(self, token, base_url=NOTION_API_URL, bucket=None, max_retries=NOTION_MAX_RETRIES):
+        self.base_url = base_url.rstrip("/")
+        self.bucket = bucket or TokenBucket()
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {token}",
+            "Notion-Version": NOTION_VERSION,
+            "Content-Type": "application/json"
+        })
+        self.requests = 0
+        self.throttled = 0
+
+    def request(self, method, path, body=None):
+        """요청을 보내고 JSON 을 반환합니다. 429/5xx/연결 오류는 재시도하고, 그 밖의 오류는 NotionError."""
+        for attempt in range(self.max_retries + 1):
+            with metrics.span("notion.rate_wait"):
+                self.bucket.acquire()
+            self.requests += 1
+            try:
+                with metrics.span(f"notion.{method.lower()}"):
+                    res = self.session.request(method, self.base_url + path, json=body, timeout=NOTION_TIMEOUT)
+            except requests.RequestException as e:
+                if attempt == self.max_retries:
+                    raise
+                print(f"⚠️ 노션 연결 오류, 다시 시도합니다: {e}")
+                time.sleep(min(2 ** attempt, 30))
+                continue
+            if res.status_code == 429:
+                self.throttled += 1
+                retry_after = float(res.headers.get("Retry-After") or 1)
+                self.bucket.pause(retry_after)
+                continue
+            if res.status_code >= 500 and attempt < self.max_retries:
+                time.sleep(min(2 ** attempt, 30))
+                continue
+            if res.status_code != 200:
+                raise NotionError(res.status_code, res.text)
+            return res.json()
+        raise NotionError(429, f"{self.max_retries}번 재시도 후에도 요청 제한에 걸렸습니다.")
+
+    def query_database(self, database_id, body):
+        """데이터베이스 query 결과를 has_more / next_cursor 를 따라 끝까지 내보냅니다."""
+        body = dict(body)
+        while True:
+            data = self.request("POST", f"/databases/{database_id}/query", body)
+            yield from data.get("results", [])
+            if not data.get("has_more"):
+                break
+            body["start_cursor"] = data["next_cursor"]
+
+    def update_page(self, page_id, properties):
+        return self.request("PATCH", f"/pages/{page_id}", {"properties": properties})
+
+    def stats(self):
+        return {"requests": self.requests, "throttled": self.throttled, "waited": round(self.bucket.waited, 2)}
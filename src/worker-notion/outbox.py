@@ -0,0 +1,195 @@
+"""MariaDB → ChromaDB 반영용 outbox.
+
+상품 INSERT 와 같은 트랜잭션에서 product_outbox 에 product_id 를 넣고, OutboxDrainer 가
+모아서 임베딩 + upsert 합니다. Chroma/임베딩이 실패해도 outbox 행이 남아 있으므로
+지수 백오프로 다시 시도하고, 상품이 검색에서 영영 빠지는 일이 없습니다.
+묶음이 실패하면 반씩 나눠 다시 시도해서 실패한 상품의 행만 백오프합니다 (나머지는 바로 반영).
+접속/요청 제한처럼 상품과 무관한 실패는 나누지 않고 묶음 전체를 백오프합니다.
+
+worker3 는 replicas: 1 로 하나만 실행되므로 행 잠금(SKIP LOCKED) 없이 꺼내 씁니다.
+"""
+import os
+import time
+import threading
+import httpx
+import openai
+import mysql.connector
+from common import clients, metrics
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "200"))     # 한 번에 꺼내 임베딩/upsert 할 행 수
+OUTBOX_POLL = float(os.getenv("OUTBOX_POLL", "5"))                 # 할 일이 없을 때 다시 확인하는 주기(초)
+OUTBOX_MAX_BACKOFF = int(os.getenv("OUTBOX_MAX_BACKOFF", "600"))   # 재시도 간격 상한(초)
+
+ER_NO_SUCH_TABLE = 1146
+
+# 특정 상품 때문이 아니라 서비스 상태 때문에 난 실패 (묶음을 나눠 봐야 같은 에러)
+TRANSIENT_ERRORS = (clients.CircuitOpenError, httpx.TransportError, openai.APIConnectionError,
+                    openai.RateLimitError, openai.InternalServerError, ConnectionError, TimeoutError)
+
+
+def product_text(product):
+    """임베딩할 문서. worker3 가 저장 전에 같은 텍스트로 임베딩 캐시를 미리 채웁니다."""
+    return f"{product['name']} {product['category']} {product['description']}"
+
+
+def product_document(product):
+    """Chroma 에 넣을 (id, 문서, 메타데이터)."""
+    text = product_text(product)
+    metadata = {"name": product["name"], "category": product["category"] or "",
+                "description": product["description"] or ""}
+    return str(product["id"]), text, metadata
+
+
+def upsert_products(collection, embed_many, products):
+    """여러 상품을 한 번의 임베딩 배치 + 한 번의 upsert 로 저장합니다."""
+    if not products:
+        return
+    ids, texts, metadatas = zip(*(product_document(p) for p in products))
+    now = time.time()
+    collection.upsert(
+        ids=list(ids),
+        embeddings=embed_many(list(texts)),
+        # updated_at: product-app 벡터 인덱스가 증분 동기화에 사용
+        metadatas=[dict(m, updated_at=now) for m in metadatas],
+        documents=list(texts)
+    )
+
+
+def enqueue(cursor, product_ids):
+    """상품 쓰기와 같은 트랜잭션에서 호출합니다. outbox 테이블이 아직 없으면 False."""
+    if not product_ids:
+        return True
+    try:
+        cursor.executemany("INSERT INTO product_outbox (product_id) VALUES (%s)", [(i,) for i in product_ids])
+        return True
+    except mysql.connector.Error as err:
+        if err.errno != ER_NO_SUCH_TABLE:
+            raise
+        print(f"⚠️ product_outbox 테이블이 없습니다 (python -m app.migrations 필요): {err}")
+        return False
+
+
+class OutboxDrainer:
+    """outbox 를 비우는 백그라운드 스레드. wake() 로 바로 깨울 수 있습니다."""
+
+    def __init__(self, db_cursor, get_collection, embed_many, batch_size=OUTBOX_BATCH_SIZE, poll=OUTBOX_POLL):
+        self._db_cursor = db_cursor
+        self._get_collection = get_collection
+        self._embed_many = embed_many
+        self.batch_size = batch_size
+        self.poll = poll
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.indexed = 0
+        self.failed = 0
+
+    def drain_once(self):
+        """기한이 된 outbox 행을 한 묶음 처리하고 처리한 행 수를 반환합니다 (0 이면 할 일 없음)."""
+        with self._db_cursor(dictionary=True) as (conn, cursor):
+            cursor.execute(
+                "SELECT id, product_id FROM product_outbox WHERE next_attempt_at <= NOW() ORDER BY id LIMIT %s",
+                (self.batch_size,)
+            )
+            entries = cursor.fetchall()
+            if not entries:
+                return 0
+            product_ids = list(dict.fromkeys(e["product_id"] for e in entries))
+            placeholders = ", ".join(["%s"] * len(product_ids))
+            cursor.execute(
+                f"SELECT id, name, category, description FROM products WHERE id IN ({placeholders})", product_ids
+            )
+            products = cursor.fetchall()
+
+        # 임베딩/Chroma 호출 동안에는 DB 커넥션을 잡고 있지 않습니다.
+        batch_error = None
+        try:
+            collection = self._get_collection()
+            with metrics.span("outbox.upsert"):
+                errors = self._upsert(collection, products)
+        except Exception as e:
+            batch_error, errors = e, {}  # 컬렉션을 얻지 못하면 묶음 전체를 나중에
+
+        # 실패한 행은 에러 메시지별로 한 번에 백오프하고, 나머지는 지웁니다 (그 사이 지워진 상품 포함).
+        retry = {}
+        done_ids = []
+        for entry in entries:
+            error = batch_error or errors.get(entry["product_id"])
+            if error is None:
+                done_ids.append(entry["id"])
+            else:
+                retry.setdefault(str(error)[:1000], []).append(entry["id"])
+        with self._db_cursor() as (conn, cursor):
+            if done_ids:
+                placeholders = ", ".join(["%s"] * len(done_ids))
+                cursor.execute(f"DELETE FROM product_outbox WHERE id IN ({placeholders})", done_ids)
+            for message, entry_ids in retry.items():
+                placeholders = ", ".join(["%s"] * len(entry_ids))
+                cursor.execute(
+                    "UPDATE product_outbox SET attempts = attempts + 1, last_error = %s,"
+                    " next_attempt_at = NOW() + INTERVAL LEAST(POW(2, attempts), %s) SECOND"
+                    f" WHERE id IN ({placeholders})",
+                    [message, OUTBOX_MAX_BACKOFF] + entry_ids
+                )
+
+        indexed = 0 if batch_error else len(products) - len(errors)
+        self.indexed += indexed
+        if indexed:
+            print(f"✅ ChromaDB 저장 성공: {indexed}개 (outbox)")
+        if retry:
+            failed = sum(len(ids) for ids in retry.values())
+            self.failed += failed
+            first_error = batch_error or next(iter(errors.values()))
+            print(f"⚠️ ChromaDB 저장 에러 (outbox {failed}개, 나중에 다시 시도): {first_error}")
+            if not done_ids:
+                raise first_error  # 아무것도 못 했으면 run() 이 poll 만큼 쉬었다가 다시 시도
+        return len(entries)
+
+    def _upsert(self, collection, products):
+        """products 를 upsert 하고 실패한 상품의 {id: 에러} 를 반환합니다.
+
+        묶음이 실패하면 반씩 나눠 다시 시도합니다 (이미 만든 임베딩은 EmbeddingService 캐시에 남음).
+        TRANSIENT_ERRORS 는 나누지 않고 묶음 전체를 실패로 돌려줍니다.
+        """
+        if not products:
+            return {}
+        try:
+            upsert_products(collection, self._embed_many, products)
+            return {}
+        except TRANSIENT_ERRORS as e:
+            return {p["id"]: e for p in products}
+        except Exception as e:
+            if len(products) == 1:
+                return {products[0]["id"]: e}
+        middle = len(products) // 2
+        errors = self._upsert(collection, products[:middle])
+        errors.update(self._upsert(collection, products[middle:]))
+        return errors
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                while self.drain_once() >= self.batch_size and not self._stop.is_set():
+                    pass  # 가득 찬 묶음이었으면 쉬지 않고 다음 묶음
+            except mysql.connector.Error as err:
+                if err.errno != ER_NO_SUCH_TABLE:
+                    print(f"⚠️ outbox 처리 중 DB 에러: {err}")
+            except Exception:
+                pass  # drain_once 에서 기록함. poll 뒤에 다시 시도
+            self._wake.wait(self.poll)
+            self._wake.clear()
+
+    def wake(self):
+        self._wake.set()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="outbox", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def stats(self):
+        return {"indexed": self.indexed, "failed": self.failed}
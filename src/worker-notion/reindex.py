@@ -0,0 +1,91 @@
+"""ChromaDB products 컬렉션을 MariaDB 기준으로 다시 만듭니다.
+
+    cd src/worker-notion   (컨테이너에서는 /app)
+    python reindex.py                       # 전체 상품을 다시 임베딩해서 upsert
+    python reindex.py --recreate            # 컬렉션을 지우고 새로 만든 뒤 채움
+    python reindex.py --batch-size 256 --concurrency 4
+
+MariaDB 에서는 버퍼링하지 않는 커서로 batch-size 행씩 흘려 읽고(전체를 메모리에 올리지 않음),
+각 묶음의 임베딩 + upsert 는 최대 concurrency 개까지 동시에 진행합니다.
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import clients
+from worker3 import connect_db, embeddings
+from outbox import upsert_products
+
+COLLECTION_NAME = clients.CHROMA_COLLECTION
+
+
+def get_collection(recreate=False):
+    chroma_client = clients.get_chroma()
+    if recreate:
+        try:
+            chroma_client.delete_collection(COLLECTION_NAME)
+            print(f"🗑️ {COLLECTION_NAME} 컬렉션을 지웠습니다.")
+        except Exception:
+            pass
+        clients.invalidate_collection(COLLECTION_NAME)
+    return clients.get_collection(COLLECTION_NAME)
+
+
+def stream_products(conn, batch_size):
+    """products 를 id 순서로 batch_size 행씩 내보냅니다."""
+    cursor = conn.cursor(dictionary=True)  # 버퍼링하지 않는 커서 → 행을 받는 만큼만 메모리에
+    try:
+        cursor.execute("SELECT id, name, category, description FROM products ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+
+
+def reindex(batch_size=256, concurrency=4, recreate=False, collection=None, conn=None, embed_many=None):
+    collection = collection or get_collection(recreate)
+    conn = conn or connect_db()
+    embed_many = embed_many or embeddings.embed_many
+    slots = threading.BoundedSemaphore(concurrency * 2)  # DB 읽기가 임베딩보다 너무 앞서지 않도록
+    done = {"rows": 0, "failed": 0}
+    lock = threading.Lock()
+    started = time.monotonic()
+
+    def work(rows):
+        try:
+            upsert_products(collection, embed_many, rows)
+            with lock:
+                done["rows"] += len(rows)
+                elapsed = time.monotonic() - started
+                print(f"   {done['rows']:>8}개  {done['rows'] / elapsed:8.1f}개/초")
+        except Exception as e:
+            with lock:
+                done["failed"] += len(rows)
+            print(f"⚠️ id {rows[0]['id']}~{rows[-1]['id']} 저장 실패: {e}")
+        finally:
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for rows in stream_products(conn, batch_size):
+            slots.acquire()
+            pool.submit(work, rows)
+    conn.close()
+
+    elapsed = time.monotonic() - started
+    rate = done["rows"] / elapsed if elapsed else 0.0
+    print(f"✅ 재색인 완료: {done['rows']}개, 실패 {done['failed']}개, {elapsed:.1f}초 ({rate:.1f}개/초)")
+    return done
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=256, help="한 번에 임베딩/upsert 할 상품 수")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시에 처리할 묶음 수")
+    parser.add_argument("--recreate", action="store_true", help="컬렉션을 지우고 새로 만듦")
+    args = parser.parse_args()
+    result = reindex(args.batch_size, args.concurrency, args.recreate)
+    raise SystemExit(1 if result["failed"] else 0)
@@ -0,0 +1,84 @@
+"""worker3 의 노션 동기화 상태 저장소 (SQLite).
+
+- sync_meta: 마지막으로 끝까지 처리한 last_edited_time (high-water mark)
+- pages: 노션 page_id → 마지막으로 처리한 내용 해시
+  같은 해시의 페이지(우리가 PATCH 해서 last_edited_time 만 바뀐 페이지 포함)는 다시 처리하지 않습니다.
+"""
+import os
+import hashlib
+import json
+import sqlite3
+import threading
+
+SYNC_STATE_PATH = os.getenv("SYNC_STATE_PATH", "worker3_state.sqlite3")
+
+HIGH_WATER_KEY = "last_edited_time"
+
+
+def content_hash(fields):
+    """동기화 대상 필드의 해시. 노션 페이지와 DB 행을 같은 방식으로 비교하기 위해 값을 정규화합니다."""
+    normalized = {
+        "name": (fields.get("name") or "").strip(),
+        "category": fields.get("category") or "미분류",
+        "price": float(fields.get("price") or 0),
+        "stock": float(fields.get("stock") or 0),
+        "image_url": fields.get("image_url") or "",
+        "description": (fields.get("description") or "").strip(),
+    }
+    raw = json.dumps(normalized, ensure_ascii=False, sort_keys=True)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class SyncState:
+    def __init__(self, path=SYNC_STATE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS sync_meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " page_id TEXT PRIMARY KEY,"
+            " content_hash TEXT NOT NULL,"
+            " last_edited_time TEXT)"
+        )
+        self._conn.commit()
+
+    def high_water_mark(self):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM sync_meta WHERE key = ?", (HIGH_WATER_KEY,)).fetchone()
+        return row[0] if row else None
+
+    def set_high_water_mark(self, value):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO sync_meta (key, value) VALUES (?, ?)", (HIGH_WATER_KEY, value))
+            self._conn.commit()
+
+    def page_hash(self, page_id):
+        with self._lock:
+            row = self._conn.execute("SELECT content_hash FROM pages WHERE page_id = ?", (page_id,)).fetchone()
+        return row[0] if row else None
+
+    def set_page_hash(self, page_id, value, last_edited_time=None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (page_id, content_hash, last_edited_time) VALUES (?, ?, ?)",
+                (page_id, value, last_edited_time),
+            )
+            self._conn.commit()
+
+    def reset(self):
+        """다음 동기화가 전체를 다시 처리하도록 모든 상태를 지웁니다."""
+        with self._lock:
+            self._conn.execute("DELETE FROM sync_meta")
+            self._conn.execute("DELETE FROM pages")
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            pages = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        return {"pages": pages, "high_water_mark": self.high_water_mark()}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,115 @@
+"""OutboxDrainer 테스트: 묶음 안의 한 상품이 실패해도 나머지는 반영되고, 실패한 행만 백오프되는지 확인합니다."""
+from contextlib import contextmanager
+
+import httpx
+import pytest
+
+from outbox import OutboxDrainer
+
+
+class FakeOutboxDB:
+    """drain_once 가 보내는 SQL 만 흉내 내는 db_cursor."""
+
+    def __init__(self, products):
+        self.products = {p["id"]: p for p in products}
+        self.entries = [{"id": 100 + p["id"], "product_id": p["id"]} for p in products]
+        self.deleted = []
+        self.backoff = {}  # entry id → last_error
+
+    @contextmanager
+    def cursor(self, dictionary=False):
+        yield None, self
+
+    def execute(self, sql, params=()):
+        self._result = []
+        if sql.startswith("SELECT id, product_id FROM product_outbox"):
+            self._result = [dict(e) for e in self.entries]
+        elif sql.startswith("SELECT id, name, category, description FROM products"):
+            self._result = [dict(self.products[i]) for i in params if i in self.products]
+        elif sql.startswith("DELETE FROM product_outbox"):
+            self.deleted.extend(params)
+        elif sql.startswith("UPDATE product_outbox"):
+            for entry_id in params[2:]:
+                self.backoff[entry_id] = params[0]
+
+    def fetchall(self):
+        return self._result
+
+
+class FakeCollection:
+    def __init__(self, error=None):
+        self.error = error
+        self.upserts = []
+        self.ids = set()
+
+    def upsert(self, ids, embeddings, metadatas, documents):
+        self.upserts.append(list(ids))
+        if self.error is not None:
+            raise self.error
+        self.ids.update(ids)
+
+
+def products(n):
+    return [{"id": i, "name": f"상품 {i}", "category": "전자제품", "description": f"설명 {i}"} for i in range(1, n + 1)]
+
+
+def embed_many_failing_on(bad_names):
+    def embed_many(texts):
+        for text in texts:
+            if any(text.startswith(name + " ") for name in bad_names):
+                raise ValueError(f"임베딩 실패: {text}")
+        return [[1.0, 0.0] for _ in texts]
+    return embed_many
+
+
+def test_one_bad_product_only_backs_off_its_row():
+    db = FakeOutboxDB(products(8))
+    collection = FakeCollection()
+    drainer = OutboxDrainer(db.cursor, lambda: collection, embed_many_failing_on(["상품 5"]))
+
+    assert drainer.drain_once() == 8
+
+    assert collection.ids == {str(i) for i in range(1, 9)} - {"5"}
+    assert sorted(db.deleted) == [101, 102, 103, 104, 106, 107, 108]
+    assert list(db.backoff) == [105]
+    assert "상품 5" in db.backoff[105]
+    assert drainer.stats() == {"indexed": 7, "failed": 1}
+
+
+def test_deleted_products_leave_the_outbox():
+    db = FakeOutboxDB(products(3))
+    del db.products[2]
+    collection = FakeCollection()
+    drainer = OutboxDrainer(db.cursor, lambda: collection, embed_many_failing_on([]))
+
+    drainer.drain_once()
+
+    assert collection.upserts == [["1", "3"]]
+    assert sorted(db.deleted) == [101, 102, 103]
+
+
+def test_transient_error_backs_off_whole_batch_without_splitting():
+    db = FakeOutboxDB(products(8))
+    collection = FakeCollection(httpx.ConnectError("connection refused"))
+    drainer = OutboxDrainer(db.cursor, lambda: collection, embed_many_failing_on([]))
+
+    with pytest.raises(httpx.ConnectError):
+        drainer.drain_once()
+
+    assert len(collection.upserts) == 1
+    assert db.deleted == []
+    assert sorted(db.backoff) == [101 + i for i in range(8)]
+
+
+def test_collection_failure_backs_off_whole_batch():
+    db = FakeOutboxDB(products(2))
+
+    def get_collection():
+        raise RuntimeError("컬렉션 없음")
+
+    drainer = OutboxDrainer(db.cursor, get_collection, embed_many_failing_on([]))
+    with pytest.raises(RuntimeError):
+        drainer.drain_once()
+
+    assert sorted(db.backoff) == [101, 102]
+    assert db.deleted == []
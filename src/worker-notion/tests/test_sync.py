@@ -0,0 +1,203 @@
+"""worker3 노션 동기화 테스트.
+
+mock_notion.py 서버에 sync_once 를 돌려서 페이지네이션(has_more/start_cursor), last_edited_time 필터,
+해시가 같은 페이지 건너뛰기, 내용이 같으면 PATCH 하지 않기, 실패한 항목의 재시도를 확인합니다.
+MariaDB 는 worker3 의 조회/저장 함수를 메모리 dict 로 바꿔서 대신합니다.
+"""
+import pytest
+
+import mock_notion
+import worker3
+from notion_api import NotionClient, TokenBucket
+from sync_state import SyncState
+
+
+def edited(minute):
+    return f"2024-01-01T00:{minute:02d}:00.000Z"
+
+
+def page(name, minute, **fields):
+    fields.setdefault("category", "전자제품")
+    fields.setdefault("price", 1000)
+    fields.setdefault("stock", 5)
+    fields.setdefault("description", f"{name} 설명")
+    return mock_notion.make_page(name, edited=edited(minute), **fields)
+
+
+class FakeShop:
+    """get_db_products / insert_to_db 를 대신하는 메모리 상품 테이블."""
+
+    def __init__(self):
+        self.rows = {}
+        self.fail_names = set()
+        self.lookups = 0
+
+    def add(self, name, **fields):
+        row = {"id": len(self.rows) + 1, "name": name, "category": "전자제품", "price": 1000, "stock": 5,
+               "image_url": "", "description": f"{name} 설명"}
+        row.update(fields)
+        self.rows[worker3.name_key(name)] = row
+
+    def get_db_products(self, names):
+        self.lookups += 1
+        return {worker3.name_key(n): dict(self.rows[worker3.name_key(n)])
+                for n in names if worker3.name_key(n) in self.rows}
+
+    def insert_to_db(self, products, assets=None):
+        ids = {}
+        for p in products:
+            if p["name"] in self.fail_names:
+                continue
+            self.add(p["name"], **{k: p[k] for k in ("category", "price", "stock", "image_url", "description")})
+            ids[worker3.name_key(p["name"])] = self.rows[worker3.name_key(p["name"])]["id"]
+        return ids
+
+
+@pytest.fixture
+def notion():
+    server_notion = mock_notion.MockNotion()
+    server_notion.bodies = []
+    query = server_notion.query
+
+    def recording_query(body):
+        server_notion.bodies.append(body)
+        return query(body)
+
+    server_notion.query = recording_query
+    server, url = mock_notion.serve(server_notion)
+    yield server_notion, url
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def sync(notion, monkeypatch, tmp_path):
+    """(mock 노션, 상품 테이블, 동기화 상태) 를 준비하고 sync_once 를 부르는 함수를 돌려줍니다."""
+    server_notion, url = notion
+    shop = FakeShop()
+    state = SyncState(str(tmp_path / "state.sqlite3"))
+    monkeypatch.setattr(worker3, "notion", NotionClient("test", base_url=url, bucket=TokenBucket(1000, 1000)))
+    monkeypatch.setattr(worker3, "DATABASE_ID", "mock")
+    monkeypatch.setattr(worker3, "SYNC_PAGE_SIZE", 3)
+    monkeypatch.setattr(worker3, "get_db_products", shop.get_db_products)
+    monkeypatch.setattr(worker3, "insert_to_db", shop.insert_to_db)
+
+    def run(full=False):
+        server_notion.bodies.clear()
+        return worker3.sync_once(state, full)
+
+    run.notion, run.shop, run.state = server_notion, shop, state
+    yield run
+    state.close()
+
+
+def add_pages(server_notion, pages):
+    for p in pages:
+        server_notion.pages[p["id"]] = p
+    return pages
+
+
+def test_first_sync_follows_pagination(sync):
+    pages = add_pages(sync.notion, [page(f"상품 {i}", i) for i in range(7)])
+
+    counts = sync()
+
+    assert counts == {"created": 7}
+    # page_size 3 → 3 + 3 + 1, next_cursor 를 start_cursor 로 넘김
+    assert [b.get("start_cursor") for b in sync.notion.bodies] == [None, "3", "6"]
+    assert all(b["page_size"] == 3 and "filter" not in b for b in sync.notion.bodies)
+    assert set(sync.shop.rows) == {worker3.name_key(p["properties"]["name"]["title"][0]["plain_text"])
+                                   for p in pages}
+    assert sync.notion.requests["patch"] == 7
+    assert sync.state.high_water_mark() == edited(6)
+
+
+def test_incremental_sync_filters_by_high_water_mark(sync):
+    add_pages(sync.notion, [page("오래된 상품", 1), page("새 상품", 5)])
+    sync()
+    mark = sync.state.high_water_mark()
+    assert mark == edited(5)
+
+    later = add_pages(sync.notion, [page("나중에 추가된 상품", 30)])[0]
+    counts = sync()
+
+    body = sync.notion.bodies[0]
+    assert body["filter"] == {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": mark}}
+    assert body["sorts"] == [{"timestamp": "last_edited_time", "direction": "ascending"}]
+    # 첫 동기화의 write-back 으로 last_edited_time 이 바뀐 두 페이지는 해시가 같아 건너뜀
+    assert counts == {"created": 1, "skip": 2}
+    assert worker3.name_key("나중에 추가된 상품") in sync.shop.rows
+    assert sync.state.page_hash(later["id"]) is not None
+
+
+def test_unchanged_pages_are_skipped(sync):
+    add_pages(sync.notion, [page(f"상품 {i}", i) for i in range(4)])
+    sync()
+    patches, lookups = sync.notion.requests["patch"], sync.shop.lookups
+
+    counts = sync()
+
+    assert counts == {"skip": 4}
+    assert sync.notion.requests["patch"] == patches
+    assert sync.shop.lookups == lookups  # DB 조회도 하지 않음
+
+
+def test_no_patch_when_db_and_notion_are_equal(sync):
+    p = add_pages(sync.notion, [page("같은 상품", 1, price=2000)])[0]
+    sync.shop.add("같은 상품", price=2000)
+
+    counts = sync()
+
+    assert counts == {"same": 1}
+    assert sync.notion.requests["patch"] == 0
+    assert sync.state.page_hash(p["id"]) is not None
+
+
+def test_db_changes_are_pushed_to_notion(sync):
+    p = add_pages(sync.notion, [page("가격 바뀐 상품", 1, price=2000)])[0]
+    sync.shop.add("가격 바뀐 상품", price=3000)
+
+    counts = sync()
+
+    assert counts == {"pushed": 1}
+    assert sync.notion.requests["patch"] == 1
+    assert sync.notion.pages[p["id"]]["properties"]["price"] == {"number": 3000}
+
+
+def test_failed_items_hold_back_high_water_mark(sync):
+    add_pages(sync.notion, [page("상품 A", 1), page("실패 상품", 2), page("상품 C", 3)])
+    sync.shop.fail_names.add("실패 상품")
+
+    counts = sync()
+
+    assert counts == {"created": 2, "error": 1}
+    # 실패한 페이지의 last_edited_time 에 묶어 두어 다음 변경분 동기화에서 다시 가져옴
+    assert sync.state.high_water_mark() == edited(2)
+
+    sync.shop.fail_names.clear()
+    counts = sync()
+
+    assert counts == {"created": 1, "skip": 2}
+    assert worker3.name_key("실패 상품") in sync.shop.rows
+    assert sync.state.high_water_mark() > edited(3)  # 실패가 없으면 본 페이지 중 가장 늦은 시각까지
+
+
+def test_failed_write_back_is_retried(sync, monkeypatch):
+    p = add_pages(sync.notion, [page("노션 갱신 실패", 1, price=2000)])[0]
+    sync.shop.add("노션 갱신 실패", price=3000)
+    update = worker3.update_notion_page
+    fail = {"on": True}
+    monkeypatch.setattr(worker3, "update_notion_page", lambda *args: False if fail["on"] else update(*args))
+
+    counts = sync()
+
+    assert counts == {"pushed": 1, "error": 1}
+    assert sync.state.page_hash(p["id"]) is None
+    assert sync.state.high_water_mark() == edited(1)
+
+    fail["on"] = False
+    counts = sync()
+
+    assert counts == {"pushed": 1}
+    assert sync.notion.pages[p["id"]]["properties"]["price"] == {"number": 3000}
+    assert sync.state.page_hash(p["id"]) is not None
@@ -1,213 +1,486 @@
 import os
 import time
+import queue
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 import requests
 import mysql.connector
-import chromadb
-from openai import OpenAI
+from common import clients, images, metrics
+from common.embedding import create_embedding_service
+from sync_state import SyncState, content_hash
+from notion_api import NotionClient, NotionError
+from outbox import OutboxDrainer, enqueue, product_text, upsert_products
+from enrichment import create_description_service
 
 # 1. 환경 변수 로드
 NOTION_TOKEN = os.getenv("NOTION_TOKEN")
 DATABASE_ID = os.getenv("NOTION_DB_ID")
-OPENAI_KEY = os.getenv("OPENAI_API_KEY")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 
-client = OpenAI(api_key=OPENAI_KEY)
+# 동기화 주기 설정
+SYNC_INTERVAL = float(os.getenv("SYNC_INTERVAL", "30"))             # 변경분 확인 주기(초)
+SYNC_FULL_INTERVAL = float(os.getenv("SYNC_FULL_INTERVAL", "3600"))  # 전체 대조 주기(초), DB 쪽 변경을 노션에 반영
+SYNC_PAGE_SIZE = int(os.getenv("SYNC_PAGE_SIZE", "100"))            # 노션 query 한 번에 받을 페이지 수 (최대 100)
 
-NOTION_HEADERS = {
-    "Authorization": f"Bearer {NOTION_TOKEN}",
-    "Notion-Version": "2022-06-28",
-    "Content-Type": "application/json"
-}
+# 파이프라인 설정
+SYNC_BATCH_SIZE = int(os.getenv("SYNC_BATCH_SIZE", "50"))           # DB INSERT / Chroma upsert 한 번에 묶을 상품 수
+NOTION_WRITE_CONCURRENCY = int(os.getenv("NOTION_WRITE_CONCURRENCY", "3"))  # 노션 PATCH 스레드 수 (속도는 토큰 버킷이 제한)
+IMAGE_CONCURRENCY = int(os.getenv("IMAGE_CONCURRENCY", "4"))        # 동시에 내려받아 변환할 상품 이미지 수
+
+client = clients.get_openai()
+embeddings = create_embedding_service(client)
+descriptions = create_description_service(client)  # GPT 동시 요청 수는 OPENAI_CONCURRENCY
+notion = NotionClient(NOTION_TOKEN)
+
+notion_pool = ThreadPoolExecutor(max_workers=NOTION_WRITE_CONCURRENCY, thread_name_prefix="notion")
+image_pool = ThreadPoolExecutor(max_workers=IMAGE_CONCURRENCY, thread_name_prefix="image")
 
 def get_chroma_collection():
-    """ChromaDB 컬렉션을 반환합니다."""
-    chroma_client = chromadb.HttpClient(host="chromadb-service", port=8000)
-    return chroma_client.get_or_create_collection(name="products")
+    """ChromaDB 컬렉션을 반환합니다. 클라이언트와 컬렉션 핸들은 common.clients 가 캐시합니다."""
+    return clients.get_collection()
 
-def get_db_connection():
-    """MariaDB 연결 객체를 반환합니다."""
+_db_conn = None
+_db_lock = threading.Lock()
+
+def connect_db():
+    """MariaDB 커넥션을 새로 엽니다."""
     return mysql.connector.connect(
         host="mariadb-service",
         user="root",
         password=DB_PASSWORD,
-        database="shop"
+        database="shop",
+        autocommit=True  # 오래 쓰는 커넥션이 예전 스냅샷을 보지 않도록. 쓰기는 명시적 트랜잭션
     )
 
-def is_already_exists(name):
-    """DB에 동일한 이름의 상품이 있는지 확인합니다."""
-    try:
+def get_db_connection():
+    """MariaDB 연결 객체를 반환합니다. 하나의 커넥션을 계속 재사용하고, 끊겼으면 다시 연결합니다."""
+    global _db_conn
+    if _db_conn is None:
+        _db_conn = connect_db()
+    else:
+        _db_conn.ping(reconnect=True, attempts=3, delay=1)
+    return _db_conn
+
+@contextmanager
+def db_cursor(dictionary=False):
+    """공유 커넥션의 커서. 여러 스레드가 동시에 쓰지 않도록 잠급니다.
+
+    블록에서 어떤 예외가 나든 롤백합니다. 커밋 전에 멈춘 트랜잭션이 남으면 커넥션을 함께 쓰는
+    다음 호출자가 그 쓰기까지 커밋하게 됩니다.
+    """
+    with _db_lock:
         conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id FROM products WHERE name = %s", (name,))
-        result = cursor.fetchone()
-        return result is not None
+        cursor = conn.cursor(dictionary=dictionary)
+        try:
+            yield conn, cursor
+        except BaseException:
+            try:
+                conn.rollback()
+            except mysql.connector.Error:
+                pass
+            raise
+        finally:
+            cursor.close()
+
+# MariaDB 에 저장된 상품을 ChromaDB 에 반영하는 백그라운드 스레드 (main 에서 시작)
+drainer = OutboxDrainer(db_cursor, get_chroma_collection, embeddings.embed_many)
+
+def name_key(name):
+    """DB 의 상품명 비교와 같게 (utf8mb4_general_ci: 대소문자/끝 공백 무시) 정규화한 키."""
+    return (name or "").rstrip().casefold()
+
+@metrics.timed("worker.db_lookup")
+def get_db_products(names):
+    """여러 상품명을 한 번의 WHERE name IN (...) 으로 조회해서 {name_key: 행} 으로 반환합니다.
+
+    존재 확인과 행 조회를 한 번에 합니다. name 에는 UNIQUE 인덱스가 있습니다 (product-app 마이그레이션 6).
+    조회에 실패하면 None (이번 배치는 건너뛰고 다음 주기에 다시 시도).
+    """
+    names = list(dict.fromkeys(names))
+    if not names:
+        return {}
+    placeholders = ", ".join(["%s"] * len(names))
+    try:
+        with db_cursor(dictionary=True) as (conn, cursor):
+            cursor.execute(f"SELECT * FROM products WHERE name IN ({placeholders})", names)
+            return {name_key(row["name"]): row for row in cursor.fetchall()}
     except mysql.connector.Error as err:
-        print(f"❌ 중복 확인 중 에러: {err}")
-        return False
-    finally:
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
+        print(f"❌ DB 조회 에러: {err}")
+        return None
 
-def get_gpt_description(name, category):
-    """GPT를 이용해 상품 상세 설명을 생성합니다."""
-    prompt = f"상품명: {name}, 카테고리: {category}. 이 상품을 홍보하는 짧고 매력적인 문구 한 줄을 써줘."
+def bump_cache_version(cursor):
+    """product-app 페이지 캐시를 무효화하도록 버전을 올립니다. 상품 쓰기와 같은 트랜잭션에서 호출합니다."""
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}]
+        cursor.execute(
+            "INSERT INTO cache_versions (name, version) VALUES ('products', 1) "
+            "ON DUPLICATE KEY UPDATE version = version + 1"
         )
-        return response.choices[0].message.content
-    except Exception as e:
-        print(f"⚠️ GPT 에러: {e}")
-        return "멋진 상품입니다!"
-
-def get_embedding(text):
-    """OpenAI 임베딩을 생성합니다."""
-    response = client.embeddings.create(
-        model="text-embedding-ada-002",
-        input=text
-    )
-    return response.data[0].embedding
+    except mysql.connector.Error as err:
+        if err.errno != 1146:  # 마이그레이션 전이라 테이블이 없으면 무시
+            raise
+        print(f"⚠️ cache_versions 테이블이 없습니다 (python -m app.migrations 필요): {err}")
 
-def insert_to_db(product_data):
-    """MariaDB에 데이터를 저장하고 id를 반환합니다."""
+def save_assets(cursor, assets):
+    """이미지 변형 [(원본 URL, Variant)] 을 product_assets 에 저장합니다. 상품 쓰기와 같은 트랜잭션에서 호출합니다."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        sql = """
-        INSERT INTO products (name, category, price, description, stock, image_url)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        """
-        cursor.execute(sql, product_data)
-        conn.commit()
-        product_id = cursor.lastrowid
-        print(f"✅ MariaDB 저장 성공: {product_data[0]} (id={product_id})")
-        return product_id
+        cursor.executemany(
+            "INSERT INTO product_assets (name, source, width, format, content_type, data) "
+            "VALUES (%s, %s, %s, %s, %s, %s) ON DUPLICATE KEY UPDATE name = name",
+            [(v.name, source, v.width, v.format, v.content_type, v.data) for source, v in assets]
+        )
     except mysql.connector.Error as err:
-        print(f"❌ DB 저장 에러: {err}")
-        return None
-    finally:
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
+        if err.errno != 1146:  # 마이그레이션 전이라 테이블이 없으면 무시 (원본 image_url 사용)
+            raise
+        print(f"⚠️ product_assets 테이블이 없습니다 (python -m app.migrations 필요): {err}")
+
+@metrics.timed("worker.db_insert")
+def insert_to_db(products, assets=None):
+    """여러 상품을 한 트랜잭션의 multi-row INSERT 로 저장하고 {name_key: id} 를 반환합니다.
 
-def insert_to_chroma(product_id, name, category, description):
-    """ChromaDB에 벡터를 저장합니다."""
+    같은 트랜잭션에서 product_outbox 에도 넣으므로, ChromaDB 반영은 outbox drainer 가 책임집니다.
+    assets 는 새 상품 이미지의 변형 [(원본 URL, Variant)] 입니다.
+    """
+    if not products:
+        return {}
+    rows = [(p["name"], p["category"], p["price"], p["description"], p["stock"], p["image_url"])
+            for p in products]
+    names = [p["name"] for p in products]
     try:
-        collection = get_chroma_collection()
-        text = f"{name} {category} {description}"
-        embedding = get_embedding(text)
-        collection.upsert(
-            ids=[str(product_id)],
-            embeddings=[embedding],
-            metadatas=[{"name": name, "category": category, "description": description}],
-            documents=[text]
-        )
-        print(f"✅ ChromaDB 저장 성공: {name}")
-    except Exception as e:
-        print(f"⚠️ ChromaDB 저장 에러: {e}")
+        with db_cursor() as (conn, cursor):
+            conn.start_transaction()
+            # executemany 는 INSERT ... VALUES 를 한 문장의 여러 행으로 묶어서 보냅니다.
+            # 그 사이 같은 이름이 먼저 들어왔으면(UNIQUE 충돌) 기존 행을 그대로 둡니다.
+            cursor.executemany(
+                "INSERT INTO products (name, category, price, description, stock, image_url) "
+                "VALUES (%s, %s, %s, %s, %s, %s) ON DUPLICATE KEY UPDATE id = id",
+                rows
+            )
+            # multi-row INSERT 의 id 가 연속이라는 보장이 없으므로 이름으로 다시 조회
+            placeholders = ", ".join(["%s"] * len(names))
+            cursor.execute(f"SELECT id, name FROM products WHERE name IN ({placeholders})", names)
+            ids = {name_key(name): product_id for product_id, name in cursor.fetchall()}
+            queued = enqueue(cursor, list(ids.values()))
+            if assets:
+                save_assets(cursor, assets)
+            bump_cache_version(cursor)
+            conn.commit()
+        print(f"✅ MariaDB 저장 성공: {len(ids)}개")
+        if queued:
+            drainer.wake()
+        else:
+            # 마이그레이션 전이라 outbox 가 없으면 예전처럼 바로 저장
+            try:
+                upsert_products(get_chroma_collection(), embeddings.embed_many,
+                                [dict(p, id=ids[name_key(p["name"])]) for p in products
+                                 if name_key(p["name"]) in ids])
+            except Exception as e:
+                print(f"⚠️ ChromaDB 저장 에러: {e}")
+        return ids
+    except mysql.connector.Error as err:
+        print(f"❌ DB 저장 에러: {err}")
+        return {}
 
 def update_notion_page(page_id, name, category, price, description, stock, image_url):
     """MariaDB 데이터로 노션 페이지를 업데이트합니다."""
-    url = f"https://api.notion.com/v1/pages/{page_id}"
-    data = {
-        "properties": {
-            "category": {
-                "select": {"name": category} if category and category != '미분류' else None
-            },
-            "price": {"number": price},
-            "stock": {"number": stock},
-            "image_url": {"url": image_url if image_url else None},
-            "description": {
-                "rich_text": [{"text": {"content": description}}]
-            }
+    properties = {
+        "category": {
+            "select": {"name": category} if category and category != '미분류' else None
+        },
+        "price": {"number": price},
+        "stock": {"number": stock},
+        "image_url": {"url": image_url if image_url else None},
+        "description": {
+            "rich_text": [{"text": {"content": description}}]
         }
     }
-    res = requests.patch(url, headers=NOTION_HEADERS, json=data)
-    if res.status_code == 200:
-        print(f"✅ 노션 업데이트 성공: {name}")
-    else:
-        print(f"⚠️ 노션 업데이트 실패: {name} - {res.text}")
-
-def get_db_product(name):
-    """MariaDB에서 상품 데이터를 가져옵니다."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM products WHERE name = %s", (name,))
-        return cursor.fetchone()
-    except mysql.connector.Error as err:
-        print(f"❌ DB 조회 에러: {err}")
+        notion.update_page(page_id, properties)
+    except (NotionError, requests.RequestException) as e:
+        print(f"⚠️ 노션 업데이트 실패: {name} - {e}")
+        return False
+    print(f"✅ 노션 업데이트 성공: {name}")
+    return True
+
+def query_changed_pages(since=None):
+    """since(last_edited_time) 이후 수정된 페이지를 오래된 순서로 모두 가져옵니다.
+
+    has_more / next_cursor 를 따라 끝까지 읽습니다. 요청 속도는 NotionClient 의 토큰 버킷이 맞춥니다.
+    """
+    body = {
+        "page_size": SYNC_PAGE_SIZE,
+        "sorts": [{"timestamp": "last_edited_time", "direction": "ascending"}],
+    }
+    if since:
+        # 노션의 last_edited_time 은 분 단위라 같은 시각의 페이지가 다시 올 수 있음 → 해시로 거릅니다.
+        body["filter"] = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": since}}
+    return notion.query_database(DATABASE_ID, body)
+
+def parse_page(page):
+    """노션 페이지 속성을 dict 로 바꿉니다. 상품명이 없으면 None."""
+    props = page.get('properties', {})
+    title_list = props.get('name', {}).get('title', [])
+    name = title_list[0].get('plain_text', '') if title_list else ''
+    if not name:
         return None
+    desc_list = props.get('description', {}).get('rich_text', [])
+    return {
+        "name": name,
+        "category": (props.get('category', {}).get('select') or {}).get('name', '미분류'),
+        "price": props.get('price', {}).get('number') or 0,
+        "stock": props.get('stock', {}).get('number') or 0,
+        "image_url": props.get('image_url', {}).get('url') or '',
+        "description": desc_list[0].get('plain_text', '') if desc_list else '',
+    }
+
+# ---- 동기화 파이프라인: fetch → enrich → persist → index → write-back ----
+# fetch 는 별도 스레드에서 다음 노션 페이지를 미리 읽고, index(ChromaDB)는 outbox drainer 스레드가,
+# write-back(노션 PATCH)은 스레드 풀에서 토큰 버킷 속도에 맞춰 처리하므로
+# 그동안 다음 배치의 GPT/DB 작업이 진행됩니다.
+
+class SyncItem:
+    __slots__ = ("page_id", "edited", "fields", "page_hash", "assets")
+
+    def __init__(self, page, fields):
+        self.page_id = page.get('id')
+        self.edited = page.get('last_edited_time')
+        self.fields = fields
+        self.page_hash = content_hash(fields)
+        self.assets = []  # image_url 의 썸네일/WebP 변형 (enrich 단계에서 채움)
+
+_DONE = object()
+
+# 진행 중인 동기화의 대기열 (/metrics 게이지용)
+_pipeline = {"batches": None, "pending": []}
+
+def pipeline_stats():
+    batches = _pipeline["batches"]
+    return {"batch_queue": batches.qsize() if batches is not None else 0,
+            "write_back_pending": sum(1 for _, f in list(_pipeline["pending"]) if not f.done())}
+
+metrics.register_stats("pipeline", pipeline_stats)
+metrics.register_stats("notion", notion.stats)
+metrics.register_stats("outbox", drainer.stats)
+metrics.register_stats("embedding", embeddings.stats)
+metrics.register_stats("descriptions", descriptions.stats)
+metrics.register_stats("chroma_breaker", clients.chroma_breaker.stats)
+
+def fetch_stage(state, since, full, out, result):
+    """노션에서 변경분을 읽어 처리할 페이지만 SYNC_BATCH_SIZE 개씩 out 큐에 넣습니다."""
+    batch = []
+    try:
+        for page in query_changed_pages(since):
+            edited = page.get('last_edited_time')
+            if edited and (result["newest"] is None or edited > result["newest"]):
+                result["newest"] = edited
+            fields = parse_page(page)
+            if fields is None:
+                result["counts"]["invalid"] += 1
+                continue
+            item = SyncItem(page, fields)
+            # 지난번 처리 후 노션 내용이 그대로면 건너뜀 (전체 대조 때는 DB 변경을 보기 위해 계속 진행)
+            if not full and state.page_hash(item.page_id) == item.page_hash:
+                result["counts"]["skip"] += 1
+                continue
+            batch.append(item)
+            if len(batch) >= SYNC_BATCH_SIZE:
+                out.put(batch)
+                batch = []
+        if batch:
+            out.put(batch)
+    except Exception as e:
+        result["error"] = e
     finally:
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
+        out.put(_DONE)
+
+def known_asset_sources(urls):
+    """이미 변형이 저장된 원본 URL 집합. product_assets 테이블이 없으면 None (변환하지 않음)."""
+    if not urls:
+        return set()
+    placeholders = ", ".join(["%s"] * len(urls))
+    try:
+        with db_cursor() as (conn, cursor):
+            cursor.execute(f"SELECT DISTINCT source FROM product_assets WHERE source IN ({placeholders})", list(urls))
+            return {source for (source,) in cursor.fetchall()}
+    except mysql.connector.Error as err:
+        if err.errno == 1146:
+            return None
+        raise
+
+@metrics.timed("worker.image")
+def build_assets(url):
+    """원격 이미지를 내려받아 변형을 만듭니다. 실패하면 빈 목록 (상품은 원본 image_url 로 저장)."""
+    try:
+        return images.variants_for_url(url)
+    except images.ImageError as e:
+        print(f"⚠️ 이미지 변환 실패 (원본 사용): {e}")
+        return []
+
+@metrics.timed("worker.enrich")
+def enrich_stage(items):
+    """새 상품을 한 번에 보강합니다.
+
+    - 설명이 없는 상품은 GPT 로 설명 생성 (캐시/묶음/속도 제한은 enrichment.DescriptionService)
+    - 설명이 정해지면 Chroma 에 넣을 문서의 임베딩을 미리 계산 (EmbeddingService 캐시에 남으므로
+      outbox drainer 의 upsert 는 API 를 다시 호출하지 않음)
+    - 그동안 원격 image_url 의 썸네일/WebP 변형 생성 (동시 IMAGE_CONCURRENCY 개)
+    """
+    urls = {item.fields["image_url"] for item in items if images.is_remote(item.fields["image_url"])}
+    known = known_asset_sources(urls)
+    image_jobs = {}
+    if known is not None:
+        image_jobs = {url: image_pool.submit(build_assets, url) for url in urls - known}
+
+    missing = [item for item in items if not item.fields["description"]]
+    for item in items:
+        how = "GPT 설명 생성 중..." if not item.fields["description"] else "노션 설명 사용"
+        print(f"📦 새 상품 발견: '{item.fields['name']}' ({how})")
+    texts = descriptions.describe_many([(item.fields["name"], item.fields["category"]) for item in missing])
+    for item, description in zip(missing, texts):
+        item.fields["description"] = description
+
+    try:
+        embeddings.embed_many([product_text(item.fields) for item in items])
+    except Exception as e:
+        print(f"⚠️ 임베딩 미리 계산 실패 (outbox 에서 다시 시도): {e}")
+
+    variants = {url: job.result() for url, job in image_jobs.items()}
+    for item in items:
+        item.assets = variants.pop(item.fields["image_url"], [])  # 같은 URL 은 한 상품에만 붙여서 한 번 저장
+
+def write_back(state, item, fields):
+    """노션 페이지를 fields 로 갱신하고, 성공하면 그 내용의 해시를 기록합니다."""
+    ok = update_notion_page(item.page_id, fields["name"], fields.get('category', '미분류'), fields.get('price', 0),
+                            fields.get('description', ''), fields.get('stock', 0), fields.get('image_url', ''))
+    if ok:
+        state.set_page_hash(item.page_id, content_hash(fields), item.edited)
+    return ok
+
+@metrics.timed("worker.batch")
+def process_batch(batch, state, counts, pending, failed):
+    """배치를 처리합니다. 실패한 항목은 failed 에 넣고, 노션 갱신은 (항목, future) 로 pending 에 넣습니다."""
+    # 배치 전체의 상품명을 한 번에 조회 (존재 확인 + 행 조회)
+    db_products = get_db_products([item.fields["name"] for item in batch])
+    if db_products is None:
+        failed.extend(batch)
+        return
+
+    # [Case 1] MariaDB에 이미 있는 상품 → 내용이 다를 때만 노션을 MariaDB 기준으로 업데이트
+    new_items = []
+    seen = set()
+    for item in batch:
+        name = item.fields["name"]
+        key = name_key(name)
+        db_product = db_products.get(key)
+        if db_product is None:
+            # 같은 배치에 같은 이름의 페이지가 여러 개면 첫 페이지만 새 상품으로 저장
+            if key in seen:
+                counts["invalid"] += 1
+            else:
+                seen.add(key)
+                new_items.append(item)
+            continue
+        db_fields = dict(db_product, name=name)
+        if content_hash(db_fields) == item.page_hash:
+            state.set_page_hash(item.page_id, item.page_hash, item.edited)
+            counts["same"] += 1
+            continue
+        pending.append((item, notion_pool.submit(write_back, state, item, db_fields)))
+        counts["pushed"] += 1
+
+    # [Case 2] 새 상품 → 설명 생성 → MariaDB 일괄 INSERT(+outbox) → 노션 업데이트
+    #          ChromaDB 는 outbox drainer 가 따로 일괄 upsert
+    if not new_items:
+        return
+    enrich_stage(new_items)
+    ids = insert_to_db([item.fields for item in new_items],
+                       [(item.fields["image_url"], v) for item in new_items for v in item.assets])
+    created = [item for item in new_items if name_key(item.fields["name"]) in ids]
+    # 저장 실패한 상품은 해시를 남기지 않고, sync_once 가 mark 를 그 last_edited_time 에 묶어 두므로
+    # 다음 변경분 동기화에서 다시 가져와 시도합니다.
+    failed.extend(item for item in new_items if name_key(item.fields["name"]) not in ids)
+    for item in created:
+        pending.append((item, notion_pool.submit(write_back, state, item, item.fields)))
+    counts["created"] += len(created)
+
+def next_high_water_mark(since, newest, failed):
+    """이번 동기화 후의 high-water mark.
+
+    실패한 항목이 있으면 그중 가장 오래된 last_edited_time 을 넘지 않습니다. 노션 query 필터가
+    on_or_after 라서 그 항목부터 다시 가져오고, 이미 처리한 페이지는 해시가 같아 건너뜁니다.
+    """
+    mark = newest
+    oldest_failed = min((item.edited for item in failed if item.edited), default=None)
+    if oldest_failed is not None and (mark is None or oldest_failed < mark):
+        mark = oldest_failed
+    if since is not None and (mark is None or mark < since):
+        mark = since
+    return mark
+
+@metrics.timed("worker.sync")
+def sync_once(state, full=False):
+    """변경된 페이지(full 이면 전체)를 처리하고 high-water mark 를 올립니다 (실패한 항목 앞까지만)."""
+    since = None if full else state.high_water_mark()
+    counts = {"skip": 0, "same": 0, "pushed": 0, "created": 0, "invalid": 0, "error": 0}
+    result = {"newest": since, "error": None, "counts": counts}
+    batches = queue.Queue(maxsize=2)  # fetch 가 너무 앞서 나가지 않도록
+    _pipeline["batches"] = batches
+    fetcher = threading.Thread(target=fetch_stage, args=(state, since, full, batches, result), daemon=True)
+    fetcher.start()
+
+    pending = _pipeline["pending"] = []
+    failed = []
+    while True:
+        batch = batches.get()
+        if batch is _DONE:
+            break
+        try:
+            process_batch(batch, state, counts, pending, failed)
+        except Exception as e:
+            print(f"⚠️ 데이터 처리 중 오류: {e}")
+            failed.extend(batch)
+    fetcher.join()
+    for item, future in pending:
+        try:
+            ok = future.result()
+        except Exception as e:
+            print(f"⚠️ 노션 업데이트 처리 중 오류: {e}")
+            ok = False
+        if not ok:
+            failed.append(item)
+    counts["error"] += len(failed)
+
+    # 중간에 query 가 실패하면 mark 는 그대로 두고 다음 주기에 다시 처리
+    if result["error"] is not None:
+        raise result["error"]
+    mark = next_high_water_mark(since, result["newest"], failed)
+    if mark and mark != since:
+        state.set_high_water_mark(mark)
+    return {k: v for k, v in counts.items() if v}
 
 def main():
     print("🚀 Worker3 배달원이 노션을 감시 중입니다...")
+    state = SyncState()
+    print(f"   동기화 상태: {state.stats()}")
+    metrics.serve()
+    drainer.start()
+    last_full = 0.0
 
     while True:
-        url = f"https://api.notion.com/v1/databases/{DATABASE_ID}/query"
-        response = requests.post(url, headers=NOTION_HEADERS)
-
-        if response.status_code == 200:
-            pages = response.json().get('results', [])
-
-            for page in pages:
-                props = page.get('properties', {})
-                page_id = page.get('id')
-
-                try:
-                    title_list = props.get('name', {}).get('title', [])
-                    if not title_list:
-                        continue
-                    name = title_list[0].get('plain_text', '')
-                    if not name:
-                        continue
-
-                    # [Case 1] MariaDB에 이미 있는 상품 → 노션을 MariaDB 기준으로 업데이트
-                    if is_already_exists(name):
-                        db_product = get_db_product(name)
-                        if db_product:
-                            update_notion_page(
-                                page_id,
-                                name,
-                                db_product.get('category', '미분류'),
-                                db_product.get('price', 0),
-                                db_product.get('description', ''),
-                                db_product.get('stock', 0),
-                                db_product.get('image_url', '')
-                            )
-                        continue
-
-                    # [Case 2] 새 상품 → description 확인 → MariaDB INSERT → ChromaDB 저장 → 노션 업데이트
-                    category = (props.get('category', {}).get('select') or {}).get('name', '미분류')
-                    price = props.get('price', {}).get('number') or 0
-                    stock = props.get('stock', {}).get('number') or 0
-                    image_url = props.get('image_url', {}).get('url') or ''
-
-                    # 노션에 description이 있으면 그대로, 없으면 GPT 생성
-                    notion_desc_list = props.get('description', {}).get('rich_text', [])
-                    notion_description = notion_desc_list[0].get('plain_text', '') if notion_desc_list else ''
-
-                    if notion_description:
-                        print(f"📦 새 상품 발견: '{name}' (노션 설명 사용)")
-                        description = notion_description
-                    else:
-                        print(f"📦 새 상품 발견: '{name}' (GPT 설명 생성 중...)")
-                        description = get_gpt_description(name, category)
-
-                    product_data = (name, category, price, description, stock, image_url)
-                    product_id = insert_to_db(product_data)
-
-                    if product_id:
-                        insert_to_chroma(product_id, name, category, description)
-
-                    update_notion_page(page_id, name, category, price, description, stock, image_url)
-
-                except Exception as e:
-                    print(f"⚠️ 데이터 처리 중 오류: {e}")
-
-        time.sleep(30)
+        full = time.monotonic() - last_full >= SYNC_FULL_INTERVAL
+        started = time.monotonic()
+        try:
+            counts = sync_once(state, full)
+            if full:
+                last_full = started
+            if counts:
+                kind = "전체 대조" if full else "변경분"
+                print(f"🔄 {kind} 동기화 {time.monotonic() - started:.1f}초: {counts} / 노션 {notion.stats()}"
+                      f" / outbox {drainer.stats()}")
+        except (NotionError, requests.RequestException) as e:
+            print(f"⚠️ 노션 조회 실패 (다음 주기에 다시 시도): {e}")
+
+        time.sleep(SYNC_INTERVAL)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()